@@ -19,6 +19,33 @@ class Settings(BaseSettings):
     # Dahili Servis Güvenliği (Backend -> AI Service iletişimi için)
     AI_SERVICE_API_KEY: Optional[str] = None
 
+    # Backend ile paylaşılan volume (docker-compose: shared_uploads -> /app/uploads)
+    SHARED_UPLOADS_DIR: str = "/app/uploads"
+
+    # Single-flight: aynı belge + sağlayıcı + mod için eşzamanlı işleri birleştir
+    SINGLEFLIGHT_ENABLED: bool = True
+    SINGLEFLIGHT_LOCK_TTL_SECONDS: int = 300      # Liderin en uzun çalışma süresi
+    SINGLEFLIGHT_WAIT_TIMEOUT_SECONDS: int = 240  # Takipçinin en uzun bekleme süresi
+    SINGLEFLIGHT_RESULT_TTL_SECONDS: int = 60     # Sonucun geç gelenler için saklanma süresi
+
+    # Celery işçi modu:
+    #   "prefork" -> varsayılan, her süreç tek görev (CPU ağırlıklı işler için)
+    #   "io"      -> gevent havuzu; süreç başına yüzlerce LLM çağrısı beklenebilir,
+    #                PDF metin çıkarma küçük bir süreç havuzuna aktarılır.
+    CELERY_WORKER_MODE: str = "prefork"
+    CPU_POOL_SIZE: int = 2
+    # Özetleme görevlerinin kuyruğu. "celery" -> varsayılan işçi; "llm" -> yalnızca
+    # I/O işçisi (aiceleryworker_io, -Q llm). "llm" seçilip I/O işçisi çalışmazsa görevler bekler.
+    CELERY_SUMMARY_QUEUE: str = "celery"
+
+    # Görev sonucu callback'leri (Celery -> Backend)
+    CALLBACK_MAX_RETRIES: int = 4
+    CALLBACK_BACKOFF_BASE_SECONDS: float = 0.5
+    CALLBACK_BATCH_LINGER_MS: int = 50            # Aynı anda bitenleri toplama penceresi
+    CALLBACK_BATCH_MAX: int = 50
+    CALLBACK_OUTBOX_DRAIN_INTERVAL_SECONDS: int = 30
+    CALLBACK_OUTBOX_MAX_AGE_SECONDS: int = 24 * 60 * 60
+
     # --- Pydantic Ayarları ---
     model_config = SettingsConfigDict(
         env_file=".env",
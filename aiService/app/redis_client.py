@@ -0,0 +1,30 @@
+# aiService/app/redis_client.py
+import logging
+
+import redis
+
+from .config import settings
+
+log = logging.getLogger(__name__)
+
+redis_client = None
+
+try:
+    # Celery broker ile aynı Redis; koordinasyon (kilit, bekleme listesi) için kullanılır.
+    redis_client = redis.Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=5,
+        # BLPOP beklemeleri bu süreden kısa tutulmalı
+        socket_timeout=30,
+        retry_on_timeout=True,
+    )
+    redis_client.ping()
+    log.info(f"Redis bağlantısı başarılı: {settings.REDIS_URL}")
+except redis.exceptions.ConnectionError as e:
+    log.warning(f"Redis bağlantısı kurulamadı ({settings.REDIS_URL}): {e}")
+    log.warning("Single-flight koordinasyonu devre dışı, işler tek tek çalışacak.")
+    redis_client = None
+except Exception as e:
+    log.error(f"Redis hatası: {e}", exc_info=True)
+    redis_client = None
@@ -1,11 +1,14 @@
 # aiservice/app/routers/analysis.py
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Depends
+import hashlib
+
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from ..tasks import pdf_tasks
-from ..services import ai_service, pdf_service
+from ..services import ai_service, pdf_service, singleflight
 from ..services.tts_manager import text_to_speech
 from ..services.llm_manager import CloudMode, LLMProvider, summarize_text, chat_over_pdf
 from ..deps import verify_api_key
@@ -15,23 +18,69 @@ router = APIRouter(
     tags=["AI Analysis"],
 )
 
+def _require_pdf_input(file: UploadFile | None, storage_path: str | None, text: UploadFile | None = None):
+    if file is None and not storage_path and text is None:
+        raise HTTPException(status_code=400, detail="'file', 'storage_path' veya 'text' gönderilmelidir.")
+
+
+async def _read_text_part(text: UploadFile | None) -> str | None:
+    """
+    Backend'in ön hesapladığı metin (pdf_artifacts). Form alanı yerine dosya parçası
+    olarak gelir; form alanları 1 MB ile sınırlı, dosya parçaları değil.
+    """
+    if text is None:
+        return None
+    return (await text.read()).decode("utf-8")
+
+
 @router.post("/summarize-sync")
 async def summarize_synchronous(
-    file: UploadFile = File(...),
+    file: UploadFile | None = File(None),
+    storage_path: str | None = Form(None),
+    text: UploadFile | None = File(None),
     llm_provider: LLMProvider = Query("cloud"),
     mode: CloudMode = Query("flash"),
     _: bool = Depends(verify_api_key),
 ):
+    """
+    PDF ya multipart `file` olarak ya da backend'in paylaşılan volume'e bıraktığı
+    dosyanın göreli yolu (`storage_path`) olarak gelir. İkincisinde dosya
+    memory-map ile diskten okunur, ağ üzerinden kopyalanmaz.
+    Backend metni önceden çıkardıysa (pdf_artifacts) PDF yerine `text` gelir; ayrıştırma atlanır.
+    """
+    _require_pdf_input(file, storage_path, text)
+    text = await _read_text_part(text)
     try:
-        pdf_bytes = await file.read()
-        text = pdf_service.extract_text_from_pdf_bytes(pdf_bytes)
-
         prompt = (
             "Bu PDF belgesini Türkçe olarak özetle. "
             "Ana konuları ve önemli noktaları madde madde belirt."
         )
 
-        summary = summarize_text(text, prompt, llm_provider=llm_provider, mode=mode)
+        if text is not None:
+            content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+            def _extract() -> str:
+                return text
+        elif storage_path:
+            pdf_path = pdf_service.resolve_shared_path(storage_path)
+            content_hash = await run_in_threadpool(singleflight.file_sha256, pdf_path)
+
+            def _extract() -> str:
+                return pdf_service.extract_text_from_pdf_path(pdf_path)
+        else:
+            pdf_bytes = await file.read()
+            content_hash = hashlib.sha256(pdf_bytes).hexdigest()
+
+            def _extract() -> str:
+                return pdf_service.extract_text_from_pdf_bytes(pdf_bytes)
+
+        def _summarize() -> str:
+            return summarize_text(_extract(), prompt, llm_provider=llm_provider, mode=mode)
+
+        # Aynı belge için eşzamanlı istekler tek sağlayıcı çağrısında birleşir.
+        # Bekleme event loop'u kilitlemesin diye threadpool'da çalışır.
+        key = singleflight.build_key(content_hash, llm_provider, mode, prompt)
+        summary = await run_in_threadpool(singleflight.run_coalesced, key, _summarize)
 
         return {
             "status": "completed",
@@ -80,18 +129,29 @@ class StartChatResponse(BaseModel):
 
 @router.post("/chat/start", response_model=StartChatResponse)
 async def start_chat(
-    file: UploadFile = File(...),
+    file: UploadFile | None = File(None),
+    storage_path: str | None = Form(None),
+    text: UploadFile | None = File(None),
+    filename: str | None = Form(None),
     llm_provider: LLMProvider = Query("cloud"),
     mode: CloudMode = Query("flash"),
     _: bool = Depends(verify_api_key),
 ):
-    pdf_bytes = await file.read()
-    text = pdf_service.extract_text_from_pdf_bytes(pdf_bytes)
+    _require_pdf_input(file, storage_path, text)
+    # text: backend'in ön hesapladığı metin (pdf_artifacts); varsa PDF ayrıştırılmaz
+    text = await _read_text_part(text)
+    if text is None and storage_path:
+        pdf_path = pdf_service.resolve_shared_path(storage_path)
+        text = await run_in_threadpool(pdf_service.extract_text_from_pdf_path, pdf_path)
+    elif text is None:
+        pdf_bytes = await file.read()
+        text = pdf_service.extract_text_from_pdf_bytes(pdf_bytes)
+        filename = filename or file.filename
 
     # DÜZELTME: Artık hem llm_provider hem mode gönderiyoruz, servis bunu karşılayacak.
     session_id = ai_service.create_pdf_chat_session(
         text,
-        filename=file.filename,
+        filename=filename,
         llm_provider=llm_provider,
         mode=mode,
     )
@@ -174,6 +234,12 @@ async def generate_speech(
     return StreamingResponse(audio_buffer, media_type="audio/mpeg")
 
 
+@router.get("/metrics/singleflight")
+def singleflight_metrics(_: bool = Depends(verify_api_key)):
+    """Birleştirilen (coalesced) özetleme isteklerinin sayısı ve oranı."""
+    return singleflight.get_stats()
+
+
 @router.get("/health")
 def health_check():
     return {
@@ -185,6 +251,7 @@ def health_check():
             "chat_start": "/api/v1/ai/chat/start",
             "chat": "/api/v1/ai/chat",
             "tts": "/api/v1/ai/tts",
+            "singleflight_metrics": "/api/v1/ai/metrics/singleflight",
         },
         "llm": {
             "providers": ["cloud", "local"],
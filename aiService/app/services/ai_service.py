@@ -9,7 +9,9 @@ from ..config import settings
 
 # --- 1. GEMINI API BAŞLATMA ---
 try:
-    genai.configure(api_key=settings.GEMINI_API_KEY)
+    # gevent ("io") işçisinde gRPC kanalları greenlet'lerle uyumlu değil; REST taşıma kullan.
+    _transport = "rest" if settings.CELERY_WORKER_MODE == "io" else None
+    genai.configure(api_key=settings.GEMINI_API_KEY, transport=_transport)
 except Exception as e:
     print(f"HATA: Gemini API yapılandırılamadı: {e}")
 
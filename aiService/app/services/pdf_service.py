@@ -1,9 +1,13 @@
 # ai_service/app/services/pdf_service.py
 
 import io
+import mmap
+import os
 import PyPDF2
 from fastapi import HTTPException
 
+from ..config import settings
+
 def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
     """
     Bir PDF dosyasının ham baytlarını (in-memory) alır ve metnini çıkarır.
@@ -39,17 +43,35 @@ def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
         raise HTTPException(status_code=500, detail=f"PDF işleme hatası: {str(e)}")
 
 
+def resolve_shared_path(relative_path: str) -> str:
+    """
+    Backend'in paylaşılan volume'e (shared_uploads) bıraktığı dosyanın mutlak yolunu döner.
+    Volume dışına çıkan yolları (../ vb.) reddeder.
+    """
+    root = os.path.realpath(settings.SHARED_UPLOADS_DIR)
+    full_path = os.path.realpath(os.path.join(root, relative_path))
+
+    if os.path.commonpath([root, full_path]) != root:
+        raise HTTPException(status_code=400, detail="Geçersiz dosya yolu.")
+    if not os.path.isfile(full_path):
+        raise HTTPException(status_code=404, detail=f"Dosya bulunamadı: {relative_path}")
+    return full_path
+
+
 def extract_text_from_pdf_path(storage_path: str) -> str:
     """
     Paylaşılan volume'deki bir PDF dosyasının yolunu alır ve metnini çıkarır.
-    Kayıtlı kullanıcıların asenkron Celery görevleri için kullanılır.
+    Dosya belleğe kopyalanmaz, memory-map ile doğrudan diskten okunur.
+    Kayıtlı kullanıcıların asenkron Celery görevleri ve backend'in
+    paylaşılan volume üzerinden devrettiği senkron istekler için kullanılır.
     """
     try:
         # Dosyayı paylaşılan diskten (shared_uploads) aç
-        with open(storage_path, "rb") as pdf_file:
+        with open(storage_path, "rb") as pdf_file, \
+                mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
             
             # PyPDF2 ile oku
-            reader = PyPDF2.PdfReader(pdf_file)
+            reader = PyPDF2.PdfReader(mapped)
             
             text_parts = []
             for page in reader.pages:
@@ -69,6 +91,8 @@ def extract_text_from_pdf_path(storage_path: str) -> str:
 
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Dosya bulunamadı: {storage_path}")
+    except HTTPException:
+        raise
     except PyPDF2.errors.PdfReadError:
         raise HTTPException(status_code=400, detail="Geçersiz veya bozuk PDF dosyası.")
     except Exception as e:
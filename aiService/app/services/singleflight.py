@@ -0,0 +1,206 @@
+# aiService/app/services/singleflight.py
+"""
+Aynı belge için aynı anda başlatılan özetleme işlerini tek bir sağlayıcı
+çağrısında birleştirir (single-flight).
+
+Anahtar: (içerik hash'i, llm_provider, mode, prompt). İlk gelen istek Redis
+kilidini alır ve "lider" olur; kilit doluyken gelenler "takipçi" olarak bekleme
+listesine yazılır ve liderin sonucunu BLPOP ile bekler. Lider bitirdiğinde
+sonucu her takipçi için listeye bir kez yazar.
+
+Redis yoksa veya devre dışıysa fonksiyon doğrudan çalıştırılır.
+"""
+
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+
+from ..config import settings
+from ..redis_client import redis_client
+
+log = logging.getLogger(__name__)
+
+KEY_PREFIX = "singleflight"
+STATS_KEY = f"{KEY_PREFIX}:stats"
+
+# Takipçi, lider hâlâ yaşıyor mu diye bu aralıklarla kontrol eder.
+POLL_INTERVAL_SECONDS = 2
+
+# KEYS: done_list, waiters_counter, result_key, lock_key
+# ARGV: payload, result_ttl, lock_token
+_PUBLISH_SCRIPT = """
+local n = tonumber(redis.call('GET', KEYS[2]) or '0')
+redis.call('SET', KEYS[3], ARGV[1], 'EX', ARGV[2])
+for i = 1, n do
+    redis.call('RPUSH', KEYS[1], ARGV[1])
+end
+if n > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+redis.call('DEL', KEYS[2])
+if redis.call('GET', KEYS[4]) == ARGV[3] then
+    redis.call('DEL', KEYS[4])
+end
+return n
+"""
+
+_publish = redis_client.register_script(_PUBLISH_SCRIPT) if redis_client is not None else None
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Dosyanın SHA-256 özetini belleğe tamamen almadan hesaplar."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_key(content_hash: str, llm_provider: str, mode: Optional[str], prompt: str) -> str:
+    """
+    Birleştirme anahtarı. Local sağlayıcıda mode kullanılmadığı için anahtara girmez;
+    sync ve Celery yolları farklı prompt kullandığından prompt da anahtarın parçasıdır.
+    """
+    mode_part = mode if llm_provider == "cloud" else "-"
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+    return f"{content_hash}:{llm_provider}:{mode_part}:{prompt_hash}"
+
+
+def _record(outcome: str) -> None:
+    try:
+        redis_client.hincrby(STATS_KEY, outcome, 1)
+    except Exception as e:
+        log.debug(f"Single-flight istatistiği yazılamadı: {e}")
+
+
+def _decode(payload: str) -> str:
+    data = json.loads(payload)
+    if "error" in data:
+        raise HTTPException(status_code=data.get("status_code", 500), detail=data["error"])
+    return data["result"]
+
+
+def run_coalesced(key: str, fn: Callable[[], str]) -> str:
+    """
+    `fn` çağrısını anahtar bazında tekilleştirir ve sonucunu (str) döndürür.
+    Liderin hatası takipçilere aynı status code ile iletilir.
+    """
+    if not settings.SINGLEFLIGHT_ENABLED or redis_client is None:
+        return fn()
+
+    lock_key = f"{KEY_PREFIX}:lock:{key}"
+    waiters_key = f"{KEY_PREFIX}:waiters:{key}"
+    done_key = f"{KEY_PREFIX}:done:{key}"
+    result_key = f"{KEY_PREFIX}:result:{key}"
+
+    try:
+        outcome, value = _acquire_or_wait(lock_key, waiters_key, done_key, result_key)
+    except RedisError as e:
+        # Redis koordinasyonu bozulursa işi kaybetmek yerine doğrudan çalıştır.
+        # Sadece Redis hataları buraya düşer; fn() hataları her zaman çağırana iletilir.
+        log.warning(f"Single-flight koordinasyon hatası ({key}): {e}")
+        _record("fallback")
+        return fn()
+
+    if outcome == "leader":
+        return _lead(fn, value, lock_key, waiters_key, done_key, result_key)
+    if outcome == "result":
+        return _decode(value)
+
+    log.warning(f"Single-flight bekleme süresi doldu, iş yerelde çalıştırılıyor: {key}")
+    _record("fallback")
+    return fn()
+
+
+def _acquire_or_wait(lock_key, waiters_key, done_key, result_key) -> tuple[str, Optional[str]]:
+    """
+    Kilidi alır ya da liderin sonucunu bekler; fn() burada hiç çağrılmaz.
+    Returns: ("leader", kilit token'ı) | ("result", yayınlanan sonuç) | ("timeout", None)
+    Raises: RedisError
+    """
+    deadline = time.monotonic() + settings.SINGLEFLIGHT_WAIT_TIMEOUT_SECONDS
+    joined = False
+
+    while True:
+        cached = redis_client.get(result_key)
+        if cached is not None:
+            _record("follower")
+            return "result", cached
+
+        token = uuid.uuid4().hex
+        if redis_client.set(lock_key, token, nx=True, ex=settings.SINGLEFLIGHT_LOCK_TTL_SECONDS):
+            _record("leader")
+            return "leader", token
+
+        if not joined:
+            redis_client.incr(waiters_key)
+            redis_client.expire(waiters_key, settings.SINGLEFLIGHT_LOCK_TTL_SECONDS)
+            joined = True
+
+        # Lider bitene, kilit düşene veya süre dolana kadar bekle.
+        while time.monotonic() < deadline:
+            popped = redis_client.blpop(done_key, timeout=POLL_INTERVAL_SECONDS)
+            if popped is not None:
+                _record("follower")
+                return "result", popped[1]
+            cached = redis_client.get(result_key)
+            if cached is not None:
+                _record("follower")
+                return "result", cached
+            if not redis_client.exists(lock_key):
+                # Lider sonuç yazmadan düştü; liderliği yeniden dene.
+                break
+        else:
+            return "timeout", None
+
+
+def _lead(fn, token, lock_key, waiters_key, done_key, result_key) -> str:
+    try:
+        result = fn()
+        payload = json.dumps({"result": result})
+    except HTTPException as e:
+        payload = json.dumps({"error": e.detail, "status_code": e.status_code})
+        _publish_payload(payload, token, lock_key, waiters_key, done_key, result_key, ttl=POLL_INTERVAL_SECONDS * 2)
+        raise
+    except Exception as e:
+        payload = json.dumps({"error": str(e), "status_code": 500})
+        _publish_payload(payload, token, lock_key, waiters_key, done_key, result_key, ttl=POLL_INTERVAL_SECONDS * 2)
+        raise
+
+    _publish_payload(payload, token, lock_key, waiters_key, done_key, result_key,
+                     ttl=settings.SINGLEFLIGHT_RESULT_TTL_SECONDS)
+    return result
+
+
+def _publish_payload(payload, token, lock_key, waiters_key, done_key, result_key, ttl: int) -> None:
+    try:
+        n = _publish(keys=[done_key, waiters_key, result_key, lock_key], args=[payload, max(1, ttl), token])
+        if n:
+            log.info(f"Single-flight sonucu {n} bekleyen isteğe iletildi.")
+    except Exception as e:
+        log.warning(f"Single-flight sonucu yayınlanamadı: {e}")
+
+
+def get_stats() -> dict:
+    """Lider/takipçi sayıları ve birleştirilen isteklerin oranı."""
+    counts = {"leader": 0, "follower": 0, "fallback": 0}
+    if redis_client is not None:
+        try:
+            for k, v in (redis_client.hgetall(STATS_KEY) or {}).items():
+                counts[k] = int(v)
+        except Exception as e:
+            log.warning(f"Single-flight istatistikleri okunamadı: {e}")
+
+    total = counts["leader"] + counts["follower"] + counts["fallback"]
+    return {
+        "enabled": bool(settings.SINGLEFLIGHT_ENABLED and redis_client is not None),
+        **counts,
+        "total": total,
+        "coalesced_rate": round(counts["follower"] / total, 4) if total else 0.0,
+    }
@@ -0,0 +1,266 @@
+# aiService/app/tasks/callbacks.py
+"""
+Celery görevlerinden backend'e sonuç callback'lerini ileten ortak dağıtıcı.
+
+- Süreç başına tek bir keep-alive'lı `httpx.Client` (bağlantı havuzu)
+- Geçici hatalarda (ağ, 5xx, 429) üstel geri çekilmeli yeniden deneme
+- Aynı anda biten görevlerin callback'leri kısa bir bekleme penceresinde
+  toplanıp backend'in `/callback/batch` ucuna tek istekte gönderilir
+- Teslim edilemeyen callback'ler Redis'teki outbox listesine yazılır ve
+  periyodik `tasks.drain_callback_outbox` görevi tarafından yeniden denenir.
+  Boşaltma sırasında kayıtlar işlem listesine taşınır (LMOVE) ve ancak teslim
+  edildikten / bilerek atıldıktan sonra silinir; süreç yarıda ölürse kayıtlar
+  işçi açılışında `recover_outbox` ile outbox'a geri döner (en az bir kez teslim).
+"""
+
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+import httpx
+
+from ..config import settings
+from ..redis_client import redis_client
+
+log = logging.getLogger(__name__)
+
+OUTBOX_KEY = "callbacks:outbox"
+PROCESSING_KEY = "callbacks:outbox:processing"
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+
+def _get_client() -> httpx.Client:
+    # prefork'ta her alt süreç kendi havuzunu fork'tan sonra oluşturur.
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60),
+            )
+        return _client
+
+
+def batch_url_for(callback_url: str) -> str:
+    """`.../files/callback/42` -> `.../files/callback/batch`"""
+    return callback_url.rsplit("/", 1)[0] + "/batch"
+
+
+class PermanentCallbackError(Exception):
+    """Backend isteği reddetti (4xx); yeniden denemenin anlamı yok."""
+
+
+def _post(url: str, body: dict, attempts: int) -> None:
+    last_err: Exception | None = None
+    for i in range(attempts):
+        try:
+            r = _get_client().post(url, json=body)
+            if r.status_code < 400:
+                return
+            if r.status_code != 429 and r.status_code < 500:
+                raise PermanentCallbackError(f"{r.status_code}: {r.text[:200]}")
+            last_err = httpx.HTTPStatusError(f"{r.status_code}", request=r.request, response=r)
+        except PermanentCallbackError:
+            raise
+        except httpx.HTTPError as e:
+            last_err = e
+
+        if i < attempts - 1:
+            sleep_s = settings.CALLBACK_BACKOFF_BASE_SECONDS * (2 ** i) + random.random() * 0.2
+            log.warning(f"Callback başarısız ({i + 1}/{attempts}), {sleep_s:.2f}s sonra tekrar: {url} | {last_err}")
+            time.sleep(sleep_s)
+    raise last_err
+
+
+def _outbox_entry(url: str, payload: dict, attempts: int, first_failed_at: float | None) -> str:
+    return json.dumps({
+        "url": url,
+        "payload": payload,
+        "attempts": attempts,
+        "first_failed_at": first_failed_at or time.time(),
+    })
+
+
+def push_to_outbox(url: str, payload: dict, attempts: int = 0, first_failed_at: float | None = None) -> bool:
+    if redis_client is None:
+        log.error(f"Callback teslim edilemedi ve Redis yok, kayboldu: {url} {payload}")
+        return False
+    try:
+        redis_client.rpush(OUTBOX_KEY, _outbox_entry(url, payload, attempts, first_failed_at))
+        log.warning(f"Callback outbox'a yazıldı: {url}")
+        return True
+    except Exception as e:
+        log.error(f"Callback outbox'a yazılamadı, kayboldu: {url} {payload} | {e}")
+        return False
+
+
+def send_group(items: list[tuple[str, dict]], attempts: int) -> list[tuple[str, dict]]:
+    """
+    Aynı backend'e giden callback'leri gönderir, teslim edilemeyenleri döndürür.
+    Birden fazla öğe varsa önce batch ucu denenir, olmazsa tek tek gönderilir.
+    """
+    if len(items) > 1:
+        try:
+            _post(batch_url_for(items[0][0]), {"callbacks": [p for _, p in items]}, attempts)
+            return []
+        except PermanentCallbackError as e:
+            # Eski backend batch ucunu tanımıyor olabilir; tek tek dene.
+            log.warning(f"Batch callback reddedildi, tek tek gönderiliyor: {e}")
+        except Exception as e:
+            log.warning(f"Batch callback gönderilemedi, tek tek deneniyor: {e}")
+            attempts = 1
+
+    failed = []
+    for url, payload in items:
+        try:
+            _post(url, payload, attempts)
+        except PermanentCallbackError as e:
+            log.error(f"Callback backend tarafından reddedildi, atlanıyor: {url} | {e}")
+        except Exception:
+            failed.append((url, payload))
+    return failed
+
+
+class CallbackDispatcher:
+    """
+    Görevler `deliver()` ile callback bırakır; arka plandaki gönderici iş parçacığı
+    kısa bir bekleme penceresinde biriken callback'leri backend bazında gruplar.
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="callback-dispatcher", daemon=True)
+                self._thread.start()
+
+    def deliver(self, url: str, payload: dict) -> bool:
+        """
+        Callback'i gönderir ve sonucu bekler. Teslim edilemezse outbox'a yazılır.
+        Returns: True -> backend'e ulaştı, False -> outbox'ta (veya kayboldu)
+        """
+        future: Future = Future()
+        self._queue.put((url, payload, future))
+        self._ensure_thread()
+        return future.result()
+
+    def _run(self) -> None:
+        linger = settings.CALLBACK_BATCH_LINGER_MS / 1000
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + linger
+            while len(batch) < settings.CALLBACK_BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch: list) -> None:
+        groups: dict[str, list] = {}
+        for url, payload, future in batch:
+            groups.setdefault(batch_url_for(url), []).append((url, payload, future))
+
+        for entries in groups.values():
+            try:
+                failed = send_group([(u, p) for u, p, _ in entries], settings.CALLBACK_MAX_RETRIES)
+            except Exception as e:
+                log.error(f"Callback gönderim hatası: {e}", exc_info=True)
+                failed = [(u, p) for u, p, _ in entries]
+
+            failed_ids = {id(p) for _, p in failed}
+            for url, payload, future in entries:
+                if id(payload) in failed_ids:
+                    push_to_outbox(url, payload, attempts=settings.CALLBACK_MAX_RETRIES)
+                    future.set_result(False)
+                else:
+                    future.set_result(True)
+
+
+dispatcher = CallbackDispatcher()
+
+
+def recover_outbox() -> int:
+    """
+    Yarıda kalan bir boşaltmanın işlem listesindeki kayıtlarını sırası korunarak
+    outbox'ın başına geri taşır. İşçi açılışında çağrılır (bkz. celery_worker).
+    Returns: geri taşınan kayıt sayısı
+    """
+    if redis_client is None:
+        return 0
+    recovered = 0
+    while redis_client.lmove(PROCESSING_KEY, OUTBOX_KEY, "RIGHT", "LEFT") is not None:
+        recovered += 1
+    if recovered:
+        log.warning(f"Callback outbox: yarıda kalan {recovered} kayıt geri alındı")
+    return recovered
+
+
+def drain_outbox(max_items: int = 100) -> dict:
+    """
+    Outbox'taki callback'leri backend bazında gruplayıp yeniden dener.
+    Kayıtlar işlem listesinden yalnızca teslim edildikten, outbox'a yeniden
+    yazıldıktan veya atıldıktan sonra silinir.
+    """
+    if redis_client is None:
+        return {"delivered": 0, "requeued": 0, "dropped": 0}
+
+    pipe = redis_client.pipeline()
+    for _ in range(max_items):
+        pipe.lmove(OUTBOX_KEY, PROCESSING_KEY, "LEFT", "RIGHT")
+    raw_items = [raw for raw in pipe.execute() if raw is not None]
+
+    delivered = requeued = dropped = 0
+    entries = []
+    for raw in raw_items:
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            log.error(f"Callback outbox'ta bozuk kayıt, atılıyor: {raw[:200]}")
+            redis_client.lrem(PROCESSING_KEY, 1, raw)
+            dropped += 1
+            continue
+        entry["raw"] = raw
+        entries.append(entry)
+
+    groups: dict[str, list] = {}
+    for entry in entries:
+        groups.setdefault(batch_url_for(entry["url"]), []).append(entry)
+
+    now = time.time()
+    for group in groups.values():
+        failed = send_group([(e["url"], e["payload"]) for e in group], attempts=1)
+        failed_ids = {id(p) for _, p in failed}
+        for entry in group:
+            pipe = redis_client.pipeline()
+            if id(entry["payload"]) not in failed_ids:
+                delivered += 1
+            elif now - entry["first_failed_at"] > settings.CALLBACK_OUTBOX_MAX_AGE_SECONDS:
+                log.error(f"Callback outbox'ta çok uzun kaldı, atılıyor: {entry['url']} {entry['payload']}")
+                dropped += 1
+            else:
+                pipe.rpush(OUTBOX_KEY, _outbox_entry(
+                    entry["url"], entry["payload"], entry["attempts"] + 1, entry["first_failed_at"]
+                ))
+                requeued += 1
+            # Yeniden yazma ve silme tek işlemde; arada ölünürse kayıt ikilenmez
+            pipe.lrem(PROCESSING_KEY, 1, entry["raw"])
+            pipe.execute()
+
+    if raw_items:
+        log.info(f"Callback outbox: {delivered} teslim, {requeued} yeniden kuyrukta, {dropped} atıldı")
+    return {"delivered": delivered, "requeued": requeued, "dropped": dropped}
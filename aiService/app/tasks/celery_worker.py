@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_ready, worker_shutdown
 from ..config import settings
 import logging
 
@@ -13,6 +14,53 @@ celery_app = Celery(
 
 celery_app.conf.update(
     task_track_started=True,
+    task_routes={
+        "tasks.async_summarize_pdf": {"queue": settings.CELERY_SUMMARY_QUEUE},
+    },
+    beat_schedule={
+        "drain-callback-outbox": {
+            "task": "tasks.drain_callback_outbox",
+            "schedule": settings.CALLBACK_OUTBOX_DRAIN_INTERVAL_SECONDS,
+        },
+    },
 )
 
-log.info(f"✅ Celery app 'ai_tasks' configured with broker: {settings.REDIS_URL}")
\ No newline at end of file
+if settings.CELERY_WORKER_MODE == "io":
+    # LLM çağrıları I/O bekler; her greenlet tek görev alsın ki uzun görevler
+    # kuyruktaki diğerlerini tutmasın.
+    celery_app.conf.update(
+        worker_prefetch_multiplier=1,
+        task_acks_late=True,
+    )
+
+    try:
+        from gevent import monkey
+
+        if not monkey.is_module_patched("socket"):
+            log.warning(
+                "CELERY_WORKER_MODE=io fakat gevent monkey-patch uygulanmamış. "
+                "İşçiyi '-P gevent -c <eşzamanlılık>' ile başlatın."
+            )
+    except ImportError:
+        log.warning("CELERY_WORKER_MODE=io için gevent kurulu olmalı.")
+
+
+@worker_ready.connect
+def _recover_callback_outbox(**_):
+    # Boşaltma sırasında ölen bir işçinin işlem listesinde kalan callback'ler
+    from .callbacks import recover_outbox
+
+    try:
+        recover_outbox()
+    except Exception as e:
+        log.error(f"Callback outbox kurtarılamadı: {e}", exc_info=True)
+
+
+@worker_shutdown.connect
+def _shutdown_cpu_pool(**_):
+    from .cpu_pool import shutdown
+
+    shutdown()
+
+
+log.info(f"✅ Celery app 'ai_tasks' configured with broker: {settings.REDIS_URL} (mode: {settings.CELERY_WORKER_MODE})")
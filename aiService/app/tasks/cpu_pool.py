@@ -0,0 +1,55 @@
+# aiService/app/tasks/cpu_pool.py
+"""
+"io" işçi modunda CPU ağırlıklı işleri (PDF metin çıkarma) küçük bir süreç
+havuzuna aktarır. gevent havuzundaki yüzlerce görev aynı süreçte çalıştığı için
+PyPDF2 ayrıştırması event loop'u (hub'ı) kilitlememeli.
+
+prefork modunda her görev zaten kendi sürecinde çalıştığından fonksiyon
+doğrudan çağrılır.
+"""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+from ..config import settings
+
+log = logging.getLogger(__name__)
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.CPU_POOL_SIZE)
+        log.info(f"CPU süreç havuzu başlatıldı ({settings.CPU_POOL_SIZE} süreç)")
+    return _executor
+
+
+def _call_in_child(fn: Callable, args: tuple) -> tuple:
+    # HTTPException pickle edilemediği için hatayı sade bir tuple olarak taşıyoruz.
+    try:
+        return ("ok", fn(*args))
+    except HTTPException as e:
+        return ("http_error", e.status_code, e.detail)
+
+
+def run_cpu_bound(fn: Callable, *args: Any) -> Any:
+    """`fn(*args)` çağrısını moda göre süreç havuzunda veya yerinde çalıştırır."""
+    if settings.CELERY_WORKER_MODE != "io":
+        return fn(*args)
+
+    outcome = _get_executor().submit(_call_in_child, fn, args).result()
+    if outcome[0] == "http_error":
+        raise HTTPException(status_code=outcome[1], detail=outcome[2])
+    return outcome[1]
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
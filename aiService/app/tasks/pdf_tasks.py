@@ -1,9 +1,10 @@
-import httpx
 import logging
 
-from ..services import pdf_service
+from ..services import pdf_service, singleflight
 from ..services.llm_manager import summarize_text
 from .celery_worker import celery_app
+from .callbacks import dispatcher, drain_outbox
+from .cpu_pool import run_cpu_bound
 
 log = logging.getLogger(__name__)
 
@@ -12,36 +13,40 @@ def async_summarize_pdf(self, pdf_id: int, storage_path: str, callback_url: str,
     log.info(f"[CELERY TASK] Görev başladı: PDF ID {pdf_id} (Dosya yolu: {storage_path})")
 
     try:
-        text_content = pdf_service.extract_text_from_pdf_path(storage_path)
-
         prompt_instruction = (
             "Aşağıdaki metni detaylı bir şekilde analiz et. "
             "Metnin ana fikrini, temel argümanlarını ve önemli çıkarımlarını "
             "madde madde özetle."
         )
 
-        summary = summarize_text(
-            text_content,
-            prompt_instruction,
-            llm_provider=llm_provider,
-            mode=mode,
-        )
-
-        success_payload = {"status": "completed", "summary": summary, "pdf_id": pdf_id, "llm_provider": llm_provider}
-        with httpx.Client() as client:
-            r = client.post(callback_url, json=success_payload, timeout=30)
-            r.raise_for_status()
+        def _summarize() -> str:
+            # "io" modunda ayrıştırma süreç havuzunda yapılır, greenlet'ler beklemeye devam eder.
+            text_content = run_cpu_bound(pdf_service.extract_text_from_pdf_path, storage_path)
+            return summarize_text(
+                text_content,
+                prompt_instruction,
+                llm_provider=llm_provider,
+                mode=mode,
+            )
 
-        return {"status": "success", "summary_length": len(summary)}
+        # Aynı belge için kuyruktaki diğer görevler liderin sonucunu bekler.
+        key = singleflight.build_key(singleflight.file_sha256(storage_path), llm_provider, mode, prompt_instruction)
+        summary = singleflight.run_coalesced(key, _summarize)
 
     except Exception as e:
         log.error(f"[CELERY TASK] HATA: PDF ID {pdf_id} | {str(e)}")
         error_payload = {"status": "failed", "error": str(e), "pdf_id": pdf_id, "llm_provider": llm_provider}
+        # Teslim edilemezse outbox'a düşer; belge 'processing'de takılı kalmaz.
+        dispatcher.deliver(callback_url, error_payload)
+        raise
 
-        try:
-            with httpx.Client() as client:
-                client.post(callback_url, json=error_payload, timeout=30)
-        except Exception:
-            pass
+    success_payload = {"status": "completed", "summary": summary, "pdf_id": pdf_id, "llm_provider": llm_provider}
+    delivered = dispatcher.deliver(callback_url, success_payload)
 
-        raise
+    return {"status": "success", "summary_length": len(summary), "callback_delivered": delivered}
+
+
+@celery_app.task(name="tasks.drain_callback_outbox", ignore_result=True)
+def drain_callback_outbox():
+    """Teslim edilememiş callback'leri yeniden dener (celery beat ile periyodik)."""
+    return drain_outbox()
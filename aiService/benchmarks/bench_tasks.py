@@ -0,0 +1,19 @@
+# aiService/benchmarks/bench_tasks.py
+"""
+Benchmark görevleri. Yalnızca `worker_throughput.py` tarafından başlatılan
+işçiye `-I benchmarks.bench_tasks` ile yüklenir, üretim işçisinde yoktur.
+"""
+
+import time
+
+from app.services import pdf_service
+from app.tasks.celery_worker import celery_app
+from app.tasks.cpu_pool import run_cpu_bound
+
+
+@celery_app.task(name="benchmarks.simulated_summary")
+def simulated_summary(storage_path: str, provider_latency: float) -> int:
+    # Gerçek görevle aynı yol: metin çıkarma (CPU) + sağlayıcı çağrısı (I/O bekleme)
+    text = run_cpu_bound(pdf_service.extract_text_from_pdf_path, storage_path)
+    time.sleep(provider_latency)
+    return len(text)
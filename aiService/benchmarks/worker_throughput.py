@@ -0,0 +1,134 @@
+# aiService/benchmarks/worker_throughput.py
+"""
+prefork ile "io" (gevent) işçi modlarının düğüm başına verimini karşılaştırır.
+
+Her mod için ayrı bir Celery işçisi başlatılır, `bench` kuyruğuna N adet
+`benchmarks.simulated_summary` görevi gönderilir ve hepsi bitene kadar geçen
+süre ölçülür. Sağlayıcı çağrısı `--latency` saniyelik bir bekleme ile temsil
+edilir; metin çıkarma gerçek PyPDF2 ayrıştırmasıdır.
+
+Çalıştırma (aiService dizininden, Redis ayakta olmalı):
+
+    python -m benchmarks.worker_throughput --tasks 400 --latency 5
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.tasks.celery_worker import celery_app
+
+QUEUE = "bench"
+
+
+def _make_sample_pdf(path: str, pages: int) -> None:
+    """Her sayfasında metin bulunan küçük bir PDF yazar (harici bağımlılık yok)."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages nesnesi sayfa referanslarıyla aşağıda doldurulur
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for i in range(pages):
+        lines = "".join(
+            f"BT /F1 11 Tf 50 {780 - 14 * j} Td (Sayfa {i + 1} satir {j + 1} benchmark metni) Tj ET\n"
+            for j in range(50)
+        ).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(lines) + lines + b"endstream")
+        content_no = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_no
+        )
+        page_refs.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % n for n in page_refs)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for no, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % no + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at)
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def _start_worker(mode: str, concurrency: int) -> tuple[subprocess.Popen, str]:
+    node = f"bench-{mode}-{os.getpid()}@%h"
+    pool = "gevent" if mode == "io" else "prefork"
+    env = {**os.environ, "CELERY_WORKER_MODE": mode, "PYTHONPATH": os.getcwd()}
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "celery", "-A", "app.tasks.celery_worker:celery_app",
+            "worker", "-P", pool, "-c", str(concurrency), "-Q", QUEUE,
+            "-I", "benchmarks.bench_tasks", "-n", node, "--loglevel=warning",
+        ],
+        env=env,
+    )
+    return proc, node.replace("%h", os.uname().nodename)
+
+
+def _wait_ready(node: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if celery_app.control.ping(destination=[node], timeout=1):
+            return
+    raise RuntimeError(f"İşçi {timeout}s içinde hazır olmadı: {node}")
+
+
+def run_mode(mode: str, concurrency: int, pdf_path: str, tasks: int, latency: float) -> float:
+    proc, node = _start_worker(mode, concurrency)
+    try:
+        _wait_ready(node)
+        started = time.perf_counter()
+        results = [
+            celery_app.send_task(
+                "benchmarks.simulated_summary", args=[pdf_path, latency], queue=QUEUE
+            )
+            for _ in range(tasks)
+        ]
+        for r in results:
+            r.get(timeout=latency * tasks + 120)
+        elapsed = time.perf_counter() - started
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=5.0, help="Simüle edilen LLM çağrısı süresi (s)")
+    parser.add_argument("--pages", type=int, default=30, help="Örnek PDF sayfa sayısı")
+    parser.add_argument("--prefork-concurrency", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--io-concurrency", type=int, default=200)
+    parser.add_argument("--modes", default="prefork,io")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "bench.pdf")
+        _make_sample_pdf(pdf_path, args.pages)
+
+        print(f"{args.tasks} görev, {args.latency}s sağlayıcı gecikmesi, {args.pages} sayfalık PDF")
+        print(f"{'mod':<10}{'eşzamanlılık':>14}{'süre (s)':>12}{'görev/s':>12}")
+        for mode in args.modes.split(","):
+            concurrency = args.io_concurrency if mode == "io" else args.prefork_concurrency
+            elapsed = run_mode(mode, concurrency, pdf_path, args.tasks, args.latency)
+            print(f"{mode:<10}{concurrency:>14}{elapsed:>12.1f}{args.tasks / elapsed:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+import os
+
+# Settings() zorunlu alanı; testler gerçek sağlayıcıya gitmez
+os.environ.setdefault("GEMINI_API_KEY", "test")
@@ -0,0 +1,50 @@
+"""
+Unit tests for the analysis router's input handling
+"""
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import analysis
+
+app = FastAPI()
+app.include_router(analysis.router)
+client = TestClient(app)
+
+# Starlette form alanı sınırı 1 MB; ön hesaplanmış metin bunu aşabilmeli
+LARGE_TEXT = "Türkçe karakterli uzun bir belge metni: ğüşiöç. " * 25000
+
+
+class TestPrecomputedText:
+    """Test precomputed text sent as a file part instead of a PDF"""
+
+    def test_summarize_accepts_text_over_form_limit(self):
+        """Test more than 1 MB of text reaches the summarizer unchanged"""
+        assert len(LARGE_TEXT.encode("utf-8")) > 1024 * 1024
+        with patch.object(analysis, "summarize_text", return_value="özet") as summarize:
+            response = client.post(
+                "/api/v1/ai/summarize-sync",
+                files={"text": ("text.txt", LARGE_TEXT.encode("utf-8"), "text/plain; charset=utf-8")},
+                data={"filename": "kitap.pdf"},
+            )
+        assert response.status_code == 200, response.text
+        assert response.json()["summary"] == "özet"
+        assert summarize.call_args.args[0] == LARGE_TEXT
+
+    def test_chat_start_accepts_text_over_form_limit(self):
+        """Test chat sessions are created from large precomputed text"""
+        with patch.object(analysis.ai_service, "create_pdf_chat_session", return_value="s1") as create:
+            response = client.post(
+                "/api/v1/ai/chat/start",
+                files={"text": ("text.txt", LARGE_TEXT.encode("utf-8"), "text/plain; charset=utf-8")},
+                data={"filename": "kitap.pdf"},
+            )
+        assert response.status_code == 200, response.text
+        assert create.call_args.args[0] == LARGE_TEXT
+        assert create.call_args.kwargs["filename"] == "kitap.pdf"
+
+    def test_missing_input_is_rejected(self):
+        """Test a request without file, storage_path or text is a 400"""
+        response = client.post("/api/v1/ai/summarize-sync", data={"filename": "x.pdf"})
+        assert response.status_code == 400
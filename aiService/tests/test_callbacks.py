@@ -0,0 +1,167 @@
+"""
+Unit tests for the callback dispatcher and outbox
+"""
+import json
+import time
+from concurrent.futures import Future
+from unittest.mock import patch
+
+import fakeredis
+import httpx
+import pytest
+
+from app.tasks import callbacks
+
+BACKEND_A = "http://backend-a/files/callback"
+BACKEND_B = "http://backend-b/files/callback"
+
+
+class Backend:
+    """Records requests and answers with queued status codes (default 200)"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append((str(request.url), json.loads(request.content)))
+        status = self.statuses.pop(0) if self.statuses else 200
+        return httpx.Response(status)
+
+    @property
+    def urls(self):
+        return [url for url, _ in self.requests]
+
+
+@pytest.fixture
+def redis():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    with patch.object(callbacks, "redis_client", client), \
+            patch.object(callbacks.random, "random", return_value=0), \
+            patch.object(callbacks.time, "sleep") as sleep:
+        client.sleep = sleep
+        yield client
+
+
+def _serve(backend):
+    return patch.object(callbacks, "_client", httpx.Client(transport=httpx.MockTransport(backend)))
+
+
+def _flush(*callbacks_):
+    entries = [(url, payload, Future()) for url, payload in callbacks_]
+    callbacks.CallbackDispatcher()._flush(entries)
+    return [future.result() for _, _, future in entries]
+
+
+def _outbox(redis, key=callbacks.OUTBOX_KEY):
+    return [json.loads(raw) for raw in redis.lrange(key, 0, -1)]
+
+
+class TestCallbackDispatcher:
+    """Test grouping, retries and the outbox fallback"""
+
+    def test_callbacks_are_batched_per_backend(self, redis):
+        """Test callbacks sharing a batch URL go in one request, others separately"""
+        backend = Backend()
+        with _serve(backend):
+            results = _flush(
+                (f"{BACKEND_A}/1", {"pdf_id": 1}),
+                (f"{BACKEND_B}/2", {"pdf_id": 2}),
+                (f"{BACKEND_A}/3", {"pdf_id": 3}),
+            )
+        assert results == [True, True, True]
+        assert backend.requests == [
+            (f"{BACKEND_A}/batch", {"callbacks": [{"pdf_id": 1}, {"pdf_id": 3}]}),
+            (f"{BACKEND_B}/2", {"pdf_id": 2}),
+        ]
+
+    def test_deliver_sends_through_background_thread(self, redis):
+        """Test deliver blocks until the dispatcher thread has sent the callback"""
+        backend = Backend()
+        with _serve(backend), patch.object(callbacks.settings, "CALLBACK_BATCH_LINGER_MS", 0):
+            assert callbacks.CallbackDispatcher().deliver(f"{BACKEND_A}/1", {"pdf_id": 1}) is True
+        assert backend.urls == [f"{BACKEND_A}/1"]
+
+    def test_transient_errors_back_off_exponentially(self, redis):
+        """Test 5xx and 429 are retried with doubling sleeps"""
+        backend = Backend(503, 429)
+        with _serve(backend), patch.object(callbacks.settings, "CALLBACK_BACKOFF_BASE_SECONDS", 0.5):
+            assert _flush((f"{BACKEND_A}/1", {"pdf_id": 1})) == [True]
+        assert len(backend.requests) == 3
+        assert [c.args[0] for c in redis.sleep.call_args_list] == [0.5, 1.0]
+
+    def test_client_error_is_permanent(self, redis):
+        """Test a 4xx is neither retried nor written to the outbox"""
+        backend = Backend(422)
+        with _serve(backend):
+            _flush((f"{BACKEND_A}/1", {"pdf_id": 1}))
+        assert len(backend.requests) == 1
+        assert redis.llen(callbacks.OUTBOX_KEY) == 0
+
+    def test_rejected_batch_falls_back_to_single_callbacks(self, redis):
+        """Test a backend without the batch endpoint still receives every callback"""
+        backend = Backend(404)
+        with _serve(backend):
+            assert _flush((f"{BACKEND_A}/1", {"pdf_id": 1}), (f"{BACKEND_A}/2", {"pdf_id": 2})) == [True, True]
+        assert backend.urls == [f"{BACKEND_A}/batch", f"{BACKEND_A}/1", f"{BACKEND_A}/2"]
+
+    def test_undeliverable_callback_goes_to_outbox(self, redis):
+        """Test exhausted retries write the callback to the outbox"""
+        backend = Backend(*[500] * 10)
+        with _serve(backend), patch.object(callbacks.settings, "CALLBACK_MAX_RETRIES", 2):
+            assert _flush((f"{BACKEND_A}/1", {"pdf_id": 1})) == [False]
+        assert len(backend.requests) == 2
+        [entry] = _outbox(redis)
+        assert (entry["url"], entry["payload"], entry["attempts"]) == (f"{BACKEND_A}/1", {"pdf_id": 1}, 2)
+
+
+class TestDrainOutbox:
+    """Test outbox retries never lose entries"""
+
+    def test_delivered_entries_are_removed(self, redis):
+        """Test delivered entries leave both the outbox and the processing list"""
+        callbacks.push_to_outbox(f"{BACKEND_A}/1", {"pdf_id": 1})
+        callbacks.push_to_outbox(f"{BACKEND_A}/2", {"pdf_id": 2})
+        backend = Backend()
+        with _serve(backend):
+            assert callbacks.drain_outbox() == {"delivered": 2, "requeued": 0, "dropped": 0}
+        assert backend.urls == [f"{BACKEND_A}/batch"]
+        assert redis.llen(callbacks.OUTBOX_KEY) == redis.llen(callbacks.PROCESSING_KEY) == 0
+
+    def test_failed_entries_are_requeued(self, redis):
+        """Test undelivered entries return to the outbox with one more attempt"""
+        callbacks.push_to_outbox(f"{BACKEND_A}/1", {"pdf_id": 1}, attempts=4)
+        with _serve(Backend(500)):
+            assert callbacks.drain_outbox() == {"delivered": 0, "requeued": 1, "dropped": 0}
+        [entry] = _outbox(redis)
+        assert entry["attempts"] == 5
+        assert redis.llen(callbacks.PROCESSING_KEY) == 0
+
+    def test_entries_past_max_age_are_dropped(self, redis):
+        """Test an entry failing for too long is dropped instead of requeued"""
+        callbacks.push_to_outbox(f"{BACKEND_A}/1", {"pdf_id": 1}, first_failed_at=time.time() - 3600)
+        with _serve(Backend(500)), patch.object(callbacks.settings, "CALLBACK_OUTBOX_MAX_AGE_SECONDS", 60):
+            assert callbacks.drain_outbox() == {"delivered": 0, "requeued": 0, "dropped": 1}
+        assert redis.llen(callbacks.OUTBOX_KEY) == redis.llen(callbacks.PROCESSING_KEY) == 0
+
+    def test_malformed_entry_is_dropped_without_losing_others(self, redis):
+        """Test an unparsable entry does not abort the drain"""
+        redis.rpush(callbacks.OUTBOX_KEY, "{not json")
+        callbacks.push_to_outbox(f"{BACKEND_A}/1", {"pdf_id": 1})
+        with _serve(Backend()):
+            assert callbacks.drain_outbox() == {"delivered": 1, "requeued": 0, "dropped": 1}
+        assert redis.llen(callbacks.OUTBOX_KEY) == redis.llen(callbacks.PROCESSING_KEY) == 0
+
+    def test_crash_during_delivery_is_recovered(self, redis):
+        """Test entries claimed by a drain that died are moved back in order"""
+        callbacks.push_to_outbox(f"{BACKEND_A}/1", {"pdf_id": 1})
+        callbacks.push_to_outbox(f"{BACKEND_A}/2", {"pdf_id": 2})
+        callbacks.push_to_outbox(f"{BACKEND_A}/3", {"pdf_id": 3})
+        with patch.object(callbacks, "send_group", side_effect=SystemExit):
+            with pytest.raises(SystemExit):
+                callbacks.drain_outbox(max_items=2)
+        assert redis.llen(callbacks.PROCESSING_KEY) == 2
+
+        assert callbacks.recover_outbox() == 2
+        assert [e["payload"]["pdf_id"] for e in _outbox(redis)] == [1, 2, 3]
+        assert redis.llen(callbacks.PROCESSING_KEY) == 0
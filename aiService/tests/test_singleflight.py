@@ -0,0 +1,90 @@
+"""
+Unit tests for single-flight summarization coalescing
+"""
+import json
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.services import singleflight
+
+KEY = "abc:cloud:flash:123"
+LOCK_KEY = f"{singleflight.KEY_PREFIX}:lock:{KEY}"
+DONE_KEY = f"{singleflight.KEY_PREFIX}:done:{KEY}"
+
+
+@pytest.fixture
+def redis():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    with patch.object(singleflight, "redis_client", client), \
+            patch.object(singleflight, "_publish", client.register_script(singleflight._PUBLISH_SCRIPT)), \
+            patch.object(singleflight.settings, "SINGLEFLIGHT_ENABLED", True):
+        yield client
+
+
+def _stats():
+    stats = singleflight.get_stats()
+    return stats["leader"], stats["follower"], stats["fallback"]
+
+
+class TestRunCoalesced:
+    """Test leader, follower and fallback paths"""
+
+    def test_leader_runs_once_and_caches_result(self, redis):
+        """Test the leader's result is served to a later caller without a second call"""
+        fn = MagicMock(return_value="özet")
+        assert singleflight.run_coalesced(KEY, fn) == "özet"
+        assert singleflight.run_coalesced(KEY, fn) == "özet"
+        assert fn.call_count == 1
+        assert _stats() == (1, 1, 0)
+        assert not redis.exists(LOCK_KEY)
+
+    def test_leader_error_is_not_retried(self, redis):
+        """Test a provider failure propagates without running the call again"""
+        fn = MagicMock(side_effect=RuntimeError("provider down"))
+        with pytest.raises(RuntimeError):
+            singleflight.run_coalesced(KEY, fn)
+        assert fn.call_count == 1
+        assert _stats() == (1, 0, 0)
+        assert not redis.exists(LOCK_KEY)
+
+    def test_follower_receives_leader_result(self, redis):
+        """Test a caller that finds the lock taken waits for the published payload"""
+        redis.set(LOCK_KEY, "other-leader")
+        redis.rpush(DONE_KEY, json.dumps({"result": "paylaşılan özet"}))
+        fn = MagicMock()
+        assert singleflight.run_coalesced(KEY, fn) == "paylaşılan özet"
+        fn.assert_not_called()
+        assert _stats() == (0, 1, 0)
+
+    def test_follower_receives_leader_error(self, redis):
+        """Test the leader's HTTP error is re-raised with its status code"""
+        redis.set(LOCK_KEY, "other-leader")
+        redis.rpush(DONE_KEY, json.dumps({"error": "kota doldu", "status_code": 429}))
+        fn = MagicMock()
+        with pytest.raises(HTTPException) as exc:
+            singleflight.run_coalesced(KEY, fn)
+        assert exc.value.status_code == 429
+        fn.assert_not_called()
+
+    def test_wait_timeout_runs_locally_once(self, redis):
+        """Test a timed-out follower runs the call once and propagates its error"""
+        redis.set(LOCK_KEY, "stuck-leader")
+        fn = MagicMock(side_effect=RuntimeError("provider down"))
+        with patch.object(singleflight.settings, "SINGLEFLIGHT_WAIT_TIMEOUT_SECONDS", 0):
+            with pytest.raises(RuntimeError):
+                singleflight.run_coalesced(KEY, fn)
+        assert fn.call_count == 1
+        assert _stats() == (0, 0, 1)
+
+    def test_redis_error_falls_back_to_direct_call(self, redis):
+        """Test coordination failures still run the call exactly once"""
+        broken = MagicMock()
+        broken.get.side_effect = RedisConnectionError("gone")
+        fn = MagicMock(return_value="özet")
+        with patch.object(singleflight, "redis_client", broken):
+            assert singleflight.run_coalesced(KEY, fn) == "özet"
+        assert fn.call_count == 1
@@ -0,0 +1,40 @@
+"""add pdfs listing index
+
+Revision ID: b4c5d6e7f8a9
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4c5d6e7f8a9'
+down_revision: Union[str, None] = 'a3b4c5d6e7f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # /files/my-files keyset sayfalaması için (user_id, created_at, id)
+    # CONCURRENTLY: büyük tabloda yazmaları kilitlemeden oluşturulur
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_pdfs_user_id_created_at_id',
+            'pdfs',
+            ['user_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_pdfs_user_id_created_at_id',
+            table_name='pdfs',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,85 @@
+"""add content-addressed pdf blobs
+
+Revision ID: c5d6e7f8a9b0
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d6e7f8a9b0'
+down_revision: Union[str, None] = 'b4c5d6e7f8a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'pdf_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+    op.add_column('pdfs', sa.Column('blob_sha256', sa.String(length=64), nullable=True))
+
+    # Mevcut içerikleri tekilleştirerek taşı (sha256(bytea): PostgreSQL 11+)
+    op.execute("""
+        UPDATE pdfs SET blob_sha256 = encode(sha256(pdf_data), 'hex')
+    """)
+    op.execute("""
+        INSERT INTO pdf_blobs (sha256, data, size, ref_count)
+        SELECT DISTINCT ON (blob_sha256) blob_sha256, pdf_data, octet_length(pdf_data),
+               count(*) OVER (PARTITION BY blob_sha256)
+        FROM pdfs
+    """)
+
+    op.alter_column('pdfs', 'blob_sha256', nullable=False)
+    op.create_foreign_key('fk_pdfs_blob_sha256', 'pdfs', 'pdf_blobs', ['blob_sha256'], ['sha256'], ondelete='RESTRICT')
+    op.create_index(op.f('ix_pdfs_blob_sha256'), 'pdfs', ['blob_sha256'], unique=False)
+    op.drop_column('pdfs', 'pdf_data')
+
+    # Referans sayımı ve çöp toplama: pdfs satırı eklenince/silinince (kullanıcı
+    # silinmesiyle gelen CASCADE dahil) sayaç güncellenir, sıfırlanan blob silinir.
+    op.execute("""
+        CREATE FUNCTION pdf_blobs_ref_count() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE pdf_blobs SET ref_count = ref_count + 1 WHERE sha256 = NEW.blob_sha256;
+                RETURN NEW;
+            END IF;
+            UPDATE pdf_blobs SET ref_count = ref_count - 1 WHERE sha256 = OLD.blob_sha256;
+            DELETE FROM pdf_blobs WHERE sha256 = OLD.blob_sha256 AND ref_count <= 0;
+            RETURN OLD;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER pdfs_blob_ref_count
+        AFTER INSERT OR DELETE ON pdfs
+        FOR EACH ROW EXECUTE FUNCTION pdf_blobs_ref_count()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS pdfs_blob_ref_count ON pdfs")
+    op.execute("DROP FUNCTION IF EXISTS pdf_blobs_ref_count()")
+
+    op.add_column('pdfs', sa.Column('pdf_data', sa.LargeBinary(), nullable=True))
+    op.execute("""
+        UPDATE pdfs SET pdf_data = pdf_blobs.data
+        FROM pdf_blobs WHERE pdf_blobs.sha256 = pdfs.blob_sha256
+    """)
+    op.alter_column('pdfs', 'pdf_data', nullable=False)
+
+    op.drop_index(op.f('ix_pdfs_blob_sha256'), table_name='pdfs')
+    op.drop_constraint('fk_pdfs_blob_sha256', 'pdfs', type_='foreignkey')
+    op.drop_column('pdfs', 'blob_sha256')
+    op.drop_table('pdf_blobs')
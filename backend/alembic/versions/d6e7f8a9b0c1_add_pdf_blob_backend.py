@@ -0,0 +1,62 @@
+"""add pdf blob backend column
+
+Revision ID: d6e7f8a9b0c1
+Revises: c5d6e7f8a9b0
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6e7f8a9b0c1'
+down_revision: Union[str, None] = 'c5d6e7f8a9b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('pdf_blobs', sa.Column('backend', sa.String(length=16), server_default='db', nullable=False))
+    op.alter_column('pdf_blobs', 'data', nullable=True)
+    # PDF'ler zaten sıkıştırılmış; EXTERNAL ile TOAST sıkıştırma yapılmaz ve
+    # indirmedeki substring() aralık okumaları tüm değeri açmadan yapılır
+    op.execute("ALTER TABLE pdf_blobs ALTER COLUMN data SET STORAGE EXTERNAL")
+
+    # Diskteki blob'lar trigger'da silinmez (dosya DB işlemine dahil değil);
+    # ref_count 0'da kalırlar ve uygulamadaki GC (blob_store.collect_garbage) temizler
+    op.execute("""
+        CREATE OR REPLACE FUNCTION pdf_blobs_ref_count() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE pdf_blobs SET ref_count = ref_count + 1 WHERE sha256 = NEW.blob_sha256;
+                RETURN NEW;
+            END IF;
+            UPDATE pdf_blobs SET ref_count = ref_count - 1 WHERE sha256 = OLD.blob_sha256;
+            DELETE FROM pdf_blobs WHERE sha256 = OLD.blob_sha256 AND ref_count <= 0 AND backend = 'db';
+            RETURN OLD;
+        END;
+        $$
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION pdf_blobs_ref_count() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE pdf_blobs SET ref_count = ref_count + 1 WHERE sha256 = NEW.blob_sha256;
+                RETURN NEW;
+            END IF;
+            UPDATE pdf_blobs SET ref_count = ref_count - 1 WHERE sha256 = OLD.blob_sha256;
+            DELETE FROM pdf_blobs WHERE sha256 = OLD.blob_sha256 AND ref_count <= 0;
+            RETURN OLD;
+        END;
+        $$
+    """)
+    # Diskteki içerikler geri taşınmaz; downgrade öncesi PDF_BLOB_BACKEND=db ile yeniden kaydedilmeli
+    op.execute("ALTER TABLE pdf_blobs ALTER COLUMN data SET STORAGE EXTENDED")
+    op.alter_column('pdf_blobs', 'data', nullable=False)
+    op.drop_column('pdf_blobs', 'backend')
@@ -0,0 +1,48 @@
+"""add pdf artifacts
+
+Revision ID: e7f8a9b0c1d2
+Revises: d6e7f8a9b0c1
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7f8a9b0c1d2'
+down_revision: Union[str, None] = 'd6e7f8a9b0c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'pdf_artifacts',
+        sa.Column('sha256', sa.String(length=64), sa.ForeignKey('pdf_blobs.sha256', ondelete='CASCADE'), primary_key=True),
+        sa.Column('status', sa.String(length=16), server_default='pending', nullable=False),
+        sa.Column('version', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('page_count', sa.Integer(), nullable=True),
+        sa.Column('has_text_layer', sa.Boolean(), nullable=True),
+        sa.Column('pages', postgresql.JSONB(), nullable=True),
+        sa.Column('chunks', postgresql.JSONB(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_index(
+        'ix_pdf_artifacts_pending', 'pdf_artifacts', ['status'],
+        postgresql_where=sa.text("status IN ('pending', 'processing')"),
+    )
+    # Mevcut blob'lar da kuyruğa alınır; işçi uygulama açıldıkça arka planda doldurur
+    op.execute("INSERT INTO pdf_artifacts (sha256) SELECT sha256 FROM pdf_blobs")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pdf_artifacts_pending', table_name='pdf_artifacts')
+    op.drop_table('pdf_artifacts')
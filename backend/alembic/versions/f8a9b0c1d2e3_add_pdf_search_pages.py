@@ -0,0 +1,93 @@
+"""add pdf full-text search index
+
+Revision ID: f8a9b0c1d2e3
+Revises: e7f8a9b0c1d2
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8a9b0c1d2e3'
+down_revision: Union[str, None] = 'e7f8a9b0c1d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Çıktıları hazır bir blob'a bağlı PDF'lerin sayfalarını indekse yazar (boş sayfalar atlanır)
+INDEX_PAGES_SQL = """
+    INSERT INTO pdf_search_pages (pdf_id, user_id, page, content)
+    SELECT p.id, p.user_id, t.ord, t.txt
+    FROM pdfs p
+    JOIN pdf_artifacts a ON a.sha256 = p.blob_sha256
+    CROSS JOIN LATERAL jsonb_array_elements_text(a.pages) WITH ORDINALITY AS t(txt, ord)
+    WHERE a.status = 'ready' AND btrim(t.txt) <> '' AND {condition}
+    ON CONFLICT DO NOTHING
+"""
+
+
+def upgrade() -> None:
+    # (user_id, tsv) çok sütunlu GIN indeksi için
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    op.create_table(
+        'pdf_search_pages',
+        sa.Column('pdf_id', sa.String(), sa.ForeignKey('pdfs.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('page', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column(
+            'tsv', postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('turkish', content)", persisted=True),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        'ix_pdf_search_pages_user_tsv', 'pdf_search_pages', ['user_id', 'tsv'], postgresql_using='gin'
+    )
+
+    # Yeni PDF: içerik daha önce işlendiyse (aynı blob) indeks aynı işlemde yazılır
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION pdf_search_index_pdf() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            {INDEX_PAGES_SQL.format(condition="p.id = NEW.id")};
+            RETURN NEW;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER pdfs_search_index AFTER INSERT ON pdfs
+        FOR EACH ROW EXECUTE FUNCTION pdf_search_index_pdf()
+    """)
+
+    # Çıktılar hazır olunca blob'a bağlı tüm PDF'ler indekslenir (sürüm yükseltmesinde yeniden yazılır)
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION pdf_search_index_artifact() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM pdf_search_pages
+            WHERE pdf_id IN (SELECT id FROM pdfs WHERE blob_sha256 = NEW.sha256);
+            {INDEX_PAGES_SQL.format(condition="p.blob_sha256 = NEW.sha256")};
+            RETURN NEW;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER pdf_artifacts_search_index AFTER UPDATE OF status ON pdf_artifacts
+        FOR EACH ROW WHEN (NEW.status = 'ready') EXECUTE FUNCTION pdf_search_index_artifact()
+    """)
+
+    # Mevcut hazır çıktılar
+    op.execute(INDEX_PAGES_SQL.format(condition="TRUE"))
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS pdf_artifacts_search_index ON pdf_artifacts")
+    op.execute("DROP FUNCTION IF EXISTS pdf_search_index_artifact()")
+    op.execute("DROP TRIGGER IF EXISTS pdfs_search_index ON pdfs")
+    op.execute("DROP FUNCTION IF EXISTS pdf_search_index_pdf()")
+    op.drop_index('ix_pdf_search_pages_user_tsv', table_name='pdf_search_pages')
+    op.drop_table('pdf_search_pages')
@@ -0,0 +1,128 @@
+# app/ai_client.py
+"""
+Backend -> AI Service HTTP istemcisi.
+
+Uygulama ömrü boyunca tek bir `httpx.AsyncClient` (bağlantı havuzu + keep-alive)
+kullanılır; FastAPI lifespan'inde açılır/kapatılır ve endpoint'lere
+`Depends(get_ai_client)` ile verilir. İstek başına yeni TCP bağlantısı açılmaz.
+"""
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+from fastapi import Request
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+AI_API_PREFIX = "/api/v1/ai"
+
+# Route bazlı zaman aşımları (saniye). Bağlantı kurma süresi hepsinde kısa tutulur;
+# uzun süren kısım AI tarafındaki model çağrısıdır.
+ROUTE_TIMEOUTS = {
+    "summarize-sync": 120.0,
+    "summarize-async": 10.0,
+    "chat/start": 60.0,
+    "chat": 60.0,
+    "tts": 120.0,
+}
+DEFAULT_TIMEOUT = 60.0
+CONNECT_TIMEOUT = 5.0
+
+
+def get_ai_service_headers() -> dict:
+    """AI Service'e yapılan istekler için header'ları hazırlar (API key dahil)."""
+    headers = {}
+    if settings.AI_SERVICE_API_KEY:
+        headers["X-API-Key"] = settings.AI_SERVICE_API_KEY
+    return headers
+
+
+class AIServiceClient:
+    """Paylaşılan AsyncClient üzerinde route bazlı timeout ve kullanım sayaçları."""
+
+    def __init__(self):
+        self.max_connections = settings.AI_SERVICE_MAX_CONNECTIONS
+        self.http2 = settings.AI_SERVICE_HTTP2
+        # Şifresiz (http://) bağlantıda ALPN yok; HTTP/2 ancak "prior knowledge" ile kurulur.
+        h2_prior_knowledge = self.http2 and settings.AI_SERVICE_URL.startswith("http://")
+        self._client = httpx.AsyncClient(
+            base_url=settings.AI_SERVICE_URL,
+            headers=get_ai_service_headers(),
+            http1=not h2_prior_knowledge,
+            http2=self.http2,
+            follow_redirects=True,
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.AI_SERVICE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.AI_SERVICE_MAX_KEEPALIVE,
+                keepalive_expiry=settings.AI_SERVICE_KEEPALIVE_EXPIRY,
+            ),
+        )
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests_total = 0
+
+    @staticmethod
+    def url_for(route: str) -> str:
+        return f"{AI_API_PREFIX}/{route}"
+
+    @staticmethod
+    def timeout_for(route: str, override: Optional[float] = None) -> httpx.Timeout:
+        seconds = override if override is not None else ROUTE_TIMEOUTS.get(route, DEFAULT_TIMEOUT)
+        return httpx.Timeout(seconds, connect=CONNECT_TIMEOUT)
+
+    def _enter(self):
+        self.in_flight += 1
+        self.requests_total += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    async def post(self, route: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        self._enter()
+        try:
+            return await self._client.post(self.url_for(route), timeout=self.timeout_for(route, timeout), **kwargs)
+        finally:
+            self.in_flight -= 1
+
+    @asynccontextmanager
+    async def stream(self, method: str, route: str, timeout: Optional[float] = None, **kwargs) -> AsyncIterator[httpx.Response]:
+        self._enter()
+        try:
+            async with self._client.stream(
+                method, self.url_for(route), timeout=self.timeout_for(route, timeout), **kwargs
+            ) as response:
+                yield response
+        finally:
+            self.in_flight -= 1
+
+    def pool_stats(self) -> dict:
+        """Havuz kullanımı (metrik). httpcore iç yapısına dayanır, okunamazsa sadece sayaçlar döner."""
+        stats = {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "in_flight_requests": self.in_flight,
+            "peak_in_flight_requests": self.peak_in_flight,
+            "requests_total": self.requests_total,
+        }
+        try:
+            connections = self._client._transport._pool.connections
+            idle = sum(1 for c in connections if c.is_idle())
+            stats.update({
+                "connections_open": len(connections),
+                "connections_idle": idle,
+                "connections_active": len(connections) - idle,
+                "utilization": round((len(connections) - idle) / self.max_connections, 4),
+            })
+        except Exception as e:
+            logger.debug(f"AI client pool stats unavailable: {e}")
+        return stats
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+def get_ai_client(request: Request) -> AIServiceClient:
+    """AI Service istemcisi dependency (lifespan'de oluşturulur)"""
+    return request.app.state.ai_client
@@ -0,0 +1,300 @@
+# app/artifacts.py
+"""
+Yükleme sonrası arka planda ön hesaplanan PDF çıktıları (pdf_artifacts).
+
+Bir PDF kaydedildiğinde blob'u için "pending" satırı aynı işlemde eklenir
+(storage.artifact_enqueue_statement). Lifespan'de çalışan `worker_loop`
+bekleyen satırları FOR UPDATE SKIP LOCKED ile sahiplenir, içeriği PDF araç
+havuzunda bir kez ayrıştırır ve sonuçları kaydeder:
+
+- sayfa sayısı, sayfa metinleri, metin katmanı var mı
+- sayfa sınırını aşmayan parça indeksi ([sayfa, başlangıç, bitiş])
+- içerik hash'i (satırın anahtarı, blob ile aynı)
+
+Özet, sohbet ve metin dönüştürme `file_id` ile çağrıldığında hazır çıktılar
+kullanılır; hazır değilse eski yol (PDF'i ayrıştırma) devam eder.
+
+Çıktılar içerik başına tutulur; aynı PDF'i yükleyen kullanıcılar tekrar hesaplatmaz.
+İşçi aynı anda tek belge işler, böylece havuzdaki kullanıcı isteklerine yer kalır.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from . import blob_store, pdf_tools
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Hesaplama mantığı değişirse artırılır; eski sürümdeki çıktılar kullanılmaz ve
+# işçi açılışta bunları yeniden kuyruğa alır (bkz. requeue_outdated)
+ARTIFACT_VERSION = 1
+
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_wakeup: Optional[asyncio.Event] = None
+
+_stats = {"processed": 0, "failed": 0, "deferred": 0}
+
+
+def notify() -> None:
+    """Yeni kayıt sonrası işçiyi bekletmeden uyandırır (thread'lerden de çağrılabilir)."""
+    if _loop is not None and _wakeup is not None:
+        _loop.call_soon_threadsafe(_wakeup.set)
+
+
+def get_stats() -> dict:
+    return dict(_stats)
+
+
+# ==========================================
+# KUYRUK (DB)
+# ==========================================
+
+def claim_batch(batch_size: int) -> List[str]:
+    """
+    Bekleyen (veya sahiplenilip zaman aşımına uğramış) satırları işleme alır.
+    Returns: sahiplenilen blob hash'leri
+    """
+    from sqlalchemy import and_, func, or_, select, update
+
+    from .db import SessionLocal
+    from .models import PdfArtifact
+
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.ARTIFACT_CLAIM_TIMEOUT_SECONDS)
+    candidates = (
+        select(PdfArtifact.sha256)
+        .where(
+            or_(
+                PdfArtifact.status == STATUS_PENDING,
+                and_(PdfArtifact.status == STATUS_PROCESSING, PdfArtifact.claimed_at < stale_before),
+            ),
+            PdfArtifact.attempts < settings.ARTIFACT_MAX_ATTEMPTS,
+        )
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    with SessionLocal() as db:
+        claimed = db.scalars(
+            update(PdfArtifact)
+            .where(PdfArtifact.sha256.in_(candidates.scalar_subquery()))
+            .values(status=STATUS_PROCESSING, claimed_at=func.now(), attempts=PdfArtifact.attempts + 1)
+            .returning(PdfArtifact.sha256)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+    return list(claimed)
+
+
+def requeue_outdated() -> int:
+    """
+    Eski ARTIFACT_VERSION ile hesaplanmış hazır satırları yeniden "pending" yapar.
+    İşçi açılışında bir kez çalışır; sürüm artışından sonra bu satırlar load_ready'de
+    yok sayıldığı için kuyruğa alınmazlarsa hiç yeniden hesaplanmazlar.
+    Returns: kuyruğa alınan satır sayısı
+    """
+    from sqlalchemy import update
+
+    from .db import SessionLocal
+    from .models import PdfArtifact
+
+    with SessionLocal() as db:
+        result = db.execute(
+            update(PdfArtifact)
+            .where(PdfArtifact.status == STATUS_READY, PdfArtifact.version < ARTIFACT_VERSION)
+            .values(status=STATUS_PENDING, claimed_at=None, attempts=0)
+        )
+        db.commit()
+    return result.rowcount
+
+
+def release(sha256s: List[str]) -> None:
+    """Havuz doluyken işlenemeyen satırları denemeyi saymadan kuyruğa geri bırakır."""
+    from sqlalchemy import update
+
+    from .db import SessionLocal
+    from .models import PdfArtifact
+
+    if not sha256s:
+        return
+    with SessionLocal() as db:
+        db.execute(
+            update(PdfArtifact)
+            .where(PdfArtifact.sha256.in_(sha256s), PdfArtifact.status == STATUS_PROCESSING)
+            .values(status=STATUS_PENDING, claimed_at=None, attempts=PdfArtifact.attempts - 1)
+        )
+        db.commit()
+
+
+def _materialize(sha256: str) -> Optional[tuple[str, bool]]:
+    """
+    Havuzdaki süreç için içeriğin dosya yolu. DB blob'ları geçici dosyaya yazılır.
+    Returns: (yol, geçici mi) veya blob bu arada silindiyse None
+    """
+    from sqlalchemy import select
+    from sqlalchemy.orm import undefer
+
+    from .db import SessionLocal
+    from .models import PdfBlob
+
+    with SessionLocal() as db:
+        blob = db.scalar(select(PdfBlob).options(undefer(PdfBlob.data)).where(PdfBlob.sha256 == sha256))
+        if blob is None:
+            return None
+        if blob.backend == blob_store.BACKEND_FILESYSTEM:
+            return str(blob_store.filesystem_store.path(sha256)), False
+        fd, path = tempfile.mkstemp(suffix=".pdf", prefix="artifact_")
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob.data)
+        return path, True
+
+
+def _store(sha256: str, result: Optional[dict], error: Optional[str] = None) -> None:
+    from sqlalchemy import update
+
+    from .db import SessionLocal
+    from .models import PdfArtifact
+
+    if result is not None:
+        # Deneme sayacı sıfırlanır; sonraki sürüm artışında satır yeniden sahiplenilebilmeli
+        values = dict(result, status=STATUS_READY, version=ARTIFACT_VERSION, error=None, attempts=0)
+    else:
+        values = {"status": STATUS_FAILED, "error": error}
+    with SessionLocal() as db:
+        db.execute(update(PdfArtifact).where(PdfArtifact.sha256 == sha256).values(**values))
+        db.commit()
+
+
+# ==========================================
+# İŞÇİ
+# ==========================================
+
+async def process(pool: pdf_tools.PdfToolPool, sha256: str) -> bool:
+    """
+    Tek blob'un çıktılarını hesaplar ve kaydeder.
+    Returns: False -> havuz dolu, satır işlenmedi (çağıran geri bırakmalı)
+    """
+    materialized = await run_in_threadpool(_materialize, sha256)
+    if materialized is None:
+        return True
+    path, is_temp = materialized
+    try:
+        result = await pool.run("artifacts", pdf_tools.compute_artifacts, path, settings.ARTIFACT_CHUNK_CHARS)
+    except pdf_tools.WorkerCrashed:
+        # Süreci öldüren belge (ör. OOM) geri bırakılmaz; deneme sayılır, ARTIFACT_MAX_ATTEMPTS ile sınırlı
+        raise
+    except HTTPException as e:
+        if e.status_code == 503:
+            return False
+        raise
+    except ValueError as e:
+        _stats["failed"] += 1
+        await run_in_threadpool(_store, sha256, None, str(e))
+        return True
+    finally:
+        if is_temp:
+            os.unlink(path)
+
+    await run_in_threadpool(_store, sha256, result)
+    _stats["processed"] += 1
+    return True
+
+
+async def _drain(pool: pdf_tools.PdfToolPool) -> bool:
+    """Bir grup satırı işler. Returns: daha fazla iş olabilir mi"""
+    claimed = await run_in_threadpool(claim_batch, settings.ARTIFACT_BATCH_SIZE)
+    for i, sha256 in enumerate(claimed):
+        try:
+            done = await process(pool, sha256)
+        except Exception as e:
+            # Satır "processing"te kalır; zaman aşımından sonra yeniden denenir
+            logger.error(f"Artifact computation failed for {sha256}: {e}", exc_info=True)
+            continue
+        if not done:
+            _stats["deferred"] += 1
+            await run_in_threadpool(release, claimed[i:])
+            return False
+    return len(claimed) == settings.ARTIFACT_BATCH_SIZE
+
+
+async def worker_loop(pool: pdf_tools.PdfToolPool) -> None:
+    """Lifespan'de başlatılan arka plan görevi."""
+    global _loop, _wakeup
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+    try:
+        requeued = await run_in_threadpool(requeue_outdated)
+        if requeued:
+            logger.info(f"Requeued {requeued} artifacts computed by an older version")
+    except Exception as e:
+        logger.error(f"Artifact requeue failed: {e}", exc_info=True)
+    while True:
+        try:
+            more = await _drain(pool)
+        except Exception as e:
+            logger.error(f"Artifact worker error: {e}", exc_info=True)
+            more = False
+        if more:
+            continue
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.ARTIFACT_POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+
+
+# ==========================================
+# OKUMA (ÖZET / SOHBET / METİN DÖNÜŞTÜRME)
+# ==========================================
+
+async def load_ready(db, user_id: Optional[str], file_id: str):
+    """
+    Kullanıcının kayıtlı PDF'i için hazır çıktılar (sayfa metinleri dahil). `db`: AsyncSession
+    Returns: (PdfArtifact, dosya adı) veya None (henüz hazır değil / PDF yok -> çağıran eski yola düşer)
+    """
+    from sqlalchemy import select
+    from sqlalchemy.orm import undefer
+
+    from .models import PDF, PdfArtifact
+
+    if not user_id:
+        return None
+    result = await db.execute(
+        select(PdfArtifact, PDF.filename)
+        .options(undefer(PdfArtifact.pages))
+        .join(PDF, PDF.blob_sha256 == PdfArtifact.sha256)
+        .where(
+            PDF.id == file_id,
+            PDF.user_id == user_id,
+            PdfArtifact.status == STATUS_READY,
+            PdfArtifact.version == ARTIFACT_VERSION,
+        )
+    )
+    row = result.first()
+    if row is None:
+        return None
+    return row[0], row[1] or f"{file_id}.pdf"
+
+
+def full_text(artifact) -> str:
+    """AI Service'in PDF'ten çıkardığı metinle aynı birleştirme (boş sayfalar atlanır)."""
+    return "\n".join(text for text in artifact.pages if text)
+
+
+def require_text_layer(artifact) -> None:
+    """Taranmış (metinsiz) PDF'ler AI Service'e gitmeden reddedilir."""
+    if not artifact.has_text_layer:
+        raise HTTPException(
+            status_code=400,
+            detail="PDF'ten metin çıkarılamadı. Dosya taranmış bir resim olabilir."
+        )
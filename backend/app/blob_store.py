@@ -0,0 +1,272 @@
+# app/blob_store.py
+"""
+PDF blob içerikleri için depolama arka uçları.
+
+- "db":         içerik pdf_blobs.data (LargeBinary) sütununda
+- "filesystem": içerik yerel diskte, SHA-256'ya göre parçalanmış dizinlerde
+                (blobs/ab/cd/abcd...); indirme FileResponse ile (Range + pathsend)
+
+Yeni kayıtların nereye yazılacağını PDF_BLOB_BACKEND belirler; her blob satırı
+kendi `backend` değerini taşıdığı için ayar değişse de eski içerikler okunur.
+
+Diskteki blob'lar DB trigger'ı ile silinmez (ref_count 0'da kalır); `gc_loop`
+sahipsiz blob'ları satır kilidi altında önce diskten, sonra DB'den siler. Dosya
+commit'ten önce yazıldığı için geri alınan işlemlerden kalan (satırı olmayan)
+dosyalar da aynı döngüde, PDF_BLOB_ORPHAN_GRACE_SECONDS'tan eskiyse silinir.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DB = "db"
+BACKEND_FILESYSTEM = "filesystem"
+BACKENDS = (BACKEND_DB, BACKEND_FILESYSTEM)
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FilesystemBlobStore:
+    """İçerik adresli dosya deposu; dosyalar yazıldıktan sonra değişmez."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, sha256: str) -> Path:
+        if not _SHA256_RE.match(sha256):
+            raise ValueError(f"Geçersiz blob anahtarı: {sha256!r}")
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    def write(self, sha256: str, data: bytes) -> Path:
+        """Atomik yazım (geçici dosya + os.replace); aynı içerik zaten varsa yeniden yazılmaz."""
+        target = self.path(sha256)
+        if self._reuse(target):
+            return target
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, target)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return target
+
+    def link_in(self, sha256: str, source: Path) -> Path:
+        """
+        Geçici dosyayı blob olarak yerleştirir (aynı disk: hard link, değilse kopya).
+        Kaynak yerinde kalır: commit başarısız olursa yükleme tekrar denenebilir;
+        silinmesi çağıranın işidir (IngestedUpload.cleanup / resumable_uploads).
+        """
+        target = self.path(sha256)
+        if self._reuse(target):
+            return target
+        target.parent.mkdir(parents=True, exist_ok=True)
+        staging = target.with_name(f"{sha256}.{os.getpid()}.part")
+        try:
+            os.link(source, staging)
+        except OSError:
+            shutil.copyfile(source, staging)
+        try:
+            # Link mtime'ı korur; uzun süren yüklemeler GC'nin bekleme süresine takılmasın
+            os.utime(staging)
+            os.replace(staging, target)
+        except BaseException:
+            staging.unlink(missing_ok=True)
+            raise
+        return target
+
+    @staticmethod
+    def _reuse(target: Path) -> bool:
+        """
+        Var olan dosyayı yeniden kullanır. Satırı geri alınmış eski bir dosya olabilir;
+        mtime güncellenir ki bu işlem commit'lenene kadar sweep_unreferenced_files silmesin.
+        """
+        try:
+            os.utime(target)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def stale_files(self, older_than: float) -> Iterator[Path]:
+        """Son değişikliği `older_than`'dan (epoch) eski dosyalar (yarım kalmış .part dosyaları dahil)."""
+        for path in self.root.glob("*/*/*"):
+            try:
+                if path.is_file() and path.stat().st_mtime < older_than:
+                    yield path
+            except FileNotFoundError:
+                continue
+
+    def read(self, sha256: str) -> bytes:
+        return self.path(sha256).read_bytes()
+
+    def delete(self, sha256: str) -> None:
+        self.path(sha256).unlink(missing_ok=True)
+
+
+def _default_root() -> Path:
+    if settings.PDF_BLOB_DIR:
+        return Path(settings.PDF_BLOB_DIR)
+    return Path(__file__).parent.parent / "uploads" / "blobs"
+
+
+filesystem_store = FilesystemBlobStore(_default_root())
+
+
+def current_backend() -> str:
+    if settings.PDF_BLOB_BACKEND not in BACKENDS:
+        raise RuntimeError(f"PDF_BLOB_BACKEND must be one of {BACKENDS}")
+    return settings.PDF_BLOB_BACKEND
+
+
+def store_content(backend: str, sha256: str, data: bytes) -> None:
+    """
+    Blob satırı eklendikten sonra, commit'ten önce çağrılır (DB arka ucunda içerik satırdadır).
+    İşlem geri alınırsa dosya sahipsiz kalır; sweep_unreferenced_files temizler.
+    """
+    if backend == BACKEND_FILESYSTEM:
+        filesystem_store.write(sha256, data)
+
+
+def store_file(backend: str, sha256: str, path: Path) -> None:
+    """store_content'in dosya yolu ile çalışan hali (akışlı yüklemeler, bkz. ingest)."""
+    if backend == BACKEND_FILESYSTEM:
+        filesystem_store.link_in(sha256, path)
+
+
+def read_content(backend: str, sha256: str, db_data: Optional[bytes]) -> bytes:
+    return filesystem_store.read(sha256) if backend == BACKEND_FILESYSTEM else db_data
+
+
+# ==========================================
+# HTTP RANGE
+# ==========================================
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Tek aralıklı `Range: bytes=...` başlığını (başlangıç, bitiş dahil) çiftine çevirir.
+    Başlık yok, çoklu aralık veya bozuk söz dizimi -> None (tüm içerik döner, RFC 9110'a uygun).
+    Karşılanamayan aralık -> 416.
+    """
+    if not header:
+        return None
+    m = _RANGE_RE.match(header.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    first, last = m.group(1), m.group(2)
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # bytes=-N: son N bayt
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size or size == 0:
+        raise HTTPException(
+            status_code=416,
+            detail="İstenen aralık dosya boyutunun dışında",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+# ==========================================
+# DİSKTEKİ SAHİPSİZ BLOB'LARIN TEMİZLİĞİ
+# ==========================================
+
+def collect_garbage(batch_size: int = 500) -> int:
+    """
+    ref_count'u sıfıra inmiş dosya sistemi blob'larını siler.
+    Satırlar FOR UPDATE SKIP LOCKED ile kilitlenir; aynı içeriği kaydeden istek
+    kilidi bekler ve silme commit'lendikten sonra blob'u (ve dosyayı) yeniden oluşturur.
+    Returns: silinen blob sayısı
+    """
+    from sqlalchemy import delete, select
+
+    from .db import SessionLocal
+    from .models import PdfBlob
+
+    with SessionLocal() as db:
+        orphans = db.scalars(
+            select(PdfBlob.sha256)
+            .where(PdfBlob.backend == BACKEND_FILESYSTEM, PdfBlob.ref_count <= 0)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not orphans:
+            return 0
+        for sha256 in orphans:
+            filesystem_store.delete(sha256)
+        db.execute(delete(PdfBlob).where(PdfBlob.sha256.in_(orphans)))
+        db.commit()
+    logger.info(f"Blob GC removed {len(orphans)} files")
+    return len(orphans)
+
+
+def _existing_blob_hashes(hashes: list) -> Set[str]:
+    from sqlalchemy import select
+
+    from .db import SessionLocal
+    from .models import PdfBlob
+
+    with SessionLocal() as db:
+        return set(db.scalars(select(PdfBlob.sha256).where(PdfBlob.sha256.in_(hashes))))
+
+
+def sweep_unreferenced_files(grace_seconds: Optional[float] = None, batch_size: int = 500) -> int:
+    """
+    pdf_blobs satırı olmayan dosyaları siler (collect_garbage yalnızca satırları tarar).
+    Commit'i bekleyen yazımlar henüz görünmediği için yalnızca bekleme süresinden eski
+    dosyalara bakılır; silmeden hemen önce mtime tekrar kontrol edilir (bkz. _reuse).
+    Returns: silinen dosya sayısı
+    """
+    if grace_seconds is None:
+        grace_seconds = settings.PDF_BLOB_ORPHAN_GRACE_SECONDS
+    cutoff = time.time() - grace_seconds
+    stale = filesystem_store.stale_files(cutoff)
+    removed = 0
+    while batch := list(itertools.islice(stale, batch_size)):
+        hashes = [p.name for p in batch if _SHA256_RE.match(p.name)]
+        known = _existing_blob_hashes(hashes) if hashes else set()
+        for path in batch:
+            if path.name in known:
+                continue
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                continue
+    if removed:
+        logger.info(f"Blob GC removed {removed} unreferenced files")
+    return removed
+
+
+async def gc_loop() -> None:
+    """Lifespan'de başlatılan arka plan görevi."""
+    while True:
+        await asyncio.sleep(settings.PDF_BLOB_GC_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(collect_garbage)
+            await run_in_threadpool(sweep_unreferenced_files)
+        except Exception as e:
+            logger.error(f"Blob GC error: {e}", exc_info=True)
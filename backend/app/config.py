@@ -44,6 +44,70 @@ class Settings(BaseSettings):
     # AI_SERVICE_URL: str = "http://aiservice:8001"
     AI_SERVICE_URL: str = "http://localhost:8001"
     AI_SERVICE_API_KEY: Optional[str] = None  # API key for aiService authentication
+    METRICS_API_KEY: Optional[str] = None  # /metrics için X-Metrics-Key; tanımlı değilse /metrics kapalı
+    # PDF'in AI Service'e iletim şekli:
+    #   "multipart"     -> dosya HTTP isteğinin gövdesinde gönderilir
+    #   "shared_volume" -> dosya paylaşılan volume'e (uploads/handoff) bir kez yazılır, sadece yolu gönderilir
+    AI_HANDOFF_MODE: str = "multipart"
+    AI_HANDOFF_TTL_SECONDS: int = 3600
+
+    # Paylaşılan AI Service istemcisi (bağlantı havuzu)
+    AI_SERVICE_HTTP2: bool = False  # AI Service önünde HTTP/2 konuşan bir sunucu (örn. hypercorn) varsa
+    AI_SERVICE_MAX_CONNECTIONS: int = 100
+    AI_SERVICE_MAX_KEEPALIVE: int = 20
+    AI_SERVICE_KEEPALIVE_EXPIRY: float = 30.0
+
+    # PDF araçları (convert/extract/merge/reorder) süreç havuzu
+    PDF_TOOL_WORKERS: int = 2
+    PDF_TOOL_QUEUE_DEPTH: int = 8  # Havuz doluyken bekleyebilecek iş sayısı; fazlası 503 alır
+    PDF_TOOL_RETRY_AFTER_SECONDS: int = 5
+    PDF_TEXT_BATCH_PAGES: int = 20  # convert-text: havuza tek seferde gönderilen sayfa sayısı
+
+    # Markdown -> PDF önbelleği (toplam boyut sınırı)
+    MARKDOWN_PDF_CACHE_MB: int = 64
+
+    # Kullanım sayaçları (write-behind): Redis'ten user_stats'a toplu yazım
+    USAGE_FLUSH_INTERVAL_SECONDS: float = 5.0
+    USAGE_FLUSH_BATCH_SIZE: int = 500
+
+    # Global istatistikler (ana sayfa): süreç içi önbellek ve periyodik uzlaştırma
+    GLOBAL_STATS_CACHE_TTL_SECONDS: float = 10.0
+    GLOBAL_STATS_STALE_TTL_SECONDS: float = 300.0
+    GLOBAL_STATS_RECONCILE_INTERVAL_SECONDS: float = 900.0
+    GLOBAL_STATS_RECONCILE_LOCK_SECONDS: int = 120
+
+    # Kullanıcı profili/rol/LLM tercihi önbelleği (Redis ile worker'lar arası geçersiz kılma)
+    USER_CACHE_TTL_SECONDS: float = 300.0
+    USER_CACHE_MAX_ENTRIES: int = 10000
+
+    # PDF içerik deposu: "db" (pdf_blobs.data) veya "filesystem" (PDF_BLOB_DIR, varsayılan uploads/blobs)
+    PDF_BLOB_BACKEND: str = "db"
+    PDF_BLOB_DIR: Optional[str] = None
+    PDF_BLOB_GC_INTERVAL_SECONDS: float = 300.0
+    PDF_BLOB_ORPHAN_GRACE_SECONDS: float = 3600.0  # Satırı olmayan dosyalar bu süreden eskiyse silinir
+
+    # Devam ettirilebilir (parçalı) yüklemeler: oturum durumu Redis'te, parçalar uploads/resumable altında
+    RESUMABLE_UPLOAD_TTL_SECONDS: int = 86400  # Her parçada yenilenir
+    RESUMABLE_UPLOAD_CHUNK_MB: int = 5  # Tek PUT isteğinde kabul edilen en büyük parça
+    RESUMABLE_UPLOAD_LOCK_SECONDS: int = 120
+    RESUMABLE_UPLOAD_SWEEP_INTERVAL_SECONDS: float = 3600.0
+
+    # Kayıt sonrası arka plan ön hesaplaması (sayfa metinleri, parça indeksi; bkz. app/artifacts.py)
+    ARTIFACT_CHUNK_CHARS: int = 1500
+    ARTIFACT_BATCH_SIZE: int = 20
+    ARTIFACT_POLL_INTERVAL_SECONDS: float = 30.0  # Başka worker'da kaydedilen PDF'ler için
+    ARTIFACT_CLAIM_TIMEOUT_SECONDS: int = 600  # Bu süreyi aşan "processing" satırı yeniden denenir
+    ARTIFACT_MAX_ATTEMPTS: int = 3
+
+    # /files/search: puanlanan en fazla aday sayfa (ts_rank_cd maliyetini sınırlar)
+    SEARCH_MAX_CANDIDATES: int = 2000
+
+    # /files/summarize ön kontrolü: bu sınırları aşan belgeler Celery'ye yönlendirilir
+    PREFLIGHT_SAMPLE_PAGES: int = 8
+    PREFLIGHT_SYNC_MAX_PAGES: int = 60
+    PREFLIGHT_SYNC_MAX_CHARS: int = 200000
+    SUMMARY_JOB_TTL_SECONDS: int = 86400
+    BACKEND_INTERNAL_URL: str = "http://backend:8000"  # AI Service callback'leri için
     
     # Gemini API (Avatar generation için)
     GEMINI_API_KEY: Optional[str] = None
@@ -5,6 +5,7 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.engine import URL
 
@@ -99,4 +100,28 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# =================================================
+# SQLALCHEMY ASYNC (asyncpg) - async handler'lar için
+# =================================================
+# Sync engine (get_db) migration'lar, arka plan işleri ve threadpool'da çalışan
+# kodlar için kalır. async def endpoint'lerdeki DB erişimi event loop'u bloklamasın
+# diye app.repositories bu engine'i kullanır.
+async_engine = create_async_engine(
+    db_url.set(drivername="postgresql+asyncpg", query={}),
+    pool_pre_ping=True,
+    pool_recycle=180,
+    connect_args={
+        "ssl": DB_SSLMODE,
+        # Supabase pooler (transaction mode) prepared statement'ları desteklemez
+        "statement_cache_size": 0,
+    },
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
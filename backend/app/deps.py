@@ -1,11 +1,13 @@
 # app/auth.py
-from typing import Annotated
+import secrets
+from typing import Annotated, Optional
 from fastapi import HTTPException, status, Security
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.security import APIKeyHeader, HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 from app.config import settings
 
 security = HTTPBearer()
+metrics_key_header = APIKeyHeader(name="X-Metrics-Key", auto_error=False)
 
 def get_current_user(credentials: Annotated[HTTPAuthorizationCredentials, Security(security)]):
     """
@@ -39,4 +41,22 @@ def get_current_user(credentials: Annotated[HTTPAuthorizationCredentials, Securi
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+
+def verify_metrics_key(x_metrics_key: Optional[str] = Security(metrics_key_header)):
+    """
+    /metrics için dahili anahtar doğrulaması (Prometheus / izleme araçları).
+    METRICS_API_KEY tanımlı değilse uç nokta kapalıdır; havuz, önbellek ve kullanım
+    ayrıntıları hiçbir zaman anahtarsız açılmaz.
+    """
+    if not settings.METRICS_API_KEY:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_metrics_key:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="X-Metrics-Key header is required",
+        )
+    if not secrets.compare_digest(x_metrics_key, settings.METRICS_API_KEY):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid metrics key")
+    return True
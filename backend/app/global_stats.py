@@ -0,0 +1,217 @@
+# app/global_stats.py
+"""
+Ana sayfadaki global istatistikler (toplam kullanıcı, işlem, AI özeti).
+
+Toplamlar Redis'teki tek bir hash'te artımlı tutulur: kullanım kaydedildiğinde
+(usage_counters), kullanıcı oluşturulduğunda ve hesap silindiğinde güncellenir.
+Kaymaları düzeltmek için periyodik uzlaştırma (reconcile) görevi DB'den gerçek
+toplamları hesaplar; birden fazla süreçte aynı anda çalışmaması için Redis kilidi
+kullanılır. Uzlaştırma sırasında sayaç flush'ları durdurulur (DB ile bekleyen sayaçlar
+tutarlı okunsun diye) ve sonuç tek bir Lua betiğiyle uygulanır.
+
+Hash yalnızca uzlaştırmanın yazdığı `seeded_at` alanı varsa geçerlidir. Deploy veya
+Redis temizliğinden sonra tohumlanmamış hash'e artırım yapılmaz (kısmi toplamlar
+sunulmasın diye); atlanan artırımlar DB'de veya bekleyen sayaçlarda olduğundan
+tohumlamada sayılır. Uzlaştırma açılışta bir kez hemen çalışır.
+
+Endpoint süreç içi önbellekten okur (kısa TTL + stale-while-revalidate): taze ise
+doğrudan, bayatsa eski değer dönülür ve arka planda yenilenir. Böylece maliyet
+kullanıcı sayısından bağımsızdır.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+
+from .config import settings
+from .redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+TOTALS_KEY = "stats:global"
+SEEDED_FIELD = "seeded_at"
+RECONCILE_LOCK_KEY = "stats:global:reconcile_lock"
+
+# user_stats sütunu -> global toplam alanı
+USAGE_FIELDS = {"summary_count": "total_ai_summaries", "tools_count": "total_tools"}
+
+# Süren sayaç flush'larının bitmesi için en fazla bu kadar beklenir
+FLUSH_DRAIN_TIMEOUT_SECONDS = 10
+
+# Bekleyen sayaçların okunması ve toplamların yazılması arasında artırım araya giremez;
+# böylece uzlaştırma sürerken yapılan HINCRBY'ler ezilmez.
+# KEYS: totals, dirty set | ARGV: pending anahtar öneki, seeded_at, (alan, pending sütunu, DB değeri)...
+_APPLY_SCRIPT = """
+local members = redis.call('SMEMBERS', KEYS[2])
+local result = {}
+for i = 3, #ARGV, 3 do
+    local value = tonumber(ARGV[i + 2])
+    if ARGV[i + 1] ~= '' then
+        for _, user_id in ipairs(members) do
+            value = value + tonumber(redis.call('HGET', ARGV[1] .. user_id, ARGV[i + 1]) or '0')
+        end
+    end
+    redis.call('HSET', KEYS[1], ARGV[i], value)
+    table.insert(result, ARGV[i])
+    table.insert(result, value)
+end
+redis.call('HSET', KEYS[1], 'seeded_at', ARGV[2])
+return result
+"""
+
+# Tohumlanmamış hash'e artırım yapılmaz. KEYS: totals | ARGV: (alan, fark)...
+_ADJUST_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'seeded_at') == 0 then
+    return 0
+end
+for i = 1, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+
+def adjust(pipe=None, users: int = 0, summaries: int = 0, tools: int = 0) -> None:
+    """
+    Global toplamları artırır/azaltır. `pipe` verilirse çağıranın Redis pipeline'ına eklenir.
+    Redis yoksa veya hash henüz tohumlanmamışsa sessizce atlanır (uzlaştırma düzeltir).
+    """
+    if redis_client is None:
+        return
+    args = []
+    for field, delta in (("total_users", users), ("total_ai_summaries", summaries), ("total_tools", tools)):
+        if delta:
+            args += [field, delta]
+    if not args:
+        return
+    target = pipe if pipe is not None else redis_client.pipeline(transaction=False)
+    target.eval(_ADJUST_SCRIPT, 1, TOTALS_KEY, *args)
+    if pipe is None:
+        try:
+            target.execute()
+        except Exception as e:
+            logger.warning(f"Global stats adjust failed: {e}")
+
+
+def _compute_from_db() -> dict:
+    """Gerçek toplamlar (uzlaştırma). Tablo taraması yapar, istek yolunda çağrılmamalı."""
+    from .db import SessionLocal
+    from .models import User, UserStats
+
+    with SessionLocal() as db:
+        total_users = db.scalar(select(func.count()).select_from(User)) or 0
+        summaries, tools = db.execute(
+            select(func.coalesce(func.sum(UserStats.summary_count), 0), func.coalesce(func.sum(UserStats.tools_count), 0))
+        ).one()
+    return {"total_users": int(total_users), "total_ai_summaries": int(summaries), "total_tools": int(tools)}
+
+
+def _apply(db_totals: dict) -> dict:
+    """
+    DB toplamlarına Redis'te bekleyen (henüz user_stats'a yazılmamış, global toplamda
+    zaten sayılmış) artırımları ekleyip atomik olarak yazar.
+    """
+    from .usage_counters import DIRTY_KEY, PENDING_KEY
+
+    columns = {field: column for column, field in USAGE_FIELDS.items()}
+    args = [PENDING_KEY.format(""), int(time.time())]
+    for field, value in db_totals.items():
+        args += [field, columns.get(field, ""), value]
+    values = redis_client.eval(_APPLY_SCRIPT, 2, TOTALS_KEY, DIRTY_KEY, *args)
+    return {field: int(value) for field, value in zip(values[::2], values[1::2])}
+
+
+def reconcile() -> Optional[dict]:
+    """
+    Redis toplamlarını DB + bekleyen sayaçlarla yeniden hesaplar.
+    Kilit başka bir süreçteyse veya süren bir flush bitmediyse None döner.
+    """
+    from . import usage_counters
+
+    if redis_client is None:
+        return None
+    if not redis_client.set(RECONCILE_LOCK_KEY, "1", nx=True, ex=settings.GLOBAL_STATS_RECONCILE_LOCK_SECONDS):
+        return None
+    try:
+        # Flush'lar sürerken sayaçlar ne Redis'te ne DB'de görünür; önce durdurulur
+        if not usage_counters.pause_flushes(FLUSH_DRAIN_TIMEOUT_SECONDS, settings.GLOBAL_STATS_RECONCILE_LOCK_SECONDS):
+            logger.warning("Global stats reconcile skipped: usage flush still running")
+            return None
+        totals = _apply(_compute_from_db())
+        logger.info(f"Global stats reconciled: {totals}")
+        return totals
+    finally:
+        usage_counters.resume_flushes()
+        redis_client.delete(RECONCILE_LOCK_KEY)
+
+
+def _format(totals: dict) -> dict:
+    total_ai = int(totals.get("total_ai_summaries", 0))
+    return {
+        "total_users": int(totals.get("total_users", 0)),
+        "total_processed": int(totals.get("total_tools", 0)) + total_ai,  # Toplam dosya işlemi
+        "total_ai_summaries": total_ai,                                 # Toplam AI işlemi
+    }
+
+
+def load_totals() -> dict:
+    """Redis'ten O(1) okuma; Redis yoksa (veya hiç tohumlanmamışsa) DB'den hesaplanır."""
+    if redis_client is not None:
+        totals = redis_client.hgetall(TOTALS_KEY)
+        if SEEDED_FIELD in totals:
+            return _format(totals)
+        seeded = reconcile()
+        if seeded:
+            return _format(seeded)
+    return _format(_compute_from_db())
+
+
+class GlobalStatsCache:
+    """Süreç içi TTL + stale-while-revalidate önbelleği."""
+
+    def __init__(self, ttl: float, stale_ttl: float):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._value: Optional[dict] = None
+        self._loaded_at = 0.0
+        self._refreshing: Optional[asyncio.Task] = None
+
+    async def _refresh(self) -> dict:
+        value = await run_in_threadpool(load_totals)
+        self._value, self._loaded_at = value, time.monotonic()
+        return value
+
+    def _refresh_in_background(self) -> None:
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self._refresh())
+            self._refreshing.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Global stats refresh failed: {task.exception()}")
+
+    async def get(self) -> dict:
+        age = time.monotonic() - self._loaded_at
+        if self._value is not None and age < self.ttl:
+            return self._value
+        if self._value is not None and age < self.ttl + self.stale_ttl:
+            self._refresh_in_background()
+            return self._value
+        return await self._refresh()
+
+
+cache = GlobalStatsCache(settings.GLOBAL_STATS_CACHE_TTL_SECONDS, settings.GLOBAL_STATS_STALE_TTL_SECONDS)
+
+
+async def reconcile_loop() -> None:
+    """Lifespan'de başlatılan periyodik uzlaştırma görevi; ilk tur beklemeden çalışır (tohumlama)."""
+    while True:
+        try:
+            await run_in_threadpool(reconcile)
+        except Exception as e:
+            logger.error(f"Global stats reconcile failed: {e}", exc_info=True)
+        await asyncio.sleep(settings.GLOBAL_STATS_RECONCILE_INTERVAL_SECONDS)
@@ -0,0 +1,225 @@
+# app/ingest.py
+"""
+Akışlı PDF yükleme (multipart) alımı.
+
+`UploadFile = File(...)` kullanıldığında Starlette tüm gövdeyi okuyup diske
+yazdıktan sonra handler çalışır; boyut sınırı ancak o zaman kontrol edilebilir.
+Burada gövde `request.stream()` üzerinden parça parça okunur:
+
+- SHA-256 ve boyut yazarken artımlı hesaplanır (sonradan tekrar okunmaz)
+- MAX_FILE_SIZE_*_MB aşıldığı anda 413 döner; gövdenin kalanı okunmaz
+- ilk parçada PDF imzası (%PDF-) kontrol edilir
+- içerik uploads/incoming altında geçici dosyaya yazılır; sonraki kod bayt
+  yerine dosya nesnesi/yolu ile çalışır (dosya sistemi blob deposuna taşıma kopyasızdır)
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from python_multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+
+from .config import settings
+
+INCOMING_DIR = Path(__file__).parent.parent / "uploads" / "incoming"
+
+PDF_MAGIC = b"%PDF-"
+# PDF okuyucular imzadan önce en fazla 1024 baytlık çöpe izin verir
+MAGIC_SEARCH_BYTES = 1024
+# Multipart zarfı ve küçük form alanları için Content-Length ön kontrolünde tanınan pay
+ENVELOPE_ALLOWANCE_BYTES = 64 * 1024
+MAX_FIELD_BYTES = 64 * 1024
+
+
+class IngestedUpload:
+    """Diske akıtılmış, hash'i ve boyutu bilinen yükleme."""
+
+    def __init__(self, path: Path, filename: Optional[str], content_type: Optional[str], size: int, sha256: str):
+        self.path = path
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+        self.sha256 = sha256
+
+    def open(self) -> BinaryIO:
+        return open(self.path, "rb")
+
+    def read_bytes(self) -> bytes:
+        return self.path.read_bytes()
+
+    def cleanup(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def upload_limit_mb(is_guest: bool) -> int:
+    return settings.MAX_FILE_SIZE_GUEST_MB if is_guest else settings.MAX_FILE_SIZE_USER_MB
+
+
+def too_large(is_guest: bool) -> HTTPException:
+    user_type = "Misafir" if is_guest else "Kayıtlı Kullanıcı"
+    return HTTPException(
+        status_code=413,
+        detail=f"{user_type} limiti aşıldı! Maksimum {upload_limit_mb(is_guest)} MB dosya yükleyebilirsiniz."
+    )
+
+
+class _PartWriter:
+    """Dosya alanının içeriğini geçici dosyaya yazar; hash, boyut ve imza kontrolü burada."""
+
+    def __init__(self, max_bytes: int, is_guest: bool):
+        self.max_bytes = max_bytes
+        self.is_guest = is_guest
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+        self.magic_ok = False
+        INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=INCOMING_DIR, suffix=".upload")
+        self.file = os.fdopen(fd, "wb")
+        self.path = Path(path)
+
+    def _check_magic(self, chunk: bytes, final: bool = False) -> None:
+        if self.magic_ok:
+            return
+        self.head = (self.head + chunk)[:MAGIC_SEARCH_BYTES]
+        if PDF_MAGIC in self.head:
+            self.magic_ok = True
+        elif final or len(self.head) >= MAGIC_SEARCH_BYTES:
+            raise HTTPException(status_code=400, detail="Sadece PDF dosyaları kabul edilir.")
+
+    def _write(self, chunk: bytes) -> None:
+        self.hasher.update(chunk)
+        self.file.write(chunk)
+
+    async def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise too_large(self.is_guest)
+        self._check_magic(chunk)
+        await run_in_threadpool(self._write, chunk)
+
+    def finish(self) -> None:
+        self._check_magic(b"", final=True)
+        self.file.close()
+
+    def abort(self) -> None:
+        self.file.close()
+        self.path.unlink(missing_ok=True)
+
+
+async def ingest_pdf_upload(
+    request: Request, is_guest: bool, file_field: str = "file", check_content_type: bool = True
+) -> Tuple[IngestedUpload, Dict[str, str]]:
+    """
+    multipart/form-data gövdesini akış halinde okur.
+    check_content_type=False: parçanın Content-Type'ına bakılmaz (imza kontrolü yine yapılır).
+    Returns: (PDF yüklemesi, diğer form alanları). Çağıran `upload.cleanup()` yapmalı.
+    """
+    max_bytes = upload_limit_mb(is_guest) * 1024 * 1024
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="multipart/form-data bekleniyor")
+
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + ENVELOPE_ALLOWANCE_BYTES:
+        raise too_large(is_guest)
+
+    # Parser senkron callback'ler çağırır; olaylar toplanıp her parçadan sonra async işlenir
+    events = []
+    header_field, header_value = bytearray(), bytearray()
+
+    def on_header_end():
+        events.append(("header", (bytes(header_field).lower(), bytes(header_value))))
+        header_field.clear()
+        header_value.clear()
+
+    callbacks = {
+        "on_part_begin": lambda: events.append(("begin", None)),
+        "on_part_data": lambda data, start, end: events.append(("data", bytes(data[start:end]))),
+        "on_part_end": lambda: events.append(("end", None)),
+        "on_header_field": lambda data, start, end: header_field.extend(data[start:end]),
+        "on_header_value": lambda data, start, end: header_value.extend(data[start:end]),
+        "on_header_end": on_header_end,
+        "on_headers_finished": lambda: events.append(("headers_done", None)),
+    }
+    parser = MultipartParser(boundary, callbacks)
+
+    fields: Dict[str, str] = {}
+    upload: Optional[IngestedUpload] = None
+    writer: Optional[_PartWriter] = None
+    part_headers: Dict[bytes, bytes] = {}
+    field_name, field_value, part_filename, part_type = None, bytearray(), None, None
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for kind, value in events:
+                if kind == "begin":
+                    part_headers, field_value, writer = {}, bytearray(), None
+                elif kind == "header":
+                    part_headers[value[0]] = value[1]
+                elif kind == "headers_done":
+                    _, disposition = parse_options_header(part_headers.get(b"content-disposition", b""))
+                    field_name = disposition.get(b"name", b"").decode("utf-8", "replace")
+                    raw_filename = disposition.get(b"filename")
+                    part_filename = raw_filename.decode("utf-8", "replace") if raw_filename is not None else None
+                    part_type = part_headers.get(b"content-type", b"").decode("latin-1") or None
+                    if field_name == file_field and part_filename is not None and upload is None:
+                        if check_content_type and part_type != "application/pdf":
+                            raise HTTPException(status_code=400, detail="Sadece PDF dosyaları kabul edilir.")
+                        writer = _PartWriter(max_bytes, is_guest)
+                elif kind == "data":
+                    if writer is not None:
+                        await writer.write(value)
+                    else:
+                        field_value.extend(value)
+                        if len(field_value) > MAX_FIELD_BYTES:
+                            raise HTTPException(status_code=413, detail=f"Form alanı çok büyük: {field_name}")
+                elif kind == "end":
+                    if writer is not None:
+                        writer.finish()
+                        upload = IngestedUpload(
+                            writer.path, part_filename, part_type, writer.size, writer.hasher.hexdigest()
+                        )
+                        writer = None
+                    elif field_name:
+                        fields[field_name] = field_value.decode("utf-8", "replace")
+            events.clear()
+        parser.finalize()
+    except MultipartParseError as e:
+        if upload is not None:
+            upload.cleanup()
+        raise HTTPException(status_code=400, detail=f"Geçersiz multipart gövdesi: {e}")
+    except BaseException:
+        if upload is not None:
+            upload.cleanup()
+        raise
+    finally:
+        # Gövde dosya parçasının kapanış sınırından önce biterse yazıcı açık kalır
+        if writer is not None:
+            writer.abort()
+
+    if upload is None:
+        raise HTTPException(status_code=400, detail=f"'{file_field}' alanında dosya bulunamadı")
+    return upload, fields
+
+
+def upload_openapi(*text_fields: str, required: Tuple[str, ...] = (), body_required: bool = True) -> dict:
+    """Gövdeyi kendisi okuyan endpoint'ler için OpenAPI (Swagger) form şeması."""
+    properties = {"file": {"type": "string", "format": "binary"}}
+    properties.update({name: {"type": "string"} for name in text_fields})
+    return {
+        "requestBody": {
+            "required": body_required,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {"type": "object", "properties": properties, "required": ["file", *required]}
+                }
+            },
+        }
+    }
@@ -1,9 +1,17 @@
 # backend/app/main.py
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 from app.config import settings
-from app.routers import auth, guest, files, user_avatar_routes
+from app.deps import verify_metrics_key
+from app.routers import auth, guest, files, uploads, user_avatar_routes
+from app.ai_client import AIServiceClient
+from app.pdf_tools import PdfToolPool
+from app.services import markdown_pdf
+from app import artifacts, blob_store, global_stats, metrics, resumable_uploads, usage_counters, user_cache
 
 # Security scheme for Swagger UI
 security_scheme = HTTPBearer(
@@ -11,7 +19,53 @@ security_scheme = HTTPBearer(
     scheme_name="Bearer"
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Uygulama ömrü boyunca paylaşılan AI Service istemcisi
+    app.state.ai_client = AIServiceClient()
+    metrics.register("ai_client", app.state.ai_client.pool_stats)
+    # pypdf araçları için sınırlı süreç havuzu
+    app.state.pdf_tool_pool = PdfToolPool()
+    metrics.register("pdf_tools", app.state.pdf_tool_pool.pool_stats)
+    metrics.register("markdown_pdf_cache", markdown_pdf.cache.stats)
+    # Kullanım sayaçlarını Redis'ten user_stats'a toplu yazan arka plan görevi
+    usage_flusher = asyncio.create_task(usage_counters.flush_loop())
+    metrics.register("usage_counters", usage_counters.get_stats)
+    # Global istatistik toplamlarını DB ile periyodik uzlaştırma
+    stats_reconciler = asyncio.create_task(global_stats.reconcile_loop())
+    # Profil önbelleği geçersiz kılma yayınlarını dinle
+    user_cache_listener = user_cache.start_invalidation_listener()
+    metrics.register("user_cache", user_cache.cache.stats)
+    # Diskteki sahipsiz PDF blob'larının temizliği
+    blob_gc = asyncio.create_task(blob_store.gc_loop())
+    # Süresi dolmuş parçalı yükleme dosyalarının temizliği
+    upload_sweeper = asyncio.create_task(resumable_uploads.sweep_loop())
+    # Kaydedilen PDF'lerin sayfa metni/parça indeksi ön hesaplaması
+    artifact_worker = asyncio.create_task(artifacts.worker_loop(app.state.pdf_tool_pool))
+    metrics.register("artifacts", artifacts.get_stats)
+    try:
+        yield
+    finally:
+        metrics.unregister("artifacts")
+        artifact_worker.cancel()
+        upload_sweeper.cancel()
+        blob_gc.cancel()
+        metrics.unregister("user_cache")
+        if user_cache_listener is not None:
+            user_cache_listener.stop()
+        stats_reconciler.cancel()
+        usage_flusher.cancel()
+        await run_in_threadpool(usage_counters.flush_all)
+        metrics.unregister("usage_counters")
+        metrics.unregister("markdown_pdf_cache")
+        metrics.unregister("pdf_tools")
+        app.state.pdf_tool_pool.shutdown()
+        metrics.unregister("ai_client")
+        await app.state.ai_client.aclose()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.API_NAME,
     description="PDF Project API with Supabase",
     version="1.0.0",
@@ -63,6 +117,7 @@ app.add_middleware(
 app.include_router(auth.router)
 app.include_router(guest.router)
 app.include_router(files.router)
+app.include_router(uploads.router)
 app.include_router(user_avatar_routes.router)
 
 
@@ -90,6 +145,11 @@ async def health_check():
         "database": db_status
     }
 
+@app.get("/metrics", dependencies=[Depends(verify_metrics_key)])
+async def get_metrics():
+    """Süreç içi metrikler (AI Service bağlantı havuzu, PDF araç havuzu vb.); X-Metrics-Key gerekli."""
+    return metrics.snapshot()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,31 @@
+# app/metrics.py
+"""
+Süreç içi basit metrik kaydı. Modüller kendi anlık görüntü fonksiyonlarını
+kaydeder, `/metrics` endpoint'i hepsini tek JSON'da döner.
+"""
+import logging
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_providers: Dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, provider: Callable[[], dict]) -> None:
+    """`name` altında yayınlanacak metrik fonksiyonunu kaydeder."""
+    _providers[name] = provider
+
+
+def unregister(name: str) -> None:
+    _providers.pop(name, None)
+
+
+def snapshot() -> dict:
+    result = {}
+    for name, provider in _providers.items():
+        try:
+            result[name] = provider()
+        except Exception as e:
+            logger.warning(f"Metrics provider '{name}' failed: {e}")
+            result[name] = {"error": str(e)}
+    return result
@@ -1,9 +1,10 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Boolean, func, LargeBinary
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Boolean, func, LargeBinary, Index, Text, text, Computed
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .db import Base
+from .blob_store import read_content
 from pydantic import BaseModel
 
 # ==========================================
@@ -181,6 +182,10 @@ class UserAvatar(Base):
 # ==========================================
 class PDF(Base):
     __tablename__ = "pdfs"
+    __table_args__ = (
+        # /files/my-files keyset sayfalaması: WHERE user_id = ? AND (created_at, id) < (?, ?)
+        Index("ix_pdfs_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True)  # UUID string olarak saklanacak
     user_id: Mapped[str] = mapped_column(
@@ -189,8 +194,12 @@ class PDF(Base):
         index=True
     )
     
-    # PDF dosyası binary olarak saklanacak
-    pdf_data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    # İçerik pdf_blobs'ta (SHA-256 ile adreslenir); aynı dosya tekrar kaydedilirse tek kopya tutulur
+    blob_sha256: Mapped[str] = mapped_column(
+        ForeignKey("pdf_blobs.sha256", ondelete="RESTRICT"),
+        nullable=False,
+        index=True
+    )
     
     # Metadata (opsiyonel)
     filename: Mapped[str | None] = mapped_column(String(255), nullable=True)
@@ -203,4 +212,116 @@ class PDF(Base):
     )
     
     # Relationships
-    user = relationship("User", back_populates="pdfs")
\ No newline at end of file
+    user = relationship("User", back_populates="pdfs")
+    blob = relationship("PdfBlob")
+
+    @property
+    def pdf_data(self) -> bytes:
+        return self.blob.content
+
+
+# ==========================================
+# 9. PDF BLOB TABLOSU (içerik adresli, tekilleştirilmiş)
+# ==========================================
+class PdfBlob(Base):
+    """
+    PDF içeriği, SHA-256 hash'i anahtar olarak bir kez saklanır.
+    ref_count DB trigger'ı ile tutulur (pdfs INSERT/DELETE, kullanıcı silinince CASCADE dahil);
+    sayaç sıfıra inince DB'deki blob aynı işlemde silinir, diskteki blob'u blob_store GC'si temizler.
+    Bkz. alembic c5d6e7f8a9b0, d6e7f8a9b0c1.
+    """
+    __tablename__ = "pdf_blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # İçeriğin tutulduğu yer: "db" (data sütunu) veya "filesystem" (bkz. blob_store)
+    backend: Mapped[str] = mapped_column(String(16), server_default="db", nullable=False)
+    # deferred: sadece erişildiğinde yüklenir (listeleme/varlık kontrolü içeriği çekmez)
+    data: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    ref_count: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    @property
+    def content(self) -> bytes:
+        return read_content(self.backend, self.sha256, self.data)
+
+
+# ==========================================
+# PDF ARTIFACTS (ÖN HESAPLANMIŞ ÇIKTILAR)
+# ==========================================
+class PdfArtifact(Base):
+    """
+    Blob başına bir kez hesaplanan ayrıştırma çıktıları (bkz. app/artifacts.py).
+    Kayıt sırasında "pending" olarak eklenir, arka plan işçisi doldurur.
+    İçerik hash'i anahtarın kendisidir; blob silinince CASCADE ile silinir.
+    """
+    __tablename__ = "pdf_artifacts"
+
+    sha256: Mapped[str] = mapped_column(
+        String(64), ForeignKey("pdf_blobs.sha256", ondelete="CASCADE"), primary_key=True
+    )
+    # pending -> processing -> ready | failed
+    status: Mapped[str] = mapped_column(String(16), server_default="pending", nullable=False)
+    version: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    page_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    has_text_layer: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    # Sayfa metinleri (liste) ve parça indeksi ([sayfa, başlangıç, bitiş] üçlüleri); büyük olduğu için deferred
+    pages: Mapped[list | None] = mapped_column(JSONB, nullable=True, deferred=True)
+    chunks: Mapped[list | None] = mapped_column(JSONB, nullable=True, deferred=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False
+    )
+
+    __table_args__ = (
+        # İşçinin kuyruk taraması için (ready/failed satırlar indekse girmez)
+        Index("ix_pdf_artifacts_pending", "status", postgresql_where=text("status IN ('pending', 'processing')")),
+    )
+
+
+# ==========================================
+# PDF TAM METİN ARAMA İNDEKSİ
+# ==========================================
+SEARCH_TS_CONFIG = "turkish"
+
+
+class PdfSearchPage(Base):
+    """
+    Kullanıcının her PDF'inin her sayfası için bir satır (boş sayfalar hariç).
+    DB trigger'larıyla doldurulur: PDF kaydedildiğinde çıktılar hazırsa hemen,
+    değilse pdf_artifacts "ready" olduğunda. PDF silinince CASCADE ile silinir.
+    Bkz. alembic f8a9b0c1d2e3, repositories/search.py.
+    """
+    __tablename__ = "pdf_search_pages"
+
+    pdf_id: Mapped[str] = mapped_column(ForeignKey("pdfs.id", ondelete="CASCADE"), primary_key=True)
+    page: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Sorgular kullanıcıya göre süzülür; pdfs ile JOIN gerekmesin diye burada da tutulur
+    user_id: Mapped[str] = mapped_column(String, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False, deferred=True)
+    tsv = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_TS_CONFIG}', content)", persisted=True),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        # btree_gin ile (user_id, tsv) tek GIN indeksinde: arama sadece kullanıcının sayfalarında yürür
+        Index("ix_pdf_search_pages_user_tsv", "user_id", "tsv", postgresql_using="gin"),
+    )
@@ -0,0 +1,128 @@
+# app/page_ranges.py
+"""
+Sayfa seçimi motoru (extract-pages, reorder ve pipeline ortak kullanır).
+
+Her terim sayfa sayısına göre O(1)'de kırpılan bir aritmetik diziye (`range`)
+çevrilir; "1-100000000" gibi bir ifade sayfa sayfa gezilmez. Sözdizimi
+(virgülle ayrılmış terimler, sayfa numaraları 1'den başlar):
+
+    5           tek sayfa
+    3-7         aralık              5-     5'ten sona kadar
+    last, n     son sayfa           n-1    tüm belge ters sırada
+    1-20:3      adım (1, 4, 7, ...)  1-9:odd / 2-10:even  aralıktaki tek/çift sayfalar
+    odd, even   belgedeki tek/çift sayfalar            all    tüm sayfalar
+    !4, !10-12  hariç tut (sadece hariç tutma varsa temel küme tüm belgedir)
+"""
+import re
+from typing import List, Optional, Tuple
+
+MAX_TERMS = 1000
+
+_TERM_RE = re.compile(
+    r"(?P<excl>!)?\s*(?:"
+    r"(?P<kw>odd|even|all)"
+    r"|(?P<a>\d+|last|n)(?:\s*(?P<dash>-)\s*(?P<b>\d+|last|n)?)?(?:\s*:\s*(?P<mod>\d+|odd|even))?"
+    r")",
+    re.IGNORECASE,
+)
+
+
+class PageRangeError(ValueError):
+    """Geçersiz sayfa ifadesi (kullanıcı hatası, 400 olarak döner)."""
+
+
+def _page_value(token: str, page_count: int) -> int:
+    if token.lower() in ("last", "n"):
+        return page_count
+    value = int(token)
+    if value < 1:
+        raise PageRangeError("Sayfa numaraları 1'den başlar.")
+    return value
+
+
+def _parse_term(term: str, page_count: int, strict: bool) -> Tuple[bool, range]:
+    """Tek terimi (hariç mi, 0 tabanlı range) çiftine çevirir."""
+    m = _TERM_RE.fullmatch(term)
+    if not m:
+        raise PageRangeError(f"Geçersiz sayfa ifadesi: '{term}'")
+
+    if m["kw"]:
+        first, last, mod = 1, page_count, (None if m["kw"].lower() == "all" else m["kw"].lower())
+    else:
+        first = _page_value(m["a"], page_count)
+        if m["dash"]:
+            last = _page_value(m["b"], page_count) if m["b"] else page_count
+        else:
+            last = first
+        mod = m["mod"].lower() if m["mod"] else None
+
+    if strict and max(first, last) > page_count:
+        raise PageRangeError(f"Hatalı sayfa numarası: '{term}' (belge {page_count} sayfa).")
+
+    direction = 1 if last >= first else -1
+    step = 1
+    if mod in ("odd", "even"):
+        step = 2
+        if (first % 2 == 1) != (mod == "odd"):
+            first += direction
+    elif mod is not None:
+        step = int(mod)
+        if step < 1:
+            raise PageRangeError(f"Adım 1 veya daha büyük olmalı: '{term}'")
+
+    # Belge sınırına kırp (adım hizası korunur)
+    if direction == 1:
+        last = min(last, page_count)
+        return bool(m["excl"]), range(first - 1, last, step)
+    if first > page_count:
+        first -= -(-(first - page_count) // step) * step
+    return bool(m["excl"]), range(first - 1, last - 2, -step)
+
+
+def parse(spec: str, page_count: int, strict: bool = False) -> Tuple[List[range], List[range]]:
+    """
+    İfadeyi (dahil edilenler, hariç tutulanlar) listelerine ayırır; her öğe 0 tabanlı `range`.
+    strict=False: belge dışındaki sayfalar sessizce atlanır; True: hata verilir.
+    """
+    if not spec or not spec.strip():
+        raise PageRangeError("Sayfa aralığı boş olamaz.")
+    terms = [t.strip() for t in spec.split(",") if t.strip()]
+    if not terms:
+        raise PageRangeError("Sayfa aralığı boş olamaz.")
+    if len(terms) > MAX_TERMS:
+        raise PageRangeError(f"En fazla {MAX_TERMS} terim kullanılabilir.")
+
+    includes, excludes = [], []
+    for term in terms:
+        excluded, pages = _parse_term(term, page_count, strict)
+        (excludes if excluded else includes).append(pages)
+    if not includes:
+        includes.append(range(page_count))
+    return includes, excludes
+
+
+def _mask(ranges: List[range], page_count: int, base: Optional[bytearray] = None, value: int = 1) -> bytearray:
+    mask = base if base is not None else bytearray(page_count)
+    fill = bytes([value])
+    for r in ranges:
+        if r.step < 0:
+            r = r[::-1]
+        mask[r.start:r.stop:r.step] = fill * len(r)
+    return mask
+
+
+def select_pages(spec: str, page_count: int) -> List[int]:
+    """Extract semantiği: seçilen sayfalar tekrarsız ve artan sırada (0 tabanlı)."""
+    includes, excludes = parse(spec, page_count)
+    mask = _mask(excludes, page_count, _mask(includes, page_count), value=0)
+    return [i for i, selected in enumerate(mask) if selected]
+
+
+def order_pages(spec: str, page_count: int) -> List[int]:
+    """Reorder semantiği: terimler yazıldığı sırayla, tekrar serbest (0 tabanlı). Belge dışı sayfa hatadır."""
+    includes, excludes = parse(spec, page_count, strict=True)
+    excluded = _mask(excludes, page_count) if excludes else None
+    order = []
+    for r in includes:
+        order.extend(i for i in r if not excluded or not excluded[i])
+    return order
@@ -0,0 +1,509 @@
+# app/pdf_tools.py
+"""
+pypdf araç işlemleri (metin çıkarma, sayfa ayıklama, birleştirme, sıralama).
+
+PDF ayrıştırma/yazma CPU'ya bağlıdır; event loop'u kilitlememesi için bu
+işlemler sınırlı bir `ProcessPoolExecutor` içinde çalıştırılır. Havuz ve kuyruk
+doluysa yeni iş kabul edilmez, 503 + Retry-After döner (backpressure).
+
+Havuzda çalışan fonksiyonlar modül seviyesinde ve sadece bytes/str alıp
+döndürür (pickle edilebilir olmalı). Kullanıcı hatalarında `ValueError` fırlatılır.
+
+Metin dönüştürme de havuzda, sayfa grupları halinde çalışır (`stream_text_chunks`);
+her grubun metni biter bitmez yanıta akıtılır.
+"""
+import asyncio
+import io
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from pypdf import PdfReader, PdfWriter
+from pypdf.errors import PdfReadError
+
+from .config import settings
+from .page_ranges import order_pages, select_pages
+
+logger = logging.getLogger(__name__)
+
+MERGE_PARSE_THREADS = 8
+
+
+# ==========================================
+# HAVUZDA ÇALIŞAN FONKSİYONLAR
+# ==========================================
+
+def _write(writer: PdfWriter) -> bytes:
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def extract_pages(pdf_content: bytes, page_range: str) -> bytes:
+    reader = PdfReader(io.BytesIO(pdf_content))
+    indices = select_pages(page_range, len(reader.pages))
+    if not indices:
+        raise ValueError("Geçersiz sayfa aralığı.")
+
+    writer = PdfWriter()
+    for i in indices:
+        writer.add_page(reader.pages[i])
+    return _write(writer)
+
+
+MERGE_CHUNK_SIZE = 1024 * 1024
+
+
+def spool_inputs(sources: Iterable[BinaryIO], workdir: str, start: int = 0) -> List[str]:
+    """
+    Yüklenen dosyaları (SpooledTemporaryFile) parça parça çalışma dizinine yazar.
+    Havuz süreci dosyaları yoldan açar; içerik süreçler arasında kopyalanmaz.
+    start: ilk dosyanın sıra numarası (girdiler birden fazla çağrıda yazılıyorsa)
+    """
+    paths = []
+    for i, source in enumerate(sources, start):
+        path = os.path.join(workdir, f"input_{i}.pdf")
+        source.seek(0)
+        with open(path, "wb") as dst:
+            shutil.copyfileobj(source, dst, MERGE_CHUNK_SIZE)
+        paths.append(path)
+    return paths
+
+
+def _open_for_merge(path: str) -> PdfReader:
+    # Yol yerine dosya nesnesi verilir: pypdf yolu alınca dosyanın tamamını belleğe okur.
+    f = open(path, "rb")
+    try:
+        reader = PdfReader(f)
+        len(reader.pages)  # sayfa ağacını da bu iş parçacığında çözümle
+    except BaseException:
+        f.close()
+        raise
+    return reader
+
+
+def merge_files(input_paths: List[str], output_path: str) -> int:
+    """
+    Girdileri eşzamanlı ayrıştırır, birleşik belgeyi doğrudan diske yazar.
+    Returns: toplam sayfa sayısı
+    """
+    workers = min(len(input_paths), MERGE_PARSE_THREADS)
+    readers = []
+    error = None
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_open_for_merge, path) for path in input_paths]
+    # Biri açılamazsa diğerlerinin dosyaları da kapatılmalı; bu yüzden hepsi beklenir
+    for future in futures:
+        try:
+            readers.append(future.result())
+        except Exception as e:
+            error = error or e
+
+    try:
+        if error is not None:
+            raise error
+        writer = PdfWriter()
+        for reader in readers:
+            for p in reader.pages:
+                writer.add_page(p)
+        with open(output_path, "wb") as out:
+            writer.write(out)
+        return len(writer.pages)
+    finally:
+        for reader in readers:
+            reader.stream.close()
+
+
+def reorder(pdf_content: bytes, page_numbers: str) -> bytes:
+    reader = PdfReader(io.BytesIO(pdf_content))
+    order = order_pages(page_numbers, len(reader.pages))
+    if not order:
+        raise ValueError("Hatalı sayfa numarası.")
+
+    writer = PdfWriter()
+    for i in order:
+        writer.add_page(reader.pages[i])
+    return _write(writer)
+
+
+PIPELINE_OPS = ("extract", "reorder", "rotate", "delete", "merge")
+
+
+def parse_pipeline(operations_json: str, input_count: int) -> List[dict]:
+    """
+    Pipeline işlem listesini doğrular. Sayfa aralıkları belge o adıma geldiğinde
+    çözümlendiği için burada yalnızca yapı kontrol edilir.
+    """
+    try:
+        ops = json.loads(operations_json)
+    except json.JSONDecodeError:
+        raise ValueError("operations geçerli bir JSON listesi olmalı.")
+    if not isinstance(ops, list) or not ops:
+        raise ValueError("operations boş olmayan bir liste olmalı.")
+
+    for n, op in enumerate(ops, start=1):
+        if not isinstance(op, dict) or op.get("op") not in PIPELINE_OPS:
+            raise ValueError(f"{n}. işlem geçersiz; desteklenenler: {', '.join(PIPELINE_OPS)}")
+        kind = op["op"]
+        if kind in ("extract", "delete") and not op.get("pages"):
+            raise ValueError(f"{n}. işlem ({kind}) için 'pages' gerekli.")
+        if kind == "reorder" and not op.get("order"):
+            raise ValueError(f"{n}. işlem (reorder) için 'order' gerekli.")
+        if kind == "rotate" and (not isinstance(op.get("angle"), int) or op["angle"] % 90 != 0):
+            raise ValueError(f"{n}. işlem (rotate) için 'angle' 90'ın katı olmalı.")
+        if kind == "merge":
+            index = op.get("input")
+            if not isinstance(index, int) or not 1 <= index < input_count:
+                raise ValueError(f"{n}. işlem (merge) için 'input' 1..{input_count - 1} arasında olmalı.")
+    return ops
+
+
+def _select(range_str: str, count: int) -> List[int]:
+    indices = select_pages(str(range_str), count)
+    if not indices:
+        raise ValueError(f"Geçersiz sayfa aralığı: {range_str}")
+    return indices
+
+
+def run_pipeline(input_paths: List[str], output_path: str, ops: List[dict]) -> int:
+    """
+    İşlemleri sayfa grafı üzerinde uygular: her öğe (girdi no, sayfa no, döndürme açısı).
+    Ara adımlarda PDF yazılmaz; sonuç en sonda bir kez diske serileştirilir.
+    Returns: çıktı sayfa sayısı
+    """
+    readers: Dict[int, PdfReader] = {}
+
+    def reader_for(index: int) -> PdfReader:
+        if index not in readers:
+            readers[index] = _open_for_merge(input_paths[index])
+        return readers[index]
+
+    graph = [(0, i, 0) for i in range(len(reader_for(0).pages))]
+    try:
+        for op in ops:
+            kind = op["op"]
+            if kind == "extract":
+                graph = [graph[i] for i in _select(op["pages"], len(graph))]
+            elif kind == "delete":
+                removed = set(_select(op["pages"], len(graph)))
+                graph = [node for i, node in enumerate(graph) if i not in removed]
+            elif kind == "reorder":
+                graph = [graph[i] for i in order_pages(str(op["order"]), len(graph))]
+            elif kind == "rotate":
+                targets = set(_select(op["pages"], len(graph))) if op.get("pages") else set(range(len(graph)))
+                graph = [
+                    (src, page, (angle + op["angle"]) % 360) if i in targets else (src, page, angle)
+                    for i, (src, page, angle) in enumerate(graph)
+                ]
+            elif kind == "merge":
+                count = len(reader_for(op["input"]).pages)
+                pages = _select(op["pages"], count) if op.get("pages") else range(count)
+                graph += [(op["input"], i, 0) for i in pages]
+
+            if not graph:
+                raise ValueError(f"'{kind}' işleminden sonra belgede sayfa kalmadı.")
+
+        writer = PdfWriter()
+        for src, page_no, angle in graph:
+            page = writer.add_page(reader_for(src).pages[page_no])
+            if angle:
+                page.rotate(angle)
+        with open(output_path, "wb") as out:
+            writer.write(out)
+        return len(graph)
+    finally:
+        for reader in readers.values():
+            reader.stream.close()
+
+
+def _page_chunks(page_no: int, text: str, chunk_chars: int) -> Iterator[List[int]]:
+    """Sayfa metnini en fazla chunk_chars uzunlukta, mümkünse boşlukta bölünen aralıklara ayırır."""
+    start, n = 0, len(text)
+    while start < n:
+        end = min(start + chunk_chars, n)
+        if end < n:
+            cut = max(text.rfind(" ", start + chunk_chars // 2, end), text.rfind("\n", start + chunk_chars // 2, end))
+            if cut > start:
+                end = cut + 1
+        if text[start:end].strip():
+            yield [page_no, start, end]
+        start = end
+
+
+def compute_artifacts(input_path: str, chunk_chars: int) -> dict:
+    """
+    Arka plan ön hesaplaması (bkz. app/artifacts.py): sayfa sayısı, sayfa metinleri,
+    metin katmanı var mı ve sayfa sınırını aşmayan parça indeksi ([sayfa, başlangıç, bitiş]).
+    """
+    try:
+        with open(input_path, "rb") as f:
+            reader = PdfReader(f)
+            pages = [page.extract_text() or "" for page in reader.pages]
+    except PdfReadError as e:
+        raise ValueError(f"PDF okunamadı: {e}")
+    chunks = [
+        chunk
+        for page_no, text in enumerate(pages, start=1)
+        for chunk in _page_chunks(page_no, text, chunk_chars)
+    ]
+    return {
+        "page_count": len(pages),
+        "has_text_layer": any(text.strip() for text in pages),
+        "pages": pages,
+        "chunks": chunks,
+    }
+
+
+def _timed_call(fn: Callable, *args):
+    """Alt süreçte çalışır; bekleme/çalışma süresi ölçümü için duvar saati damgalarını da döner."""
+    started = time.time()
+    result = fn(*args)
+    return result, started, time.time()
+
+
+# ==========================================
+# METİN DÖNÜŞTÜRME (SAYFA SAYFA AKIŞ)
+# ==========================================
+
+TEXT_OUTPUT_FORMATS = ("text", "ndjson")
+
+
+def extract_text_batch(input_path: str, start: int, count: int) -> Tuple[int, List[str]]:
+    """
+    Havuzda çalışır: [start, start + count) aralığındaki sayfaların metni.
+    Returns: (toplam sayfa sayısı, sayfa metinleri)
+    """
+    try:
+        with open(input_path, "rb") as f:
+            pages = PdfReader(f).pages
+            return len(pages), [pages[i].extract_text() or "" for i in range(start, min(start + count, len(pages)))]
+    except PdfReadError as e:
+        raise ValueError(f"PDF okunamadı: {e}")
+
+
+def _format_page(page_no: int, text: str, output_format: str, page_markers: bool, first: bool) -> Optional[bytes]:
+    """
+    Tek sayfanın çıktı parçası (atlanan boş sayfa için None).
+
+    - text: boş sayfalar atlanır, sayfalar satır sonuyla ayrılır;
+      `page_markers` açıksa her sayfanın önüne "--- Sayfa N ---" satırı eklenir
+    - ndjson: her sayfa için bir satır {"page": N, "text": "..."}
+    """
+    if output_format == "ndjson":
+        return (json.dumps({"page": page_no, "text": text}, ensure_ascii=False) + "\n").encode("utf-8")
+    if page_markers:
+        chunk = f"--- Sayfa {page_no} ---\n{text}\n"
+    elif text:
+        chunk = text if first else "\n" + text
+    else:
+        return None
+    return chunk.encode("utf-8")
+
+
+def iter_page_texts(pages: Iterable[str], output_format: str = "text", page_markers: bool = False) -> Iterator[bytes]:
+    """Ön hesaplanmış sayfa metinlerini çıktı formatına çevirir (bkz. _format_page)."""
+    first = True
+    for page_no, text in enumerate(pages, start=1):
+        chunk = _format_page(page_no, text, output_format, page_markers, first)
+        if chunk is not None:
+            first = False
+            yield chunk
+
+
+async def stream_text_chunks(
+    pool: "PdfToolPool", input_path: str, output_format: str = "text", page_markers: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    PDF metnini havuzda PDF_TEXT_BATCH_PAGES sayfalık gruplarla çıkarır; her grup bittikçe
+    akıtılır, bellekte aynı anda tek grubun metni tutulur. İlk grup burada beklenir, böylece
+    bozuk PDF (400) ve dolu havuz (503) yanıt başlamadan döner. Sonraki gruplar kabul edilmiş
+    akışın devamıdır: havuzda sayılırlar ama kapasite kontrolüne takılmazlar.
+    """
+    batch = settings.PDF_TEXT_BATCH_PAGES
+    total, texts = await pool.run("convert-text", extract_text_batch, input_path, 0, batch)
+
+    async def chunks() -> AsyncIterator[bytes]:
+        page_texts, start, first = texts, 0, True
+        while True:
+            for page_no, text in enumerate(page_texts, start=start + 1):
+                chunk = _format_page(page_no, text, output_format, page_markers, first)
+                if chunk is not None:
+                    first = False
+                    yield chunk
+            start += batch
+            if start >= total:
+                return
+            _, page_texts = await pool.run(
+                "convert-text", extract_text_batch, input_path, start, batch, admitted=True
+            )
+
+    return chunks()
+
+
+# ==========================================
+# HAVUZ
+# ==========================================
+
+class _ToolStats:
+    def __init__(self):
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.exec_total = 0.0
+        self.exec_max = 0.0
+
+    def record(self, wait: float, exec_: float):
+        self.completed += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.exec_total += exec_
+        self.exec_max = max(self.exec_max, exec_)
+
+    def as_dict(self) -> dict:
+        n = self.completed or 1
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_avg_ms": round(self.wait_total / n * 1000, 2),
+            "wait_max_ms": round(self.wait_max * 1000, 2),
+            "exec_avg_ms": round(self.exec_total / n * 1000, 2),
+            "exec_max_ms": round(self.exec_max * 1000, 2),
+        }
+
+
+# Çok iş parçacıklı uvicorn sürecinden fork etmek (threadpool, Redis dinleyicileri)
+# devralınan kilitlerde çocukları kilitleyebilir; çocuklar temiz bir süreçten başlatılır.
+_MP_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _overloaded() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Sunucu şu anda yoğun, lütfen biraz sonra tekrar deneyin.",
+        headers={"Retry-After": str(settings.PDF_TOOL_RETRY_AFTER_SECONDS)},
+    )
+
+
+class WorkerCrashed(HTTPException):
+    """Havuzdaki çocuk süreç öldü (ör. OOM); havuz yenilendi, istek 503 alır."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=503,
+            detail="İşlem sırasında sunucu hatası oluştu, lütfen tekrar deneyin.",
+            headers={"Retry-After": str(settings.PDF_TOOL_RETRY_AFTER_SECONDS)},
+        )
+
+
+class PdfToolPool:
+    """
+    Sınırlı süreç havuzu: en fazla `workers` iş çalışır, `queue_depth` iş bekler, fazlası 503 alır.
+    Bir çocuk süreç ölürse (ör. OOM) havuz kırılır; yenisiyle değiştirilir ve o anki işler 503 alır.
+    """
+
+    def __init__(self, workers: int = None, queue_depth: int = None):
+        self.workers = workers or settings.PDF_TOOL_WORKERS
+        self.queue_depth = settings.PDF_TOOL_QUEUE_DEPTH if queue_depth is None else queue_depth
+        self.capacity = self.workers + self.queue_depth
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+        self.in_flight = 0
+        self.restarts = 0
+        self._stats: Dict[str, _ToolStats] = {}
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context(_MP_START_METHOD)
+        )
+
+    def _replace_broken(self, broken: ProcessPoolExecutor) -> None:
+        """Aynı kırık havuzu gören eşzamanlı istekler yalnızca bir kez değiştirir."""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._new_executor()
+            self.restarts += 1
+        logger.error("PDF tool pool broken (worker process died), replaced with a new pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, _future: Future = None) -> None:
+        # İş bittiğinde (havuz iş parçacığında) çağrılır; istek iptal edilse de çocuk çalıştığı sürece sayılır
+        with self._lock:
+            self.in_flight -= 1
+
+    def _stats_for(self, tool: str) -> _ToolStats:
+        return self._stats.setdefault(tool, _ToolStats())
+
+    async def run(self, tool: str, fn: Callable, *args, admitted: bool = False):
+        """
+        `fn(*args)`'i havuzda çalıştırır. Kapasite doluysa 503 + Retry-After fırlatır.
+        admitted: daha önce kabul edilmiş bir işin devamı (ör. metin akışının sonraki sayfaları);
+        yarıda 503 almaması için kapasite kontrolü atlanır, yine de in_flight'a sayılır.
+        """
+        stats = self._stats_for(tool)
+        with self._lock:
+            if self.in_flight >= self.capacity and not admitted:
+                saturated = True
+            else:
+                saturated = False
+                self.in_flight += 1
+        if saturated:
+            stats.rejected += 1
+            logger.warning(f"PDF tool pool saturated ({self.in_flight}/{self.capacity}), rejecting '{tool}'")
+            raise _overloaded()
+
+        executor = self._executor
+        submitted = time.time()
+        try:
+            future = executor.submit(_timed_call, fn, *args)
+        except BrokenProcessPool:
+            self._release()
+            stats.failed += 1
+            self._replace_broken(executor)
+            raise WorkerCrashed()
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            result, started, finished = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            stats.failed += 1
+            self._replace_broken(executor)
+            raise WorkerCrashed()
+        except Exception:
+            stats.failed += 1
+            raise
+
+        stats.record(max(0.0, started - submitted), finished - started)
+        return result
+
+    def pool_stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "restarts": self.restarts,
+            "tools": {name: s.as_dict() for name, s in self._stats.items()},
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_pdf_tool_pool(request: Request) -> PdfToolPool:
+    """PDF araç havuzu dependency (lifespan'de oluşturulur)"""
+    return request.app.state.pdf_tool_pool
@@ -0,0 +1,113 @@
+# app/preflight.py
+"""
+Özetleme öncesi ucuz PDF ön kontrolü ve senkron/asenkron yönlendirme.
+
+Tüm metni çıkarmak yerine sadece xref, sayfa ağacı ve birkaç örnek sayfa okunur:
+- sayfa sayısı (/Pages /Count; içerik akışları açılmaz)
+- şifreleme (boş parolayla açılabiliyor mu)
+- metin katmanı: eşit aralıklı örnek sayfalardan metin çıkarılır
+- metin boyutu tahmini: örnek sayfaların ortalaması x sayfa sayısı
+
+Yönlendirme:
+- metin katmanı yok / açılamayan şifre -> hemen 400 (AI Service'e hiç gidilmez)
+- küçük belge -> summarize-sync (120 sn sınırı içinde biter)
+- büyük belge -> Celery görevi (summarize-async), istemci iş durumunu sorgular
+
+Ön hesaplanmış çıktılar (bkz. artifacts) varsa PDF hiç açılmaz; kesin değerler kullanılır.
+"""
+from typing import BinaryIO
+
+from fastapi import HTTPException
+from pypdf import PasswordType, PdfReader
+from pypdf.errors import PdfReadError
+
+from .config import settings
+
+ROUTE_SYNC = "sync"
+ROUTE_ASYNC = "async"
+
+# Bu kadar karakterden az metin çıkan sayfa "metinsiz" sayılır (sayfa numarası, filigran vb.)
+MIN_PAGE_CHARS = 20
+
+
+def _sample_indices(page_count: int, samples: int) -> list[int]:
+    """İlk ve son sayfa dahil eşit aralıklı örnek sayfa indeksleri."""
+    if page_count <= samples:
+        return list(range(page_count))
+    step = (page_count - 1) / (samples - 1)
+    return sorted({round(i * step) for i in range(samples)})
+
+
+def inspect(source: BinaryIO, samples: int = None) -> dict:
+    """
+    PDF'i örnekleyerek ön kontrol raporu üretir (threadpool'da çağrılır).
+    Raises: ValueError -> PDF okunamıyor
+    """
+    samples = samples or settings.PREFLIGHT_SAMPLE_PAGES
+    source.seek(0)
+    try:
+        reader = PdfReader(source)
+        encrypted = reader.is_encrypted
+        if encrypted:
+            try:
+                opened = reader.decrypt("") != PasswordType.NOT_DECRYPTED
+            except Exception:
+                # Desteklenmeyen şifreleme (örn. AES için eksik kripto kütüphanesi)
+                opened = False
+            if not opened:
+                return {
+                    "page_count": None,
+                    "encrypted": True,
+                    "sampled_pages": 0,
+                    "text_pages": 0,
+                    "has_text_layer": False,
+                    "estimated_text_chars": 0,
+                }
+        page_count = len(reader.pages)
+        indices = _sample_indices(page_count, samples)
+        chars = [len((reader.pages[i].extract_text() or "").strip()) for i in indices]
+    except PdfReadError as e:
+        raise ValueError(f"Geçersiz veya bozuk PDF dosyası: {e}")
+    finally:
+        source.seek(0)
+
+    return {
+        "page_count": page_count,
+        "encrypted": encrypted,
+        "sampled_pages": len(chars),
+        "text_pages": sum(1 for c in chars if c >= MIN_PAGE_CHARS),
+        "has_text_layer": any(c >= MIN_PAGE_CHARS for c in chars),
+        "estimated_text_chars": round(sum(chars) / len(chars) * page_count) if chars else 0,
+    }
+
+
+def from_artifact(artifact) -> dict:
+    """Ön hesaplanmış çıktılardan rapor (örnekleme yerine kesin değerler)."""
+    text_pages = sum(1 for text in artifact.pages if len(text.strip()) >= MIN_PAGE_CHARS)
+    return {
+        "page_count": artifact.page_count,
+        "encrypted": False,
+        "sampled_pages": artifact.page_count,
+        "text_pages": text_pages,
+        "has_text_layer": text_pages > 0,
+        "estimated_text_chars": sum(len(text) for text in artifact.pages),
+    }
+
+
+def choose_route(report: dict, async_available: bool) -> str:
+    """
+    Raises: HTTPException(400) -> özetlenemeyecek belge (hızlı ret)
+    async_available=False ise (paylaşılan volume / Redis yok) büyük belgeler de senkron gider.
+    """
+    if report["encrypted"] and report["page_count"] is None:
+        raise HTTPException(status_code=400, detail="Parola korumalı PDF'ler özetlenemez.")
+    if not report["has_text_layer"]:
+        raise HTTPException(
+            status_code=400,
+            detail="PDF'ten metin çıkarılamadı. Dosya taranmış bir resim olabilir."
+        )
+    large = (
+        report["page_count"] > settings.PREFLIGHT_SYNC_MAX_PAGES
+        or report["estimated_text_chars"] > settings.PREFLIGHT_SYNC_MAX_CHARS
+    )
+    return ROUTE_ASYNC if large and async_available else ROUTE_SYNC
@@ -0,0 +1,11 @@
+# app/repositories/__init__.py
+"""
+Async veri erişim katmanı (SQLAlchemy asyncio + asyncpg).
+
+async def endpoint'ler DB'ye bu modüller üzerinden erişir; oturum
+`get_async_db` dependency'si ile gelir. Yazma yapan fonksiyonlar kendi
+işlemlerini commit eder; okuma fonksiyonları sadece gereken sütunları çeker.
+"""
+from . import avatars, pdfs, search, user_stats, users
+
+__all__ = ["avatars", "pdfs", "search", "user_stats", "users"]
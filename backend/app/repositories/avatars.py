@@ -0,0 +1,15 @@
+# app/repositories/avatars.py
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import UserAvatar
+
+
+async def list_recent(db: AsyncSession, user_id: str, limit: int = 10) -> list[UserAvatar]:
+    result = await db.scalars(
+        select(UserAvatar)
+        .where(UserAvatar.user_id == user_id)
+        .order_by(UserAvatar.created_at.desc())
+        .limit(limit)
+    )
+    return list(result.all())
@@ -0,0 +1,168 @@
+# app/repositories/pdfs.py
+import base64
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import artifacts, blob_store
+from ..ingest import IngestedUpload
+from ..models import PDF, PdfBlob
+from ..storage import artifact_enqueue_statement, blob_insert_statement, blob_lock_query, new_pdf_record
+
+
+async def create(db: AsyncSession, user_id: str, upload: IngestedUpload, filename: Optional[str] = None) -> PDF:
+    """
+    İçerik adresli kayıt (bkz. storage.save_pdf_to_db). Hash yükleme sırasında hesaplandı;
+    içerik zaten varsa dosya hiç okunmaz, dosya sistemi arka ucunda geçici dosya bağlanır (hard link).
+    """
+    if await db.scalar(blob_lock_query(upload.sha256)) is None:
+        backend = blob_store.current_backend()
+        data = await run_in_threadpool(upload.read_bytes) if backend == blob_store.BACKEND_DB else None
+        await db.execute(blob_insert_statement(upload.sha256, upload.size, backend, data))
+        await db.execute(artifact_enqueue_statement(upload.sha256))
+        await run_in_threadpool(blob_store.store_file, backend, upload.sha256, upload.path)
+
+    pdf = new_pdf_record(user_id, upload.sha256, upload.size, filename)
+    db.add(pdf)
+    await db.commit()
+    artifacts.notify()
+    return pdf
+
+
+async def create_from_bytes(db: AsyncSession, user_id: str, content: bytes, filename: Optional[str] = None) -> PDF:
+    """Bellekteki içerik için `create` (araç çıktıları; bkz. storage.save_pdf_to_db)."""
+    sha256 = await run_in_threadpool(lambda: hashlib.sha256(content).hexdigest())
+    if await db.scalar(blob_lock_query(sha256)) is None:
+        backend = blob_store.current_backend()
+        await db.execute(blob_insert_statement(sha256, len(content), backend, content))
+        await db.execute(artifact_enqueue_statement(sha256))
+        await run_in_threadpool(blob_store.store_content, backend, sha256, content)
+
+    pdf = new_pdf_record(user_id, sha256, len(content), filename)
+    db.add(pdf)
+    await db.commit()
+    artifacts.notify()
+    return pdf
+
+
+async def load_content(db: AsyncSession, pdf_id: str, user_id: str) -> Optional[tuple[bytes, Optional[str]]]:
+    """
+    Kullanıcının kayıtlı PDF'inin içeriği (araçlar ve AI Service için).
+    Returns: (içerik, dosya adı) veya None (PDF yok / kullanıcıya ait değil)
+    """
+    result = await db.execute(
+        select(PDF.filename, PdfBlob.sha256, PdfBlob.backend, PdfBlob.data)
+        .join(PdfBlob, PdfBlob.sha256 == PDF.blob_sha256)
+        .where(PDF.id == pdf_id, PDF.user_id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    content = await run_in_threadpool(blob_store.read_content, row.backend, row.sha256, row.data)
+    return content, row.filename
+
+
+async def exists(db: AsyncSession, pdf_id: str, user_id: str) -> bool:
+    """Sahiplik kontrolü (pdf_data okunmaz)."""
+    found = await db.scalar(select(PDF.id).where(PDF.id == pdf_id, PDF.user_id == user_id))
+    return found is not None
+
+
+async def delete_owned(db: AsyncSession, pdf_id: str, user_id: str) -> bool:
+    """Returns: False -> PDF yok veya kullanıcıya ait değil"""
+    result = await db.execute(delete(PDF).where(PDF.id == pdf_id, PDF.user_id == user_id))
+    await db.commit()
+    return result.rowcount > 0
+
+
+def encode_cursor(created_at: datetime, pdf_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{pdf_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Raises: ValueError -> bozuk cursor"""
+    try:
+        created_at, pdf_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), pdf_id
+    except Exception as e:
+        raise ValueError("Geçersiz cursor") from e
+
+
+async def list_for_user(
+    db: AsyncSession, user_id: str, limit: int, after: Optional[tuple[datetime, str]] = None
+) -> tuple[list, Optional[str]]:
+    """
+    Liste için sadece metadata sütunları (pdf_data çekilmez), en yeni önce.
+    (created_at, id) üzerinde keyset sayfalama; maliyet kütüphane boyutundan bağımsız.
+    Returns: (satırlar, sonraki sayfanın cursor'ı veya None)
+    """
+    query = (
+        select(PDF.id, PDF.filename, PDF.file_size, PDF.created_at)
+        .where(PDF.user_id == user_id)
+        .order_by(PDF.created_at.desc(), PDF.id.desc())
+        .limit(limit + 1)
+    )
+    if after is not None:
+        query = query.where(tuple_(PDF.created_at, PDF.id) < after)
+    rows = list((await db.execute(query)).all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+async def count_for_user(db: AsyncSession, user_id: str) -> int:
+    """Kullanıcının toplam PDF sayısı (ix_pdfs_user_id_created_at_id üzerinden, satırlar okunmaz)."""
+    return await db.scalar(select(func.count()).select_from(PDF).where(PDF.user_id == user_id))
+
+
+async def find_by_sha256(db: AsyncSession, user_id: str, sha256: str):
+    """
+    Kullanıcının aynı içerikli en son PDF'i (yükleme öncesi hash kontrolü).
+    Sadece kullanıcının kendi kayıtlarına bakılır; başka kullanıcıların içeriği sızdırılmaz.
+    Returns: (id, filename, file_size) satırı veya None
+    """
+    result = await db.execute(
+        select(PDF.id, PDF.filename, PDF.file_size)
+        .where(PDF.user_id == user_id, PDF.blob_sha256 == sha256)
+        .order_by(PDF.created_at.desc())
+        .limit(1)
+    )
+    return result.first()
+
+
+async def get_download_info(db: AsyncSession, pdf_id: str, user_id: str):
+    """İndirme için metadata (içerik okunmaz). Returns: (filename, sha256, size, backend) satırı veya None"""
+    result = await db.execute(
+        select(PDF.filename, PdfBlob.sha256, PdfBlob.size, PdfBlob.backend)
+        .join(PdfBlob, PdfBlob.sha256 == PDF.blob_sha256)
+        .where(PDF.id == pdf_id, PDF.user_id == user_id)
+    )
+    return result.first()
+
+
+async def iter_db_blob(sha256: str, start: int, end: int, chunk_size: int = 1024 * 1024):
+    """
+    DB'deki blob'un [start, end] aralığını parça parça okur (substring); içerik
+    belleğe bütün olarak alınmaz. Yanıt akışı istek oturumundan uzun yaşadığı için
+    kendi oturumunu açar.
+    """
+    from ..db import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        offset = start
+        while offset <= end:
+            length = min(chunk_size, end - offset + 1)
+            chunk = await db.scalar(
+                select(func.substring(PdfBlob.data, offset + 1, length)).where(PdfBlob.sha256 == sha256)
+            )
+            if not chunk:
+                return
+            yield chunk
+            offset += len(chunk)
@@ -0,0 +1,65 @@
+# app/repositories/search.py
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models import PDF, SEARCH_TS_CONFIG, PdfSearchPage
+
+# ts_headline sadece döndürülen sayfalar için çalışır (en pahalı adım).
+# Vurgu HTML değil markdown: metin PDF'ten geldiği için istemci HTML olarak basmamalı
+HEADLINE_OPTIONS = "MaxFragments=2, MinWords=5, MaxWords=20, StartSel=**, StopSel=**"
+
+
+async def search_pages(db: AsyncSession, user_id: str, query: str, limit: int) -> list:
+    """
+    Kullanıcının kütüphanesinde tam metin arama (websearch sözdizimi: "tam ifade", -hariç, or).
+    Üç adım, her biri bir öncekinin sınırlı çıktısı üzerinde:
+    1. (user_id, tsv) GIN indeksiyle eşleşen en fazla SEARCH_MAX_CANDIDATES sayfa
+    2. ts_rank_cd yalnızca bu adaylar için hesaplanır, en iyi `limit` tanesi seçilir
+    3. snippet (ts_headline) yalnızca seçilen sayfalar için üretilir
+    Çok genel sorgularda sıralama ilk adaylar arasındadır; maliyet kütüphane boyutundan bağımsız kalır.
+    Returns: (pdf_id, filename, page, rank, snippet) satırları, en alakalı önce
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_TS_CONFIG, query)
+    candidates = (
+        select(PdfSearchPage.pdf_id, PdfSearchPage.page, PdfSearchPage.tsv)
+        .where(PdfSearchPage.user_id == user_id, PdfSearchPage.tsv.bool_op("@@")(tsquery))
+        .limit(settings.SEARCH_MAX_CANDIDATES)
+        .subquery()
+    )
+    rank = func.ts_rank_cd(candidates.c.tsv, tsquery).label("rank")
+    hits = (
+        select(candidates.c.pdf_id, candidates.c.page, rank)
+        .order_by(rank.desc())
+        .limit(limit)
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            hits.c.pdf_id,
+            PDF.filename,
+            hits.c.page,
+            hits.c.rank,
+            func.ts_headline(SEARCH_TS_CONFIG, PdfSearchPage.content, tsquery, HEADLINE_OPTIONS).label("snippet"),
+        )
+        .join(PdfSearchPage, (PdfSearchPage.pdf_id == hits.c.pdf_id) & (PdfSearchPage.page == hits.c.page))
+        .join(PDF, PDF.id == hits.c.pdf_id)
+        .order_by(hits.c.rank.desc(), hits.c.pdf_id, hits.c.page)
+    )
+    return list(result.all())
+
+
+def group_by_document(rows: list) -> list[dict]:
+    """Sayfa eşleşmelerini belgeye göre toplar; belge sırası en iyi sayfasının sırasıdır."""
+    documents: dict[str, dict] = {}
+    for row in rows:
+        doc = documents.get(row.pdf_id)
+        if doc is None:
+            doc = documents[row.pdf_id] = {
+                "file_id": row.pdf_id,
+                "filename": row.filename,
+                "score": round(float(row.rank), 6),
+                "pages": [],
+            }
+        doc["pages"].append({"page": row.page, "score": round(float(row.rank), 6), "snippet": row.snippet})
+    return list(documents.values())
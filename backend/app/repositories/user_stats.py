@@ -0,0 +1,13 @@
+# app/repositories/user_stats.py
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import UserStats
+
+
+async def get_counts(db: AsyncSession, user_id: str) -> tuple[int, int]:
+    """Returns: (summary_count, tools_count); satır yoksa (0, 0)"""
+    row = (await db.execute(
+        select(UserStats.summary_count, UserStats.tools_count).where(UserStats.user_id == user_id)
+    )).first()
+    return (row.summary_count, row.tools_count) if row else (0, 0)
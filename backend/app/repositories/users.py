@@ -0,0 +1,28 @@
+# app/repositories/users.py
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import User
+
+
+async def set_llm_choice(db: AsyncSession, user_id: str, choice_id: int) -> bool:
+    """Returns: False -> kullanıcı bulunamadı"""
+    result = await db.execute(
+        update(User).where(User.id == user_id).values(llm_choice_id=choice_id)
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def get_active_avatar_url(db: AsyncSession, user_id: str) -> tuple[bool, Optional[str]]:
+    """Returns: (kullanıcı var mı, aktif avatar yolu)"""
+    row = (await db.execute(
+        select(User.active_avatar_url).where(User.id == user_id)
+    )).first()
+    return (row is not None, row[0] if row else None)
+
+
+async def exists(db: AsyncSession, user_id: str) -> bool:
+    return (await db.scalar(select(User.id).where(User.id == user_id))) is not None
@@ -0,0 +1,254 @@
+# app/resumable_uploads.py
+"""
+Kaldığı yerden devam edebilen (resumable) PDF yüklemeleri.
+
+Akış:
+1. POST   /files/uploads                 -> oturum açılır (dosya adı + toplam boyut)
+2. PUT    /files/uploads/{id}            -> `Upload-Offset` başlığıyla parça gönderilir
+3. GET    /files/uploads/{id}            -> bağlantı koparsa sunucudaki offset sorulur
+4. POST   /files/uploads/{id}/complete   -> hash + PDF imzası kontrolü, blob deposuna kayıt
+
+Parçalar uploads/resumable/{id}.part dosyasına sırayla eklenir; bağlantı parça
+ortasında koparsa o ana kadar yazılan baytlar korunur ve offset ona göre ilerler.
+Oturum durumu Redis hash'inde tutulur ve her parçada yenilenen TTL ile düşer;
+TTL'i dolan oturumların diskte kalan dosyalarını `sweep_loop` temizler.
+
+Tamamlama parça yazımıyla aynı kilidi tutar; sonuç oturuma yazılır, böylece tekrarlanan
+(veya eşzamanlı) complete istekleri ikinci bir kayıt oluşturmaz, aynı sonucu alır.
+Parça dosyası yalnızca kayıt başarılı olduktan sonra silinir.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from .config import settings
+from .ingest import MAGIC_SEARCH_BYTES, PDF_MAGIC, IngestedUpload, too_large, upload_limit_mb
+from .redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+SESSION_DIR = Path(__file__).parent.parent / "uploads" / "resumable"
+KEY_PREFIX = "upload_session:"
+HASH_CHUNK_BYTES = 1024 * 1024
+STATUS_COMPLETED = "completed"
+
+
+def _key(upload_id: str) -> str:
+    return f"{KEY_PREFIX}{upload_id}"
+
+
+def _lock_key(upload_id: str) -> str:
+    return f"{KEY_PREFIX}{upload_id}:lock"
+
+
+def part_path(upload_id: str) -> Path:
+    return SESSION_DIR / f"{upload_id}.part"
+
+
+def _redis():
+    if redis_client is None:
+        raise HTTPException(status_code=503, detail="Devam ettirilebilir yükleme için Redis gerekli")
+    return redis_client
+
+
+def create_session(user_id: str, filename: str, size: int) -> dict:
+    """Boyut sınırı oturum açılırken kontrol edilir; tek bayt gönderilmeden 413 döner."""
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="Geçersiz dosya boyutu")
+    if size > upload_limit_mb(is_guest=False) * 1024 * 1024:
+        raise too_large(is_guest=False)
+
+    client = _redis()
+    upload_id = uuid.uuid4().hex
+    SESSION_DIR.mkdir(parents=True, exist_ok=True)
+    part_path(upload_id).touch()
+
+    key = _key(upload_id)
+    pipe = client.pipeline()
+    pipe.hset(key, mapping={"user_id": user_id, "filename": filename, "size": size, "offset": 0})
+    pipe.expire(key, settings.RESUMABLE_UPLOAD_TTL_SECONDS)
+    pipe.execute()
+    return describe(upload_id, {"size": size, "offset": 0})
+
+
+def get_session(upload_id: str, user_id: str) -> dict:
+    """Oturum yoksa/süresi dolduysa veya başka kullanıcıya aitse 404."""
+    state = _redis().hgetall(_key(upload_id))
+    if not state or state.get("user_id") != user_id:
+        raise HTTPException(status_code=404, detail="Yükleme oturumu bulunamadı veya süresi doldu")
+    state["size"] = int(state["size"])
+    state["offset"] = int(state["offset"])
+    return state
+
+
+def describe(upload_id: str, state: dict) -> dict:
+    return {
+        "upload_id": upload_id,
+        "offset": state["offset"],
+        "size": state["size"],
+        "chunk_size": settings.RESUMABLE_UPLOAD_CHUNK_MB * 1024 * 1024,
+        "expires_in": settings.RESUMABLE_UPLOAD_TTL_SECONDS,
+    }
+
+
+def _append(path: Path, offset: int, chunk: bytes) -> None:
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(chunk)
+
+
+async def append_chunk(upload_id: str, user_id: str, offset: int, stream: AsyncIterator[bytes]) -> dict:
+    """
+    Parçayı sunucudaki offset'ten itibaren yazar.
+    Offset uyuşmazlığı -> 409 (istemci GET ile güncel offset'i alıp devam eder).
+    Aynı oturuma eşzamanlı PUT -> 409. Parça sınırı / toplam boyut aşımı -> 413.
+    Akış yarıda kesilse bile yazılan baytlar kaydedilir.
+    """
+    client = _redis()
+    if not client.set(_lock_key(upload_id), "1", nx=True, ex=settings.RESUMABLE_UPLOAD_LOCK_SECONDS):
+        raise HTTPException(status_code=409, detail="Bu yükleme için başka bir parça gönderiliyor")
+    # Durum kilit alındıktan sonra okunur: önce okunsaydı, kilidi az önce bırakan
+    # PUT'un yazdıklarının üzerine eski offset'ten yazılabilirdi
+    try:
+        state = get_session(upload_id, user_id)
+        if state.get("status") == STATUS_COMPLETED:
+            raise HTTPException(status_code=409, detail="Yükleme zaten tamamlandı")
+        if offset != state["offset"]:
+            raise HTTPException(
+                status_code=409,
+                detail="Offset uyuşmuyor",
+                headers={"Upload-Offset": str(state["offset"])},
+            )
+    except BaseException:
+        client.delete(_lock_key(upload_id))
+        raise
+
+    path = part_path(upload_id)
+    max_chunk = settings.RESUMABLE_UPLOAD_CHUNK_MB * 1024 * 1024
+    written = 0
+    try:
+        async for chunk in stream:
+            if not chunk:
+                continue
+            if written + len(chunk) > max_chunk:
+                raise HTTPException(status_code=413, detail="Parça boyutu sınırı aşıldı")
+            if offset + written + len(chunk) > state["size"]:
+                raise HTTPException(status_code=413, detail="Bildirilen dosya boyutu aşıldı")
+            await run_in_threadpool(_append, path, offset + written, chunk)
+            written += len(chunk)
+    finally:
+        # Kopan bağlantıda da alınan kısım korunur; sonraki PUT buradan devam eder
+        state["offset"] = offset + written
+        pipe = client.pipeline()
+        pipe.hset(_key(upload_id), "offset", state["offset"])
+        pipe.expire(_key(upload_id), settings.RESUMABLE_UPLOAD_TTL_SECONDS)
+        pipe.delete(_lock_key(upload_id))
+        pipe.execute()
+    return describe(upload_id, state)
+
+
+def _hash_file(path: Path) -> tuple[str, bytes]:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        head = f.read(MAGIC_SEARCH_BYTES)
+        hasher.update(head)
+        for block in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            hasher.update(block)
+    return hasher.hexdigest(), head
+
+
+async def finalize(upload_id: str, user_id: str) -> IngestedUpload:
+    """
+    Eksik parça varsa 409. Hash tek geçişte hesaplanır, PDF imzası kontrol edilir.
+    Oturum kilidi altında çağrılmalı (bkz. complete).
+    """
+    state = get_session(upload_id, user_id)
+    if state["offset"] != state["size"]:
+        raise HTTPException(
+            status_code=409,
+            detail="Yükleme tamamlanmadı",
+            headers={"Upload-Offset": str(state["offset"])},
+        )
+    path = part_path(upload_id)
+    sha256, head = await run_in_threadpool(_hash_file, path)
+    if PDF_MAGIC not in head:
+        discard(upload_id)
+        raise HTTPException(status_code=400, detail="Sadece PDF dosyaları kabul edilir.")
+    return IngestedUpload(path, state["filename"], "application/pdf", state["size"], sha256)
+
+
+async def complete(
+    upload_id: str,
+    user_id: str,
+    save: Callable[[IngestedUpload], Awaitable[dict]],
+) -> dict:
+    """
+    Yüklemeyi `save` ile kaydeder (tek sefer). Oturum kilidi kayıt bitene kadar tutulur;
+    sürerken gelen complete/PUT -> 409. Tamamlanmış oturum için önceki sonuç döner.
+    `save` hata verirse parça dosyası ve oturum korunur, istemci tekrar deneyebilir.
+    """
+    client = _redis()
+    lock_key = _lock_key(upload_id)
+    if not client.set(lock_key, "1", nx=True, ex=settings.RESUMABLE_UPLOAD_LOCK_SECONDS):
+        raise HTTPException(status_code=409, detail="Bu yükleme şu anda işleniyor")
+    try:
+        state = get_session(upload_id, user_id)
+        if state.get("status") == STATUS_COMPLETED:
+            return json.loads(state["result"])
+        upload = await finalize(upload_id, user_id)
+        result = await save(upload)
+        pipe = client.pipeline()
+        pipe.hset(_key(upload_id), mapping={"status": STATUS_COMPLETED, "result": json.dumps(result)})
+        pipe.expire(_key(upload_id), settings.RESUMABLE_UPLOAD_TTL_SECONDS)
+        pipe.execute()
+        part_path(upload_id).unlink(missing_ok=True)
+        return result
+    finally:
+        client.delete(lock_key)
+
+
+def discard(upload_id: str) -> None:
+    """Oturumu ve diskteki parçayı siler (iptal veya başarılı kayıt sonrası)."""
+    if redis_client is not None:
+        redis_client.delete(_key(upload_id), _lock_key(upload_id))
+    part_path(upload_id).unlink(missing_ok=True)
+
+
+# ==========================================
+# SÜRESİ DOLAN OTURUMLARIN TEMİZLİĞİ
+# ==========================================
+
+def sweep_expired() -> int:
+    """Redis'te kaydı kalmamış ve TTL'den eski parça dosyalarını siler."""
+    if redis_client is None or not SESSION_DIR.exists():
+        return 0
+    cutoff = time.time() - settings.RESUMABLE_UPLOAD_TTL_SECONDS
+    removed = 0
+    for path in SESSION_DIR.glob("*.part"):
+        try:
+            if path.stat().st_mtime < cutoff and not redis_client.exists(_key(path.stem)):
+                path.unlink(missing_ok=True)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    if removed:
+        logger.info(f"Resumable upload sweep removed {removed} files")
+    return removed
+
+
+async def sweep_loop() -> None:
+    """Lifespan'de başlatılan arka plan görevi."""
+    while True:
+        await asyncio.sleep(settings.RESUMABLE_UPLOAD_SWEEP_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(sweep_expired)
+        except Exception as e:
+            logger.error(f"Resumable upload sweep error: {e}", exc_info=True)
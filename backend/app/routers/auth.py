@@ -17,6 +17,7 @@ from ..config import settings
 from ..db import get_supabase, get_db
 from ..deps import get_current_user as get_current_user_dep
 from ..rate_limit import check_rate_limit
+from .. import global_stats, usage_counters, user_cache
 from ..services.avatar_service import create_initial_avatar_for_user
 from sqlalchemy.orm import Session
 
@@ -171,6 +172,7 @@ def exchange_google_token(request: Request, payload: GoogleExchangeIn, supabase:
                 raise HTTPException(status_code=500, detail="Failed to create user")
             user = response.data[0]
             logger.info(f"New user created via Google: {user.get('email')}")
+            global_stats.adjust(users=1)
             
             # Yeni kullanıcı için avatar oluştur
             try:
@@ -245,6 +247,7 @@ def register_user(request: Request, payload: RegisterIn, supabase: Client = Depe
             raise HTTPException(status_code=500, detail="Failed to create user")
               
         user = response.data[0]
+        global_stats.adjust(users=1)
         
         # Yeni kullanıcı için avatar oluştur
         try:
@@ -361,6 +364,7 @@ def accept_eula(
             logger.warning(f"EULA acceptance failed for user: {user_id}")
             raise HTTPException(status_code=404, detail="User not found or update failed")
 
+        user_cache.invalidate(user_id)
         logger.info(f"EULA accepted by user: {user_id}")
         return {"message": "EULA accepted successfully"}
     except HTTPException:
@@ -374,18 +378,16 @@ def accept_eula(
 # ==========================================
 
 @router.get("/me")
-def get_me(current_user: dict = Depends(get_current_user_dep), supabase: Client = Depends(get_supabase)):
+def get_me(current_user: dict = Depends(get_current_user_dep)):
     
     user_id = current_user["sub"]
     
     try:
-        response = supabase.table("users").select("*").eq("id", user_id).execute()
+        user = user_cache.get_profile(user_id)
 
-        if not response.data:
+        if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        user = response.data[0]
-
         return {
             "user_id": user["id"],
             "email": user.get("email"),
@@ -459,6 +461,16 @@ def delete_account(
             logger.warning(f"Account deletion failed for user: {user_id}")
             raise HTTPException(status_code=404, detail="User not found or already deleted")
 
+        # Global toplamlardan silinen kullanıcının sayaçlarını düş (DB + Redis'te bekleyen)
+        deleted_stats = stats_response.data[0] if stats_response.data else {}
+        pending = usage_counters.pending_counts(user_id)
+        global_stats.adjust(
+            users=-1,
+            summaries=-(deleted_stats.get("summary_count", 0) + pending.get("summary_count", 0)),
+            tools=-(deleted_stats.get("tools_count", 0) + pending.get("tools_count", 0)),
+        )
+
+        user_cache.invalidate(user_id)
         logger.info(f"Account deleted successfully: {user_id}")
         return {"message": "Account and related data deleted successfully"}
 
@@ -1,118 +1,54 @@
 # app/routers/files.py
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Header, Body
-from fastapi.responses import StreamingResponse
-from typing import Dict, List, Optional
-from pypdf import PdfReader, PdfWriter
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Header, Body, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from fastapi.concurrency import run_in_threadpool
+from typing import BinaryIO, Callable, Dict, List, Optional
 from pydantic import BaseModel
 import httpx
-import html
 import io
 import re
 import os
+import shutil
+import tempfile
+from urllib.parse import quote
 import jwt # ✅ EKLENDİ: Token çözümleme için gerekli
-from datetime import datetime, timezone
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # --- Config & DB ---
 from ..config import settings
-from ..db import get_supabase, Client, get_db
-from ..storage import save_pdf_to_db, get_pdf_from_db, delete_pdf_from_db, list_user_pdfs
+from ..db import get_supabase, Client, get_async_db
+from ..storage import storage_service
 # ✅ DÜZELTİLDİ: auth.py'den import edildi ve eski fonksiyon kaldırıldı
 from ..deps import get_current_user 
-from ..models import UserStatsResponse, User
+from ..ai_client import AIServiceClient, get_ai_client
+from ..pdf_tools import PdfToolPool, get_pdf_tool_pool
+from .. import artifacts, blob_store, pdf_tools
+from ..ingest import ingest_pdf_upload, upload_openapi
+from ..services import markdown_pdf
+from .. import global_stats, preflight, summary_jobs, usage_counters, user_cache
+from ..models import UserStatsResponse
+from .. import repositories
 import logging
 
 logger = logging.getLogger(__name__)
 
-# --- ReportLab Importları (PDF Oluşturma İçin) ---
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4, letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_LEFT
-from reportlab.lib.units import inch
-from reportlab.lib.utils import simpleSplit
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-
 router = APIRouter(prefix="/files", tags=["files"])
 
-# ==========================================
-# FONT AYARLARI (Source Sans Pro)
-# ==========================================
-
-current_file_path = os.path.abspath(__file__)
-routers_dir = os.path.dirname(current_file_path)
-app_dir = os.path.dirname(routers_dir)
-backend_dir = os.path.dirname(app_dir)
-fonts_dir = os.path.join(backend_dir, "fonts", "Source_Sans_Pro")
-
-regular_font_path = os.path.join(fonts_dir, "SourceSansPro-Regular.ttf")
-bold_font_path = os.path.join(fonts_dir, "SourceSansPro-Bold.ttf")
-
-FONT_NAME_REGULAR = "Helvetica" 
-FONT_NAME_BOLD = "Helvetica-Bold"
-
-try:
-    if os.path.exists(regular_font_path):
-        pdfmetrics.registerFont(TTFont('SourceSansPro-Regular', regular_font_path))
-        FONT_NAME_REGULAR = 'SourceSansPro-Regular'
-        logger.info(f"Normal Font Yüklendi: {regular_font_path}")
-    
-    if os.path.exists(bold_font_path):
-        pdfmetrics.registerFont(TTFont('SourceSansPro-Bold', bold_font_path))
-        FONT_NAME_BOLD = 'SourceSansPro-Bold'
-        logger.info(f"Kalın Font Yüklendi: {bold_font_path}")
-    else:
-        if FONT_NAME_REGULAR != "Helvetica":
-            FONT_NAME_BOLD = FONT_NAME_REGULAR
-
-except Exception as e:
-    logger.warning(f"Font yükleme hatası: {e}", exc_info=True)
-
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
 
 # ==========================================
 # YARDIMCI FONKSİYONLAR
 # ==========================================
 
-async def validate_file_size(file: UploadFile, is_guest: bool):
-    """Dosya boyutunu kontrol eder."""
-    limit_mb = settings.MAX_FILE_SIZE_GUEST_MB if is_guest else settings.MAX_FILE_SIZE_USER_MB
-    limit_bytes = limit_mb * 1024 * 1024
-
-    file.file.seek(0, 2)
-    file_size = file.file.tell()
-    file.file.seek(0)
-
-    if file_size > limit_bytes:
-        user_type = "Misafir" if is_guest else "Kayıtlı Kullanıcı"
-        raise HTTPException(
-            status_code=413, 
-            detail=f"{user_type} limiti aşıldı! Maksimum {limit_mb} MB dosya yükleyebilirsiniz."
-        )
-
-
-def get_ai_service_headers() -> dict:
-    """AI Service'e yapılan istekler için header'ları hazırlar (API key dahil)."""
-    headers = {}
-    if settings.AI_SERVICE_API_KEY:
-        headers["X-API-Key"] = settings.AI_SERVICE_API_KEY
-    return headers
-
-
-def get_user_llm_provider(db: Session, user_id: str) -> str:
+def get_user_llm_provider(user_id: str) -> str:
     """
-    Kullanıcının DB'deki LLM tercihine göre provider string'i döndürür.
+    Kullanıcının LLM tercihine göre provider string'i döndürür (profil önbelleğinden, bkz. user_cache).
     llm_choice_id: 0 = "local", 1 = "cloud"
     Eğer kullanıcı bulunamazsa default "local" döner.
     """
     try:
-        user = db.query(User).filter(User.id == user_id).first()
-        if user:
-            # llm_choice_id: 0 = local llm, 1 = cloud llm
-            return "local" if getattr(user, 'llm_choice_id', 0) == 0 else "cloud"
-        return "local" 
+        return user_cache.llm_provider(user_id)
     except Exception as e:
         logger.warning(f"Failed to get user LLM choice for {user_id}: {e}")
         return "local"
@@ -128,7 +64,7 @@ class UpdateLlmChoiceRequest(BaseModel):
 async def update_llm_choice(
     req: UpdateLlmChoiceRequest,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Kullanıcının varsayılan LLM tercihini günceller.
@@ -143,13 +79,10 @@ async def update_llm_choice(
         # Provider string'ini ID'ye çevir (DB şemanıza göre: 0=Local, 1=Cloud)
         choice_id = 1 if req.provider == "cloud" else 0
         
-        # Kullanıcıyı bul ve güncelle
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
+        # Kullanıcıyı güncelle
+        if not await repositories.users.set_llm_choice(db, user_id, choice_id):
             raise HTTPException(status_code=404, detail="User not found")
-            
-        user.llm_choice_id = choice_id
-        db.commit()
+        user_cache.invalidate(user_id)
         
         return {"status": "success", "provider": req.provider, "choice_id": choice_id}
 
@@ -157,15 +90,15 @@ async def update_llm_choice(
         raise
     except Exception as e:
         logger.error(f"LLM update error: {e}", exc_info=True)
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Tercih güncellenemedi")
 
 # --- GÜNCELLENMİŞ VE LOGLAYAN HELPER FONKSİYONU ---
 
-async def increment_user_usage(user_id: str, supabase: Client, operation_type: str):
+async def increment_user_usage(user_id: str, operation_type: str):
     """
     Kullanıcının işlem istatistiğini artırır.
-    UPSERT yerine açık UPDATE/INSERT mantığı kullanır.
+    Sayaç Redis'te artırılır, `user_stats`'a arka planda toplu yazılır (bkz. usage_counters).
     """
     logger.debug(f"ISTATISTIK GÜNCELLEME - User ID: {user_id}, İşlem Tipi: {operation_type}")
 
@@ -173,84 +106,234 @@ async def increment_user_usage(user_id: str, supabase: Client, operation_type: s
     if not user_id or str(user_id).startswith("guest"):
         logger.debug("Misafir kullanıcı, istatistik tutulmuyor.")
         return
-    
-    target_column = "summary_count" if operation_type == "summary" else "tools_count"
-    now_iso = datetime.now(timezone.utc).isoformat()
 
+    if not usage_counters.record_usage(user_id, operation_type):
+        await run_in_threadpool(usage_counters.write_usage_directly, user_id, operation_type)
+
+async def build_pdf_payload(source: BinaryIO, filename: str) -> dict:
+    """
+    AI Service'e gidecek PDF'i hazırlar (`ai_client.post(**payload)`).
+    shared_volume modunda dosya paylaşılan volume'e bir kez yazılır ve sadece yolu gönderilir;
+    aksi halde multipart gövdesinde iletilir.
+    """
+    if settings.AI_HANDOFF_MODE == "shared_volume":
+        rel_path = await run_in_threadpool(storage_service.spool_for_handoff, source)
+        return {"data": {"storage_path": rel_path, "filename": filename}}
+
+    source.seek(0)
+    file_content = await run_in_threadpool(source.read)
+    return {"files": {"file": (filename, file_content, "application/pdf")}}
+
+
+async def stored_pdf_payload(db: AsyncSession, user_id: Optional[str], file_id: str) -> tuple[dict, str]:
+    """
+    Kayıtlı PDF için AI Service yükü. Ön hesaplanmış sayfa metinleri hazırsa PDF yerine
+    metin gönderilir (AI Service tekrar ayrıştırmaz); değilse PDF'in kendisi gönderilir.
+    Returns: (yük, dosya adı)
+    """
+    ready = await artifacts.load_ready(db, user_id, file_id)
+    if ready is None:
+        source, filename = await load_stored_pdf(db, user_id, file_id)
+        return await build_pdf_payload(source, filename), filename
+    artifact, filename = ready
+    artifacts.require_text_layer(artifact)
+    return artifact_text_payload(artifact, filename), filename
+
+
+def artifact_text_payload(artifact, filename: str) -> dict:
+    """
+    PDF yerine ön hesaplanmış metin (AI Service ayrıştırma yapmaz).
+    Metin form alanı değil dosya parçası olarak gider: Starlette form alanlarını 1 MB ile sınırlar.
+    """
+    text = artifacts.full_text(artifact).encode("utf-8")
+    return {
+        "data": {"filename": filename},
+        "files": {"text": ("text.txt", text, "text/plain; charset=utf-8")},
+    }
+
+
+# Özet modu (bulut sağlayıcıda model seçimi); senkron ve Celery yolları aynı modu kullanır
+SUMMARY_MODE = "flash"
+
+
+def summary_async_available() -> bool:
+    """Celery görevi dosyayı paylaşılan volume'den okur; iş durumu Redis'te tutulur."""
+    return settings.AI_HANDOFF_MODE == "shared_volume" and summary_jobs.available()
+
+
+async def start_summary_job(
+    ai_client: AIServiceClient,
+    source: BinaryIO,
+    filename: str,
+    user_id: Optional[str],
+    llm_provider: str,
+    report: dict,
+) -> JSONResponse:
+    """
+    Büyük belgeyi Celery görevine devreder; istemci /files/summary-jobs/{job_id} ile sorgular.
+    Kullanım, özet tamamlandığında callback'te sayılır (bkz. summary_jobs.claim_usage).
+    """
+    storage_path = await run_in_threadpool(storage_service.spool_for_handoff, source)
+    number, job_id, callback_secret = await run_in_threadpool(summary_jobs.create, user_id, filename)
     try:
-        # 1. ADIM: Kullanıcının istatistik kaydı var mı?
-        res = supabase.table("user_stats").select("*").eq("user_id", user_id).execute()
-        
-        # Kayıt bulunduysa -> GÜNCELLE (UPDATE)
-        if res.data and len(res.data) > 0:
-            current_data = res.data[0]
-            current_val = current_data.get(target_column, 0)
-            new_val = current_val + 1
-            
-            logger.debug(f"User stats update - {target_column}: {current_val} -> {new_val}")
-            
-            update_data = {
-                target_column: new_val,
-                "last_activity": now_iso
-            }
-            
-            # Sadece ilgili satırı güncelle
-            supabase.table("user_stats").update(update_data).eq("user_id", user_id).execute()
-            logger.debug(f"User stats updated successfully for user: {user_id}")
+        # Anahtar numaradan önce: AI Service toplu gönderimde son parçayı "batch" ile değiştirir
+        response = await ai_client.post("summarize-async", json={
+            "pdf_id": number,
+            "storage_path": storage_path,
+            "callback_url": (
+                f"{settings.BACKEND_INTERNAL_URL}/files/summary-jobs/callback/{callback_secret}/{number}"
+            ),
+            "llm_provider": llm_provider,
+            "mode": SUMMARY_MODE,
+        })
+        response.raise_for_status()
+    except Exception:
+        # İş hiç başlamadı; "processing"te asılı kalmasın. Devir dosyası içerik hash'iyle
+        # adlandırıldığı ve aynı belgeyi işleyen başka isteklerle paylaşılabildiği için
+        # silinmez, HANDOFF süresi dolunca taranır.
+        await run_in_threadpool(summary_jobs.discard, number)
+        raise
+
+    return JSONResponse(
+        status_code=202,
+        content={"status": "processing", "route": preflight.ROUTE_ASYNC, "job_id": job_id, "preflight": report},
+    )
 
-        # Kayıt yoksa -> OLUŞTUR (INSERT)
-        else:
-            logger.debug(f"Creating new user stats record for user: {user_id}")
-            new_data = {
-                "user_id": user_id,
-                "summary_count": 1 if target_column == "summary_count" else 0,
-                "tools_count": 1 if target_column == "tools_count" else 0,
-                "last_activity": now_iso
-            }
-            supabase.table("user_stats").insert(new_data).execute()
-            logger.debug(f"New user stats record created for user: {user_id}")
 
+async def load_stored_pdf(db: AsyncSession, user_id: Optional[str], file_id: str) -> tuple[BinaryIO, str]:
+    """Kullanıcının kayıtlı PDF'ini (pdfs.id) dosya nesnesi olarak döner; istemciden tekrar yükleme gerekmez."""
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Kayıtlı dosyalar için giriş yapılmalı.")
+    loaded = await repositories.pdfs.load_content(db, file_id, user_id)
+    if loaded is None:
+        raise HTTPException(status_code=404, detail="Dosya bulunamadı")
+    content, filename = loaded
+    return io.BytesIO(content), filename or f"{file_id}.pdf"
+
+
+async def resolve_pdf_input(
+    db: AsyncSession,
+    user_id: Optional[str],
+    file: Optional[UploadFile],
+    file_id: Optional[str],
+) -> tuple[BinaryIO, str]:
+    """Araç girdisini çözer: yüklenen dosya VEYA kayıtlı PDF (file_id). İkisinden tam olarak biri gerekli."""
+    if (file is None) == (file_id is None):
+        raise HTTPException(status_code=400, detail="Bir PDF dosyası veya file_id gönderilmeli.")
+    if file is not None:
+        return file.file, file.filename or "document.pdf"
+    return await load_stored_pdf(db, user_id, file_id)
+
+
+async def spool_tool_inputs(
+    db: AsyncSession,
+    user_id: Optional[str],
+    file_ids: List[str],
+    files: List[UploadFile],
+    workdir: str,
+) -> List[str]:
+    """Çok girdili araçlar için girdileri çalışma dizinine yazar: önce kayıtlı PDF'ler (file_ids),
+    ardından yüklenenler. Kayıtlı PDF'ler tek tek yüklenip yazılır; hepsi aynı anda bellekte tutulmaz."""
+    paths: List[str] = []
+    for file_id in file_ids:
+        source, _ = await load_stored_pdf(db, user_id, file_id)
+        paths += await run_in_threadpool(pdf_tools.spool_inputs, [source], workdir, len(paths))
+    paths += await run_in_threadpool(pdf_tools.spool_inputs, [f.file for f in files], workdir, len(paths))
+    return paths
+
+
+async def run_disk_tool(
+    tool_pool: PdfToolPool,
+    tool: str,
+    fn: Callable,
+    file_ids: List[str],
+    files: List[UploadFile],
+    *args,
+    output_name: str,
+    save_result: bool,
+    user_id: Optional[str],
+    db: AsyncSession,
+):
+    """
+    Disk tabanlı araç çalıştırır (merge, pipeline): girdiler RAM yerine geçici bir
+    çalışma dizinine yazılır, `fn(input_paths, output_path, *args)` havuzda çalışır ve
+    çıktı diskten parça parça akıtılır (save_result ise kullanıcının dosyalarına kaydedilir).
+    Dizin yanıt gönderildikten sonra silinir.
+    """
+    workdir = tempfile.mkdtemp(prefix=f"{tool}_")
+    try:
+        input_paths = await spool_tool_inputs(db, user_id, file_ids, files, workdir)
+        output_path = os.path.join(workdir, output_name)
+        try:
+            await tool_pool.run(tool, fn, input_paths, output_path, *args)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # İSTATİSTİK
+        if user_id:
+            await increment_user_usage(user_id, "tool")
+
+        if save_result:
+            with open(output_path, "rb") as f:
+                result_content = await run_in_threadpool(f.read)
+            shutil.rmtree(workdir, ignore_errors=True)
+            return await save_tool_result(db, user_id, result_content, output_name)
+
+        return FileResponse(
+            output_path,
+            media_type="application/pdf",
+            filename=output_name,
+            background=BackgroundTask(shutil.rmtree, workdir, ignore_errors=True),
+        )
+    except HTTPException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
     except Exception as e:
-        logger.error(f"İstatistik güncellenemedi: {e}", exc_info=True)
-
-def parse_page_ranges(range_str: str, max_pages: int) -> list[int]:
-    """Sayfa aralığı stringini parse eder."""
-    if not range_str:
-        raise ValueError("Sayfa aralığı boş olamaz.")
-    page_indices = set()
-    parts = range_str.split(',')
-    for part in parts:
-        part = part.strip()
-        if not part: continue
-        if re.fullmatch(r'\d+', part):
-            page_num = int(part)
-            if 1 <= page_num <= max_pages:
-                page_indices.add(page_num - 1)
-        elif re.fullmatch(r'\d+-\d+', part):
-            start_str, end_str = part.split('-')
-            start, end = map(int, part.split('-'))
-            for page_num in range(start, end + 1):
-                if 1 <= page_num <= max_pages:
-                    page_indices.add(page_num - 1)
-    return sorted(list(page_indices))
+        shutil.rmtree(workdir, ignore_errors=True)
+        print(f"Hata: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def require_save_user(save_result: bool, user_id: Optional[str]) -> None:
+    """save_result için giriş şartı; araç çalışmadan ve kullanım sayılmadan önce kontrol edilir."""
+    if save_result and not user_id:
+        raise HTTPException(status_code=401, detail="Sonucu kaydetmek için giriş yapılmalı.")
+
+
+async def save_tool_result(db: AsyncSession, user_id: Optional[str], pdf_content: bytes, filename: str) -> dict:
+    """Araç çıktısını kullanıcının dosyalarına kaydeder (/save-processed ile aynı yanıt)."""
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Sonucu kaydetmek için giriş yapılmalı.")
+    pdf_record = await repositories.pdfs.create_from_bytes(db, user_id, pdf_content, filename)
+    return {
+        "file_id": pdf_record.id,
+        "filename": pdf_record.filename or filename,
+        "size_kb": round(pdf_record.file_size / 1024, 2) if pdf_record.file_size else 0,
+        "message": "File saved successfully"
+    }
 
 
 # ==========================================
 # GENEL ÖZETLEME
 # ==========================================
 
-@router.post("/summarize")
+@router.post("/summarize", openapi_extra=upload_openapi(body_required=False))
 async def summarize_file(
-    file: UploadFile = File(...),
+    request: Request,
+    file_id: Optional[str] = Query(None, description="Yükleme yerine kayıtlı PDF (pdfs.id, bkz. /files/precheck)"),
+    async_job: bool = Query(
+        False, alias="async",
+        description="Büyük belgeler Celery'ye devredilebilir: 202 + job_id döner, sonuç /files/summary-jobs/{job_id}",
+    ),
     authorization: Optional[str] = Header(None),
-    supabase: Client = Depends(get_supabase),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    ai_client: AIServiceClient = Depends(get_ai_client)
 ):
-    """Frontend'deki 'handleSummarize' fonksiyonunun çağırdığı SENKRON endpoint."""
+    """
+    Frontend'deki 'handleSummarize' fonksiyonunun çağırdığı SENKRON endpoint.
+    async=1 verilmedikçe büyük belgeler de senkron özetlenir (yanıtta her zaman `summary` olur).
+    """
     print("\n--- SUMMARIZE İSTEĞİ ---")
-    
-    if file.content_type != "application/pdf":
-        raise HTTPException(status_code=400, detail="Sadece PDF dosyaları kabul edilir.")
 
     # USER ID ÇÖZÜMLEME (Manuel Decode - get_current_user_from_header YERİNE)
     user_id = None
@@ -268,41 +351,69 @@ async def summarize_file(
     else:
         print("👤 Misafir Kullanıcı")
 
-    # Boyut Kontrolü
-    is_guest = user_id is None
-    await validate_file_size(file, is_guest=is_guest)
+    # file_id verilirse gövde okunmaz (hazırsa ön hesaplanmış çıktılar kullanılır);
+    # aksi halde akış halinde okunur (boyut/PDF imzası okurken kontrol edilir)
+    upload, source, artifact = None, None, None
+    if file_id is not None:
+        ready = await artifacts.load_ready(db, user_id, file_id)
+        if ready is not None:
+            artifact, filename = ready
+        else:
+            source, filename = await load_stored_pdf(db, user_id, file_id)
+    else:
+        upload, _ = await ingest_pdf_upload(request, is_guest=user_id is None)
 
     try:
-        file_content = await file.read()
-        files = {"file": ("upload.pdf", file_content, "application/pdf")}
-        ai_service_url = f"{settings.AI_SERVICE_URL}/api/v1/ai/summarize-sync"
-        
-        # Kullanıcının LLM tercihini DB'den al
+        if upload is not None:
+            source, filename = upload.open(), upload.filename or "upload.pdf"
+
+        # ÖN KONTROL: sayfa sayısı, şifreleme, metin katmanı (örnek sayfalar), metin boyutu tahmini.
+        # Taranmış/şifreli PDF hemen reddedilir; büyük belgeler Celery'ye gider.
+        if artifact is not None:
+            report = preflight.from_artifact(artifact)
+        else:
+            try:
+                report = await run_in_threadpool(preflight.inspect, source)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        route = preflight.choose_route(report, async_available=async_job and summary_async_available())
+        print(f"🔎 Ön kontrol: {report['page_count']} sayfa, ~{report['estimated_text_chars']} karakter -> {route}")
+
+        # Kullanıcının LLM tercihini al (profil önbelleği)
         llm_provider = "local"  # Misafir için default
         if user_id:
-            llm_provider = get_user_llm_provider(db, user_id)
+            llm_provider = await run_in_threadpool(get_user_llm_provider, user_id)
             print(f"📊 Kullanıcı LLM Tercihi: {llm_provider}")
 
-        print(f"📡 AI Service İstek: {ai_service_url} (llm_provider: {llm_provider})")
-        async with httpx.AsyncClient(timeout=120.0, follow_redirects=True) as client:
-            headers = get_ai_service_headers()
-            params = {"llm_provider": llm_provider}
-            response = await client.post(ai_service_url, files=files, params=params, headers=headers)
-            
-            if response.status_code != 200:
-                print(f"❌ AI Service Error: {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="AI Servisi hatası")
-            
-            result = response.json()
-            
-            # İSTATİSTİK GÜNCELLEME
-            if user_id:
-                await increment_user_usage(user_id, supabase, "summary")
+        if route == preflight.ROUTE_ASYNC:
+            if source is None:
+                source, _ = await load_stored_pdf(db, user_id, file_id)
+            return await start_summary_job(ai_client, source, filename, user_id, llm_provider, report)
+
+        if artifact is not None:
+            pdf_payload = artifact_text_payload(artifact, filename)
+        else:
+            pdf_payload = await build_pdf_payload(source, "upload.pdf")
+
+        print(f"📡 AI Service İstek: summarize-sync (llm_provider: {llm_provider})")
+        params = {"llm_provider": llm_provider, "mode": SUMMARY_MODE}
+        response = await ai_client.post("summarize-sync", params=params, **pdf_payload)
+        
+        if response.status_code != 200:
+            print(f"❌ AI Service Error: {response.text}")
+            raise HTTPException(status_code=response.status_code, detail="AI Servisi hatası")
+        
+        result = response.json()
+        
+        # İSTATİSTİK GÜNCELLEME
+        if user_id:
+            await increment_user_usage(user_id, "summary")
 
         return {
             "status": "success",
             "summary": result.get("summary"),
-            "pdf_blob": None 
+            "pdf_blob": None,
+            "route": route
         }
 
     except httpx.TimeoutException:
@@ -312,49 +423,51 @@ async def summarize_file(
     except Exception as e:
         print(f"❌ Özetleme Hatası: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Sunucu hatası: {str(e)}")
+    finally:
+        if upload is not None:
+            if source is not None:
+                source.close()
+            upload.cleanup()
 
 
 # ==========================================
 # ÖZETLEME (MİSAFİR İÇİN)
 # ==========================================
 
-@router.post("/summarize-guest")
+@router.post("/summarize-guest", openapi_extra=upload_openapi())
 async def summarize_for_guest(
-    file: UploadFile = File(...),
-    x_guest_id: Optional[str] = Header(None, alias="X-Guest-ID")
+    request: Request,
+    x_guest_id: Optional[str] = Header(None, alias="X-Guest-ID"),
+    ai_client: AIServiceClient = Depends(get_ai_client)
 ):
     """Misafir kullanıcılar için ANLIK özetleme."""
-    if file.content_type != "application/pdf":
-        raise HTTPException(status_code=400, detail="Sadece PDF dosyaları kabul edilir")
-    
-    await validate_file_size(file, is_guest=True)
+    upload, _ = await ingest_pdf_upload(request, is_guest=True)
     
     try:
-        ai_service_url = f"{settings.AI_SERVICE_URL}/api/v1/ai/summarize-sync"
-        file_content = await file.read()
+        with upload.open() as source:
+            pdf_payload = await build_pdf_payload(source, upload.filename)
         
         # Misafir kullanıcılar için default: local (KVKK için güvenli)
         llm_provider = "local"
         
-        async with httpx.AsyncClient(timeout=60.0, follow_redirects=True) as client:
-            files = {"file": (file.filename, file_content, "application/pdf")}
-            headers = get_ai_service_headers()
-            params = {"llm_provider": llm_provider}
-            response = await client.post(ai_service_url, files=files, params=params, headers=headers)
-            response.raise_for_status()
+        params = {"llm_provider": llm_provider}
+        response = await ai_client.post("summarize-sync", timeout=60.0, params=params, **pdf_payload)
+        response.raise_for_status()
         
         result = response.json()
         
         return {
             "status": "completed",
             "summary": result.get("summary"),
-            "filename": file.filename,
+            "filename": upload.filename,
             "method": "guest"
         }
     
     except Exception as e:
         logger.error(f"Özetleme hatası: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Sunucu hatası")
+    finally:
+        upload.cleanup()
 
 
 @router.post("/summarize-start/{file_id}")
@@ -362,15 +475,17 @@ async def trigger_summarize_task(
     file_id: int, 
     current_user: dict = Depends(get_current_user),
     supabase: Client = Depends(get_supabase),
-    db: Session = Depends(get_db)
+    ai_client: AIServiceClient = Depends(get_ai_client)
 ):
-    """Asenkron özetleme görevi başlatır."""
+    """Asenkron özetleme görevi başlatır. Supabase istemcisi senkron; çağrılar threadpool'da yapılır."""
     print("\n--- SUMMARIZE-START İSTEĞİ ---")
     try:
         user_id = current_user.get("sub")
         print(f"✅ Token Çözüldü. User ID: {user_id}")
         
-        response = supabase.table("documents").select("*").eq("id", file_id).single().execute()
+        response = await run_in_threadpool(
+            supabase.table("documents").select("*").eq("id", file_id).single().execute
+        )
         if not response.data:
             raise HTTPException(status_code=404, detail="Dosya bulunamadı")
         
@@ -378,10 +493,12 @@ async def trigger_summarize_task(
         if file_data["user_id"] != user_id:
             raise HTTPException(status_code=403, detail="Erişim yetkiniz yok")
         
-        # Kullanıcının LLM tercihini DB'den al
-        llm_provider = get_user_llm_provider(db, user_id)
+        # Kullanıcının LLM tercihini al (profil önbelleği)
+        llm_provider = await run_in_threadpool(get_user_llm_provider, user_id)
         
-        supabase.table("documents").update({"status": "processing"}).eq("id", file_id).execute()
+        await run_in_threadpool(
+            supabase.table("documents").update({"status": "processing"}).eq("id", file_id).execute
+        )
         
         callback_url = f"http://backend:8000/files/callback/{file_id}"
         task_data = {
@@ -391,15 +508,11 @@ async def trigger_summarize_task(
             "llm_provider": llm_provider
         }
 
-        ai_service_url = f"{settings.AI_SERVICE_URL}/api/v1/ai/summarize-async"
-        
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            headers = get_ai_service_headers()
-            response = await client.post(ai_service_url, json=task_data, headers=headers, timeout=10)
-            response.raise_for_status()
+        response = await ai_client.post("summarize-async", json=task_data)
+        response.raise_for_status()
         
         # İSTATİSTİK (Async olduğu için burada sayıyoruz)
-        await increment_user_usage(user_id, supabase, "summary")
+        await increment_user_usage(user_id, "summary")
         
         return {"status": "processing", "message": "Özetleme başlatıldı", "file_id": file_id}
 
@@ -418,6 +531,38 @@ class SummaryCallbackData(BaseModel):
     summary: Optional[str] = None
     error: Optional[str] = None
 
+class SummaryCallbackBatch(BaseModel):
+    callbacks: List[SummaryCallbackData]
+
+
+def _apply_summary_callback(supabase: Client, data: SummaryCallbackData):
+    update_data = {
+        "status": data.status,
+        "summary": data.summary if data.status == "completed" else None,
+        "error": data.error if data.status == "failed" else None
+    }
+    supabase.table("documents").update(update_data).eq("id", data.pdf_id).execute()
+
+
+# NOT: "/callback/{pdf_id}" route'undan önce tanımlı olmalı, yoksa "batch" pdf_id olarak eşleşir.
+@router.post("/callback/batch")
+async def handle_ai_callback_batch(
+    batch: SummaryCallbackBatch,
+    supabase: Client = Depends(get_supabase)
+):
+    """AI Service'in aynı anda biten görevler için toplu gönderdiği callback'ler."""
+    print(f"✅ Toplu callback alındı: {len(batch.callbacks)} adet")
+
+    try:
+        for data in batch.callbacks:
+            await run_in_threadpool(_apply_summary_callback, supabase, data)
+        return {"status": "callback_received", "count": len(batch.callbacks)}
+
+    except Exception as e:
+        print(f"❌ Toplu callback hatası: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/callback/{pdf_id}")
 async def handle_ai_callback(
     pdf_id: int, 
@@ -430,12 +575,7 @@ async def handle_ai_callback(
     print(f"✅ Callback alındı: PDF ID {pdf_id}, Durum: {data.status}")
 
     try:
-        update_data = {
-            "status": data.status,
-            "summary": data.summary if data.status == "completed" else None,
-            "error": data.error if data.status == "failed" else None
-        }
-        supabase.table("documents").update(update_data).eq("id", pdf_id).execute()
+        await run_in_threadpool(_apply_summary_callback, supabase, data)
         return {"status": "callback_received"}
 
     except Exception as e:
@@ -443,6 +583,52 @@ async def handle_ai_callback(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Ön kontrolde büyük bulunup Celery'ye yönlendirilen /files/summarize işleri (bkz. summary_jobs)
+@router.get("/summary-jobs/{job_id}")
+async def get_summary_job(job_id: str):
+    """İş durumu; tamamlandığında özet de döner. Kimlik gizli kısım içerdiği için ayrıca token istenmez."""
+    job = await run_in_threadpool(summary_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="İş bulunamadı veya süresi doldu")
+    return job
+
+
+# NOT: "/summary-jobs/callback/{callback_secret}/{job_number}" route'undan önce tanımlı olmalı.
+# Callback URL'si iş başına anahtar içerdiği için toplu gönderim de tek işe aittir.
+async def _record_summary_job_usage(number: int) -> None:
+    user_id = await run_in_threadpool(summary_jobs.claim_usage, number)
+    if user_id:
+        await increment_user_usage(user_id, "summary")
+
+
+@router.post("/summary-jobs/callback/{callback_secret}/batch")
+async def handle_summary_job_callback_batch(callback_secret: str, batch: SummaryCallbackBatch):
+    accepted = 0
+    for data in batch.callbacks:
+        if await run_in_threadpool(
+            summary_jobs.complete, data.pdf_id, callback_secret, data.status, data.summary, data.error
+        ):
+            await _record_summary_job_usage(data.pdf_id)
+            accepted += 1
+    if not accepted:
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    return {"status": "callback_received", "count": accepted}
+
+
+@router.post("/summary-jobs/callback/{callback_secret}/{job_number}")
+async def handle_summary_job_callback(callback_secret: str, job_number: int, data: SummaryCallbackData):
+    if job_number != data.pdf_id:
+        raise HTTPException(status_code=400, detail="ID mismatch")
+    if not await run_in_threadpool(
+        summary_jobs.complete, data.pdf_id, callback_secret, data.status, data.summary, data.error
+    ):
+        # Süresi dolmuş iş veya yanlış anahtar; 4xx ile AI Service yeniden denemez
+        logger.warning(f"Summary job {job_number} callback rejected")
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    await _record_summary_job_usage(job_number)
+    return {"status": "callback_received"}
+
+
 @router.get("/summary/{file_id}")
 async def get_file_summary(
     file_id: int,
@@ -451,7 +637,9 @@ async def get_file_summary(
 ):
     try:
         user_id = current_user.get("sub")
-        response = supabase.table("documents").select("*").eq("id", file_id).single().execute()
+        response = await run_in_threadpool(
+            supabase.table("documents").select("*").eq("id", file_id).single().execute
+        )
         
         if not response.data:
             raise HTTPException(status_code=404, detail="Dosya bulunamadı")
@@ -472,49 +660,53 @@ async def get_file_summary(
 
 @router.post("/chat/start")  # 👈 {file_id} kaldırıldı
 async def start_chat_session(
-    file: UploadFile = File(...), # 👈 Direkt dosyayı alıyoruz
+    file: Optional[UploadFile] = File(None), # 👈 Direkt dosyayı alıyoruz
+    file_id: Optional[str] = Form(None), # 👈 veya kayıtlı PDF (pdfs.id)
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    ai_client: AIServiceClient = Depends(get_ai_client)
 ):
     """
     Veritabanına kaydetmeden, dosyayı direkt AI Service'e gönderir.
+    Kayıtlı bir PDF için `file_id` verilirse dosya tekrar yüklenmeden DB'den okunur.
     PDF içeriği AI Service hafızasında tutulur.
     """
-    print(f"\n--- CHAT START (Dosya: {file.filename}) ---")
+    user_id = current_user.get("sub")
     
     # 1. Dosya geçerlilik kontrolü
-    if file.content_type != "application/pdf":
+    if file is not None and file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Sadece PDF dosyaları kabul edilir.")
+    if file is None and file_id is not None:
+        # Kayıtlı PDF: hazırsa ön hesaplanmış metin gönderilir
+        pdf_payload, filename = await stored_pdf_payload(db, user_id, file_id)
+    else:
+        source, filename = await resolve_pdf_input(db, user_id, file, file_id)
+        pdf_payload = None
+    print(f"\n--- CHAT START (Dosya: {filename}) ---")
 
     try:
-        # 2. Dosyayı belleğe oku
-        file_content = await file.read()
+        # 2. Dosyayı AI Service'e iletilecek şekilde hazırla (multipart veya paylaşılan volume)
+        if pdf_payload is None:
+            pdf_payload = await build_pdf_payload(source, filename)
         
-        # 3. Kullanıcının LLM tercihini DB'den al
-        user_id = current_user.get("sub")
-        llm_provider = get_user_llm_provider(db, user_id) if user_id else "local"
+        # 3. Kullanıcının LLM tercihini al (profil önbelleği)
+        llm_provider = await run_in_threadpool(get_user_llm_provider, user_id) if user_id else "local"
         print(f"📊 Kullanıcı LLM Tercihi: {llm_provider}")
 
         # 4. AI Service'e Gönder (/chat/start)
-        async with httpx.AsyncClient() as client:
-            # AI Service'e dosyayı multipart/form-data olarak iletiyoruz
-            files = {"file": (file.filename, file_content, "application/pdf")}
-            target_url = f"{settings.AI_SERVICE_URL}/api/v1/ai/chat/start"
-            
-            print(f"📡 AI Service'e gönderiliyor: {target_url} (llm_provider: {llm_provider})")
-            headers = get_ai_service_headers()
-            params = {"llm_provider": llm_provider}
-            response = await client.post(target_url, files=files, params=params, headers=headers, timeout=60.0)
-            
-            if response.status_code != 200:
-                print(f"❌ AI Service Hatası: {response.text}")
-                raise HTTPException(status_code=502, detail="Yapay zeka servisi başlatılamadı.")
-            
-            # 4. Session ID'yi Frontend'e dön
-            data = response.json()
-            print(f"✅ Chat Oturumu Başladı (RAM): {data['session_id']}")
-            
-            return {"session_id": data["session_id"], "filename": file.filename}
+        print(f"📡 AI Service'e gönderiliyor: chat/start (llm_provider: {llm_provider})")
+        params = {"llm_provider": llm_provider}
+        response = await ai_client.post("chat/start", params=params, **pdf_payload)
+        
+        if response.status_code != 200:
+            print(f"❌ AI Service Hatası: {response.text}")
+            raise HTTPException(status_code=502, detail="Yapay zeka servisi başlatılamadı.")
+        
+        # 4. Session ID'yi Frontend'e dön
+        data = response.json()
+        print(f"✅ Chat Oturumu Başladı (RAM): {data['session_id']}")
+        
+        return {"session_id": data["session_id"], "filename": filename}
 
     except HTTPException:
         raise
@@ -528,7 +720,8 @@ async def start_chat_session(
 @router.post("/chat/message")
 async def send_chat_message(
     body: dict = Body(...),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    ai_client: AIServiceClient = Depends(get_ai_client)
 ):
     """
     Kullanıcının mesajını AI Service'e iletir.
@@ -542,17 +735,14 @@ async def send_chat_message(
 
     try:
         # AI Service'e ilet (/chat)
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            payload = {"session_id": session_id, "message": message}
-            target_url = f"{settings.AI_SERVICE_URL}/api/v1/ai/chat"
-            headers = get_ai_service_headers()
-            response = await client.post(target_url, json=payload, headers=headers)
-            
-            if response.status_code != 200:
-                error_detail = response.json().get("detail", "AI hatası")
-                raise HTTPException(status_code=response.status_code, detail=error_detail)
-            
-            return response.json() # {"answer": "..."}
+        payload = {"session_id": session_id, "message": message}
+        response = await ai_client.post("chat", json=payload)
+        
+        if response.status_code != 200:
+            error_detail = response.json().get("detail", "AI hatası")
+            raise HTTPException(status_code=response.status_code, detail=error_detail)
+        
+        return response.json() # {"answer": "..."}
 
     except HTTPException:
         raise
@@ -574,232 +764,21 @@ class MarkdownToPdfRequest(BaseModel):
 
 @router.post("/markdown-to-pdf")
 async def markdown_to_pdf(request: MarkdownToPdfRequest):
+    """
+    Özeti PDF olarak indirir. Oluşturma threadpool'da yapılır; aynı markdown
+    tekrar istenirse PDF önbellekten döner (X-Render-Cache: hit).
+    """
     try:
-        buffer = io.BytesIO()
-        # Kenar boşlukları
-        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40)
-        styles = getSampleStyleSheet()
-        
-        # --- 1. Stil Tanımları ---
-        
-        # DÜZELTME: Buradaki manuel "Helvetica" atamaları kaldırıldı.
-        # Artık dosyanın en başındaki global FONT_NAME_REGULAR değişkenini kullanıyor.
-
-        # Normal Metin
-        style_normal = ParagraphStyle(
-            'TrNormal', 
-            parent=styles['Normal'], 
-            fontName=FONT_NAME_REGULAR,  # <--- SourceSansPro buradan gelecek
-            fontSize=10, 
-            leading=14, 
-            spaceAfter=6
-        )
-        
-        # Başlık 1 (#) - Koyu Lacivert
-        style_heading_1 = ParagraphStyle(
-            'TrHeading1', 
-            parent=styles['Heading1'], 
-            fontName=FONT_NAME_BOLD,     # <--- SourceSansPro-Bold
-            fontSize=16, 
-            leading=20, 
-            spaceAfter=12, 
-            spaceBefore=12,
-            textColor=colors.HexColor("#1a365d") 
-        )
-
-        # Başlık 2 (##) - Koyu Gri/Mavi
-        style_heading_2 = ParagraphStyle(
-            'TrHeading2', 
-            parent=styles['Heading2'], 
-            fontName=FONT_NAME_BOLD, 
-            fontSize=13, 
-            leading=16, 
-            spaceAfter=10, 
-            spaceBefore=6,
-            textColor=colors.HexColor("#2c3e50")
-        )
-
-        # Başlık 3 (### ve sonrası) - Daha küçük gri başlık
-        style_heading_3 = ParagraphStyle(
-            'TrHeading3', 
-            parent=styles['Heading3'], 
-            fontName=FONT_NAME_BOLD, 
-            fontSize=11, 
-            leading=14, 
-            spaceAfter=8, 
-            spaceBefore=4,
-            textColor=colors.HexColor("#34495e")
-        )
-
-        # Liste Maddesi
-        style_bullet = ParagraphStyle(
-            'TrBullet', 
-            parent=style_normal, 
-            leftIndent=20, 
-            bulletIndent=10,
-            spaceAfter=4
-        )
-
-        # Tablo Hücresi
-        style_cell = ParagraphStyle(
-            'TableCell', 
-            parent=style_normal, 
-            fontName=FONT_NAME_REGULAR, # Tablo içi
-            fontSize=9, 
-            leading=11,
-            spaceAfter=0
-        )
+        pdf_bytes, cache_key, cache_hit = await run_in_threadpool(markdown_pdf.render_cached, request.markdown)
         
-        # Tablo Başlık Hücresi
-        style_cell_header = ParagraphStyle(
-            'TableCellHeader', 
-            parent=style_normal, 
-            fontName=FONT_NAME_BOLD,    # Tablo başlığı
-            fontSize=9, 
-            leading=11,
-            textColor=colors.white,
-            spaceAfter=0
-        )
-
-        story = []
-        lines = request.markdown.split('\n')
-        
-        # --- 2. Yardımcı Fonksiyon: Inline Markdown ---
-        def format_inline_markdown(text):
-            if not text: return ""
-            # HTML karakterlerini bozmamak için escape et
-            text = html.escape(text)
-            
-            # Bold: **text** -> <b>text</b>
-            # Not: registerFontFamily yapılmazsa <b> tagi Helvetica'ya düşebilir. 
-            # Ancak yukarıda registerFontFamily eklediysek veya fontlar doğruysa çalışır.
-            text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
-            
-            # Italic: *text* -> <i>text</i>
-            text = re.sub(r'\*(.*?)\*', r'<i>\1</i>', text)
-            
-            # Code: `text` -> kırmızı courier font (Kod blokları genelde Courier kalır)
-            text = re.sub(r'`(.*?)`', r'<font face="Courier" color="#e74c3c">\1</font>', text)
-            return text
-
-        # --- 3. Ana İşleme Döngüsü ---
-        table_buffer = [] 
-        in_table = False
-
-        for line in lines:
-            original_line = line.strip()
-            
-            # --- A) TABLO İŞLEME ---
-            if original_line.startswith('|'):
-                in_table = True
-                cells = [c.strip() for c in original_line.split('|')]
-                
-                if len(cells) > 1 and cells[0] == '': cells.pop(0)
-                if len(cells) > 0 and cells[-1] == '': cells.pop(-1)
-                
-                is_separator = all(re.match(r'^[\s\-:]+$', c) for c in cells)
-                
-                if not is_separator and cells:
-                    row_data = []
-                    is_header_row = (len(table_buffer) == 0)
-                    
-                    for cell in cells:
-                        formatted_cell = format_inline_markdown(cell)
-                        current_style = style_cell_header if is_header_row else style_cell
-                        row_data.append(Paragraph(formatted_cell, current_style))
-                    
-                    table_buffer.append(row_data)
-                continue 
-            
-            else:
-                if in_table and table_buffer:
-                    col_count = max(len(row) for row in table_buffer)
-                    if col_count > 0:
-                        avail_width = A4[0] - 80 
-                        col_width = avail_width / col_count
-                        
-                        t = Table(table_buffer, colWidths=[col_width] * col_count)
-                        t.setStyle(TableStyle([
-                            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#1a365d")), 
-                            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor("#f8f9fa")]),
-                            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                            ('TOPPADDING', (0, 0), (-1, -1), 8),
-                            # Tablo Fontları
-                            ('FONTNAME', (0, 0), (-1, -1), FONT_NAME_REGULAR), 
-                            ('FONTNAME', (0, 0), (-1, 0), FONT_NAME_BOLD),     
-                        ]))
-                        story.append(t)
-                        story.append(Spacer(1, 12))
-                    
-                    table_buffer = []
-                    in_table = False
-
-            if not original_line:
-                continue
-
-            # --- B) METİN VE BAŞLIK İŞLEME ---
-            
-            header_match = re.match(r'^(#{1,6})\s+(.*)', original_line)
-            
-            if header_match:
-                level = len(header_match.group(1)) 
-                raw_text = header_match.group(2)   
-                clean_text = format_inline_markdown(raw_text)
-
-                if level == 1:
-                    story.append(Paragraph(clean_text, style_heading_1))
-                elif level == 2:
-                    story.append(Paragraph(clean_text, style_heading_2))
-                else:
-                    story.append(Paragraph(clean_text, style_heading_3))
-
-            elif re.match(r'^[IVX]+\.', original_line):
-                formatted_text = format_inline_markdown(original_line)
-                story.append(Paragraph(formatted_text, style_heading_1))
-
-            elif re.match(r'^[A-Z]\.', original_line):
-                formatted_text = format_inline_markdown(original_line)
-                story.append(Paragraph(formatted_text, style_heading_2))
-
-            elif original_line.startswith(('-', '*', '•')):
-                formatted_text = format_inline_markdown(original_line)
-                clean_text = re.sub(r'^[\-\*\•]\s*', '', formatted_text)
-                story.append(Paragraph(f"• {clean_text}", style_bullet))
-
-            else:
-                formatted_text = format_inline_markdown(original_line)
-                story.append(Paragraph(formatted_text, style_normal))
-
-        # --- C) DOSYA SONU KONTROLÜ ---
-        if in_table and table_buffer:
-             col_count = max(len(row) for row in table_buffer)
-             avail_width = A4[0] - 80
-             col_width = avail_width / col_count
-             t = Table(table_buffer, colWidths=[col_width]*col_count)
-             t.setStyle(TableStyle([
-                 ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#1a365d")),
-                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                 ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                 ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                 ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor("#f8f9fa")]),
-                 ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                 ('TOPPADDING', (0, 0), (-1, -1), 8),
-                 ('FONTNAME', (0, 0), (-1, -1), FONT_NAME_REGULAR),
-                 ('FONTNAME', (0, 0), (-1, 0), FONT_NAME_BOLD),
-             ]))
-             story.append(t)
-
-        doc.build(story)
-        buffer.seek(0)
-        
-        return StreamingResponse(
-            buffer, 
-            media_type="application/pdf", 
-            headers={"Content-Disposition": 'attachment; filename="ozet.pdf"'}
+        return Response(
+            content=pdf_bytes,
+            media_type="application/pdf",
+            headers={
+                "Content-Disposition": 'attachment; filename="ozet.pdf"',
+                "ETag": f'"{cache_key}"',
+                "X-Render-Cache": "hit" if cache_hit else "miss",
+            }
         )
 
     except Exception as e:
@@ -824,7 +803,7 @@ def clean_markdown_for_tts(text: str) -> str:
 async def listen_summary(
     request: TTSRequest,
     authorization: Optional[str] = Header(None),
-    supabase: Client = Depends(get_supabase)
+    ai_client: AIServiceClient = Depends(get_ai_client)
 ):
     print("\n--- LISTEN (TTS) İSTEĞİ ---")
     if not request.text:
@@ -843,14 +822,10 @@ async def listen_summary(
             pass
 
     cleaned_text = clean_markdown_for_tts(request.text)
-    ai_tts_url = f"{settings.AI_SERVICE_URL}/api/v1/ai/tts"
 
     async def iter_audio():
-        client = None
         try:
-            client = httpx.AsyncClient(timeout=120.0, follow_redirects=True)
-            headers = get_ai_service_headers()
-            async with client.stream("POST", ai_tts_url, json={"text": cleaned_text}, headers=headers) as response:
+            async with ai_client.stream("POST", "tts", json={"text": cleaned_text}) as response:
                 if response.status_code != 200:
                     return 
                 async for chunk in response.aiter_bytes():
@@ -858,11 +833,9 @@ async def listen_summary(
         except Exception as e:
             print(f"TTS Error: {e}")
         finally:
-            if client:
-                # İSTATİSTİK GÜNCELLEME
-                if user_id:
-                    await increment_user_usage(user_id, supabase, "summary")
-                await client.aclose()
+            # İSTATİSTİK GÜNCELLEME
+            if user_id:
+                await increment_user_usage(user_id, "summary")
 
     return StreamingResponse(iter_audio(), media_type="audio/mpeg")
 
@@ -871,16 +844,13 @@ async def listen_summary(
 # FILE OPERATIONS (Upload, Delete, List)
 # ==========================================
 
-@router.post("/upload")
+@router.post("/upload", openapi_extra=upload_openapi())
 async def upload_pdf(
-    file: UploadFile = File(...),
+    request: Request,
     authorization: Optional[str] = Header(None),
     x_guest_id: Optional[str] = Header(None, alias="X-Guest-ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    if file.content_type != "application/pdf":
-        raise HTTPException(status_code=400, detail="Only PDF files allowed")
-    
     user_id = None
     if authorization:
         try:
@@ -895,16 +865,15 @@ async def upload_pdf(
         user_id = x_guest_id or "guest"
     
     is_guest_user = str(user_id).startswith("guest")
-    await validate_file_size(file, is_guest=is_guest_user)
+    # Gövde akış halinde okunur; boyut/PDF imzası okurken kontrol edilir
+    upload, _ = await ingest_pdf_upload(request, is_guest=is_guest_user)
     
     try:
-        # PDF'i oku
-        pdf_content = await file.read()
-        filename = file.filename or "document.pdf"
+        filename = upload.filename or "document.pdf"
         
         # Sadece kayıtlı kullanıcılar için DB'ye kaydet
         if not is_guest_user:
-            pdf_record = save_pdf_to_db(db, user_id, pdf_content, filename)
+            pdf_record = await repositories.pdfs.create(db, user_id, upload, filename)
             return {
                 "file_id": pdf_record.id,
                 "filename": pdf_record.filename or filename,
@@ -917,18 +886,80 @@ async def upload_pdf(
     except Exception as e:
         logger.error(f"Upload error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Upload failed")
+    finally:
+        upload.cleanup()
+
+
+class PrecheckRequest(BaseModel):
+    sha256: str
+
+
+@router.post("/precheck")
+async def precheck_upload(
+    req: PrecheckRequest,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Yükleme öncesi hash kontrolü: kullanıcı bu içeriği daha önce kaydettiyse `file_id` döner.
+    İstemci dosyayı tekrar göndermek yerine bu `file_id` ile özet, sohbet ve araç
+    endpoint'lerini çağırabilir.
+    """
+    user_id = current_user.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID not found")
+    sha256 = req.sha256.strip().lower()
+    if not SHA256_RE.match(sha256):
+        raise HTTPException(status_code=400, detail="Geçersiz SHA-256 değeri")
+
+    row = await repositories.pdfs.find_by_sha256(db, user_id, sha256)
+    if row is None:
+        return {"exists": False}
+    return {"exists": True, "file_id": row.id, "filename": row.filename, "file_size": row.file_size}
+
+
+@router.get("/search")
+async def search_files(
+    q: str = Query(..., min_length=2, max_length=200, description="Aranacak ifade (\"tam ifade\", -hariç, or desteklenir)"),
+    limit: int = Query(50, ge=1, le=200, description="En fazla döndürülecek sayfa eşleşmesi"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Kullanıcının kayıtlı PDF'lerinde tam metin arama. Sonuçlar belgeye göre gruplanır;
+    her belgede eşleşen sayfalar puan ve snippet ile döner.
+    Sayfalar, PDF'in arka plan ön hesaplaması bittiğinde aranabilir olur (bkz. artifacts).
+    """
+    user_id = current_user.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID not found")
+    try:
+        rows = await repositories.search.search_pages(db, user_id, q, limit)
+    except Exception as e:
+        logger.error(f"Search error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Arama başarısız")
+    return {"query": q, "results": repositories.search.group_by_document(rows)}
 
 @router.get("/my-files")
 async def get_my_files(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Önceki sayfanın next_cursor değeri"),
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         user_id = current_user.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="User ID not found")
         
-        pdfs = list_user_pdfs(db, user_id)
+        try:
+            after = repositories.pdfs.decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        pdfs, next_cursor = await repositories.pdfs.list_for_user(db, user_id, limit, after)
+        # total: sayfa boyu değil, kullanıcının toplam dosya sayısı (sayfalamadan önceki sözleşme)
+        total = await repositories.pdfs.count_for_user(db, user_id)
         files = [
             {
                 "id": pdf.id,
@@ -938,31 +969,80 @@ async def get_my_files(
             }
             for pdf in pdfs
         ]
-        return {"files": files, "total": len(files)}
+        return {"files": files, "total": total, "next_cursor": next_cursor}
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Get files error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/files/{file_id}/download")
+async def download_file(
+    file_id: str,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Kayıtlı PDF'i indirir. ETag içerik hash'idir (değişmez); Range istekleri desteklenir.
+    Dosya sistemi blob'ları FileResponse ile (sunucu destekliyorsa pathsend/sendfile),
+    DB blob'ları sadece istenen aralık parça parça okunarak akıtılır.
+    """
+    user_id = current_user.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID not found")
+
+    info = await repositories.pdfs.get_download_info(db, file_id, user_id)
+    if not info:
+        raise HTTPException(status_code=404, detail="PDF bulunamadı veya yetkiniz yok")
+
+    etag = f'"{info.sha256}"'
+    filename = info.filename or f"{file_id}.pdf"
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable", "Accept-Ranges": "bytes"}
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    if info.backend == blob_store.BACKEND_FILESYSTEM:
+        # Range / If-Range işlemesi Starlette'te
+        return FileResponse(
+            blob_store.filesystem_store.path(info.sha256),
+            media_type="application/pdf",
+            filename=filename,
+            headers=headers,
+        )
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range == etag:
+        byte_range = blob_store.parse_range(request.headers.get("range"), info.size)
+    start, end = byte_range or (0, info.size - 1)
+
+    headers["Content-Disposition"] = f"attachment; filename*=utf-8''{quote(filename)}"
+    headers["Content-Length"] = str(end - start + 1)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+    return StreamingResponse(
+        repositories.pdfs.iter_db_blob(info.sha256, start, end),
+        status_code=206 if byte_range else 200,
+        media_type="application/pdf",
+        headers=headers,
+    )
+
 @router.delete("/files/{file_id}")
 async def delete_file(
     file_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         user_id = current_user.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="User ID not found")
         
-        # Önce PDF'in kullanıcıya ait olduğunu kontrol et
-        pdf = get_pdf_from_db(db, file_id, user_id)
-        if not pdf:
+        # Sahiplik kontrolü silme sorgusunun koşulunda (başka kullanıcının PDF'i silinmez)
+        if not await repositories.pdfs.delete_owned(db, file_id, user_id):
             raise HTTPException(status_code=404, detail="PDF bulunamadı veya yetkiniz yok")
-        
-        # PDF'i sil
-        delete_pdf_from_db(db, file_id, user_id)
         return {"message": "Silindi", "file_id": file_id}
         
     except HTTPException:
@@ -978,14 +1058,26 @@ async def delete_file(
 
 @router.post("/convert-text")
 async def convert_text_from_pdf(
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    file_id: Optional[str] = Form(None),
+    page_markers: bool = Form(False),
+    output_format: str = Form("text"),
     authorization: Optional[str] = Header(None),
-    supabase: Client = Depends(get_supabase)
+    db: AsyncSession = Depends(get_async_db),
+    tool_pool: PdfToolPool = Depends(get_pdf_tool_pool)
 ):
-    """PDF'den metin çıkarır."""
+    """
+    PDF'den metin çıkarır. Metin havuzda sayfa grupları halinde çıkarılıp akıtılır
+    (tüm belge bellekte tutulmaz).
+    - file_id: yükleme yerine kayıtlı PDF (pdfs.id)
+    - page_markers: her sayfanın önüne "--- Sayfa N ---" satırı ekler
+    - output_format: "text" (varsayılan) veya "ndjson" (her satırda {"page", "text"})
+    """
     print("\n--- CONVERT-TEXT İSTEĞİ ---")
-    if file.content_type != "application/pdf":
+    if file is not None and file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="PDF gerekli")
+    if output_format not in pdf_tools.TEXT_OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail="Geçersiz çıktı formatı (text veya ndjson).")
     
     # USER ID ÇÖZÜMLEME
     user_id = None
@@ -998,35 +1090,70 @@ async def convert_text_from_pdf(
             print(f"✅ Token Çözüldü. User ID: {user_id}")
         except: pass
 
+    # Kayıtlı PDF'in sayfa metinleri ön hesaplandıysa PDF hiç açılmaz
+    ready = None
+    if file is None and file_id is not None:
+        ready = await artifacts.load_ready(db, user_id, file_id)
+    if ready is not None:
+        artifact, filename = ready
+    else:
+        source, filename = await resolve_pdf_input(db, user_id, file, file_id)
+
+    workdir = None
     try:
-        pdf_content = await file.read()
-        reader = PdfReader(io.BytesIO(pdf_content))
-        text = "\n".join([p.extract_text() for p in reader.pages if p.extract_text()])
+        if ready is not None:
+            page_texts = pdf_tools.iter_page_texts(artifact.pages, output_format, page_markers)
+        else:
+            # Havuz süreci dosyayı yoldan açar; ilk sayfa grubu burada beklenir (bozuk PDF -> 400, dolu havuz -> 503)
+            workdir = tempfile.mkdtemp(prefix="convert-text_")
+            [input_path] = await run_in_threadpool(pdf_tools.spool_inputs, [source], workdir)
+            try:
+                page_texts = await pdf_tools.stream_text_chunks(tool_pool, input_path, output_format, page_markers)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
         
-        base_filename = file.filename.replace('.pdf', '') if file.filename else 'document'
+        base_filename = filename.replace('.pdf', '')
+        if output_format == "ndjson":
+            media_type, extension = "application/x-ndjson", "ndjson"
+        else:
+            media_type, extension = "text/plain; charset=utf-8", "txt"
         
         # İSTATİSTİK
         if user_id:
-            await increment_user_usage(user_id, supabase, "tool")
+            await increment_user_usage(user_id, "tool")
 
         return StreamingResponse(
-            io.BytesIO(text.encode('utf-8')),
-            media_type="text/plain",
-            headers={"Content-Disposition": f'attachment; filename="{base_filename}.txt"'}
+            page_texts,
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{base_filename}.{extension}"'},
+            background=BackgroundTask(shutil.rmtree, workdir, ignore_errors=True) if workdir else None,
         )
+    except HTTPException:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+        raise
     except Exception as e:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
         print(f"Hata: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/extract-pages")
 async def extract_pdf_pages(
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    file_id: Optional[str] = Form(None),
     page_range: str = Form(...),
+    save_result: bool = Form(False),
     authorization: Optional[str] = Header(None),
-    supabase: Client = Depends(get_supabase)
+    db: AsyncSession = Depends(get_async_db),
+    tool_pool: PdfToolPool = Depends(get_pdf_tool_pool)
 ):
-    """Sayfa ayıklama."""
+    """
+    Sayfa ayıklama. Girdi yüklenen dosya veya kayıtlı PDF (file_id) olabilir.
+    Sayfa ifadesi sözdizimi (aralık, adım, odd/even, last, n-1, !hariç): bkz. app/page_ranges.py
+    save_result=true ise sonuç indirilmek yerine kullanıcının dosyalarına kaydedilir.
+    """
     logger.debug("EXTRACT-PAGES İSTEĞİ alındı")
     
     # USER ID ÇÖZÜMLEME
@@ -1039,28 +1166,25 @@ async def extract_pdf_pages(
             user_id = payload.get("sub")
             logger.debug(f"Token çözüldü. User ID: {user_id}")
         except: pass
+    require_save_user(save_result, user_id)
 
-    try:
-        reader = PdfReader(io.BytesIO(await file.read()))
-        max_pages = len(reader.pages)
-        indices = parse_page_ranges(page_range, max_pages)
-        
-        if not indices:
-             raise HTTPException(status_code=400, detail="Geçersiz sayfa aralığı.")
+    source, _ = await resolve_pdf_input(db, user_id, file, file_id)
 
-        writer = PdfWriter()
-        for i in indices:
-            writer.add_page(reader.pages[i])
-        
-        out = io.BytesIO()
-        writer.write(out)
-        out.seek(0)
+    try:
+        try:
+            result = await tool_pool.run("extract-pages", pdf_tools.extract_pages, await run_in_threadpool(source.read), page_range)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # İSTATİSTİK
         if user_id:
-            await increment_user_usage(user_id, supabase, "tool")
-            
-        return StreamingResponse(out, media_type="application/pdf", headers={"Content-Disposition": 'attachment; filename="extracted.pdf"'})
+            await increment_user_usage(user_id, "tool")
+
+        if save_result:
+            return await save_tool_result(db, user_id, result, "extracted.pdf")
+        return StreamingResponse(io.BytesIO(result), media_type="application/pdf", headers={"Content-Disposition": 'attachment; filename="extracted.pdf"'})
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Extract pages hatası: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Sunucu hatası")
@@ -1068,13 +1192,22 @@ async def extract_pdf_pages(
 
 @router.post("/merge-pdfs")
 async def merge_pdfs(
-    files: List[UploadFile] = File(...),
+    files: Optional[List[UploadFile]] = File(None),
+    file_ids: Optional[List[str]] = Form(None),
+    save_result: bool = Form(False),
     authorization: Optional[str] = Header(None),
-    supabase: Client = Depends(get_supabase)
+    db: AsyncSession = Depends(get_async_db),
+    tool_pool: PdfToolPool = Depends(get_pdf_tool_pool)
 ):
-    """PDF Birleştirme."""
+    """
+    PDF Birleştirme. Girdiler yüklenen dosyalar ve/veya kayıtlı PDF'ler (file_ids) olabilir;
+    sıra: önce file_ids (verildiği sırayla), ardından yüklenen dosyalar.
+    save_result=true ise sonuç indirilmek yerine kullanıcının dosyalarına kaydedilir.
+    """
     print("\n--- MERGE-PDFS İSTEĞİ ---")
-    if len(files) < 2:
+    files = files or []
+    file_ids = file_ids or []
+    if len(files) + len(file_ids) < 2:
         raise HTTPException(status_code=400, detail="En az 2 PDF gerekli.")
 
     # USER ID ÇÖZÜMLEME
@@ -1087,44 +1220,80 @@ async def merge_pdfs(
             user_id = payload.get("sub")
             print(f"✅ Token Çözüldü. User ID: {user_id}")
         except: pass
-        
+    require_save_user(save_result, user_id)
+
+    return await run_disk_tool(
+        tool_pool, "merge-pdfs", pdf_tools.merge_files, file_ids, files,
+        output_name="merged.pdf", save_result=save_result, user_id=user_id, db=db,
+    )
+
+
+@router.post("/pipeline")
+async def run_pdf_pipeline(
+    operations: str = Form(...),
+    files: Optional[List[UploadFile]] = File(None),
+    file_ids: Optional[List[str]] = Form(None),
+    save_result: bool = Form(False),
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    tool_pool: PdfToolPool = Depends(get_pdf_tool_pool)
+):
+    """
+    Sıralı işlem listesini tek geçişte uygular; PDF bir kez ayrıştırılır ve bir kez yazılır.
+    Girdiler: önce file_ids, ardından yüklenen dosyalar. 0. girdi ana belgedir.
+
+    operations (JSON liste), örn.:
+      [{"op": "extract", "pages": "1-5"},
+       {"op": "merge", "input": 1, "pages": "2-3"},
+       {"op": "reorder", "order": "3,1,2,4,5,6,7"},
+       {"op": "rotate", "pages": "1", "angle": 90},
+       {"op": "delete", "pages": "7"}]
+    """
+    print("\n--- PIPELINE İSTEĞİ ---")
+    files = files or []
+    file_ids = file_ids or []
+    if not files and not file_ids:
+        raise HTTPException(status_code=400, detail="En az 1 PDF gerekli.")
     try:
-        writer = PdfWriter()
-        for f in files:
-            reader = PdfReader(io.BytesIO(await f.read()))
-            for p in reader.pages:
-                writer.add_page(p)
-        
-        out = io.BytesIO()
-        writer.write(out)
-        out.seek(0)
-        
-        # İSTATİSTİK
-        if user_id:
-            await increment_user_usage(user_id, supabase, "tool")
+        ops = pdf_tools.parse_pipeline(operations, input_count=len(files) + len(file_ids))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        return StreamingResponse(out, media_type="application/pdf", headers={"Content-Disposition": 'attachment; filename="merged.pdf"'})
-    except Exception as e:
-        print(f"Hata: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # USER ID ÇÖZÜMLEME
+    user_id = None
+    if authorization:
+        try:
+            token = authorization.split("Bearer ")[1] if "Bearer " in authorization else authorization
+            payload = jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
+            user_id = payload.get("sub")
+            print(f"✅ Token Çözüldü. User ID: {user_id}")
+        except: pass
+    require_save_user(save_result, user_id)
 
-@router.post("/save-processed")
+    return await run_disk_tool(
+        tool_pool, "pipeline", pdf_tools.run_pipeline, file_ids, files, ops,
+        output_name="processed.pdf", save_result=save_result, user_id=user_id, db=db,
+    )
+
+@router.post("/save-processed", openapi_extra=upload_openapi("filename", required=("filename",)))
 async def save_processed_pdf(
-    file: UploadFile = File(...),
-    filename: str = Form(...),
+    request: Request,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
+    user_id = current_user.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID not found")
+
+    # İşlenmiş sonuç tarayıcıda Blob olarak tutulduğu için tipi her zaman gelmeyebilir
+    upload, fields = await ingest_pdf_upload(request, is_guest=False, check_content_type=False)
     try:
-        user_id = current_user.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="User ID not found")
-        
-        # PDF'i oku
-        pdf_content = await file.read()
+        filename = fields.get("filename")
+        if not filename:
+            raise HTTPException(status_code=422, detail="filename alanı zorunlu")
         
         # DB'ye kaydet
-        pdf_record = save_pdf_to_db(db, user_id, pdf_content, filename)
+        pdf_record = await repositories.pdfs.create(db, user_id, upload, filename)
         
         return {
             "file_id": pdf_record.id,
@@ -1137,15 +1306,24 @@ async def save_processed_pdf(
     except Exception as e:
         logger.error(f"Save processed error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        upload.cleanup()
 
 @router.post("/reorder")
 async def reorder_pdf(
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    file_id: Optional[str] = Form(None),
     page_numbers: str = Form(...),
+    save_result: bool = Form(False),
     authorization: Optional[str] = Header(None),
-    supabase: Client = Depends(get_supabase)
+    db: AsyncSession = Depends(get_async_db),
+    tool_pool: PdfToolPool = Depends(get_pdf_tool_pool)
 ):
-    """Sayfa Sıralama."""
+    """
+    Sayfa Sıralama. Girdi yüklenen dosya veya kayıtlı PDF (file_id) olabilir.
+    Sayfa ifadesi sözdizimi (aralık, adım, odd/even, last, n-1, !hariç): bkz. app/page_ranges.py
+    save_result=true ise sonuç indirilmek yerine kullanıcının dosyalarına kaydedilir.
+    """
     print("\n--- REORDER-PDF İSTEĞİ ---")
     
     # USER ID ÇÖZÜMLEME
@@ -1158,27 +1336,25 @@ async def reorder_pdf(
             user_id = payload.get("sub")
             print(f"✅ Token Çözüldü. User ID: {user_id}")
         except: pass
+    require_save_user(save_result, user_id)
+
+    source, _ = await resolve_pdf_input(db, user_id, file, file_id)
 
     try:
-        reader = PdfReader(io.BytesIO(await file.read()))
-        writer = PdfWriter()
-        order = [int(x.strip())-1 for x in page_numbers.split(',')]
-        
-        if any(p < 0 or p >= len(reader.pages) for p in order):
-             raise HTTPException(status_code=400, detail="Hatalı sayfa numarası.")
-
-        for i in order:
-            writer.add_page(reader.pages[i])
-                
-        out = io.BytesIO()
-        writer.write(out)
-        out.seek(0)
+        try:
+            result = await tool_pool.run("reorder", pdf_tools.reorder, await run_in_threadpool(source.read), page_numbers)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # İSTATİSTİK
         if user_id:
-            await increment_user_usage(user_id, supabase, "tool")
-            
-        return StreamingResponse(out, media_type="application/pdf", headers={"Content-Disposition": 'attachment; filename="reordered.pdf"'})
+            await increment_user_usage(user_id, "tool")
+
+        if save_result:
+            return await save_tool_result(db, user_id, result, "reordered.pdf")
+        return StreamingResponse(io.BytesIO(result), media_type="application/pdf", headers={"Content-Disposition": 'attachment; filename="reordered.pdf"'})
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Hata: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1192,7 +1368,7 @@ async def reorder_pdf(
 @router.get("/user/stats", response_model=UserStatsResponse)
 async def get_user_stats(
     current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Giriş yapmış kullanıcının istatistiklerini ve rolünü (Standart, Pro, Admin) getirir."""
     try:
@@ -1201,45 +1377,21 @@ async def get_user_stats(
              raise HTTPException(status_code=401, detail="User ID not found")
 
         # 1. İstatistikleri Çek (user_stats tablosu)
-        summary_count = 0
-        tools_count = 0
-        
-        stats_response = supabase.table("user_stats")\
-            .select("summary_count,tools_count")\
-            .eq("user_id", user_id)\
-            .execute()
-            
-        if stats_response.data:
-            summary_count = stats_response.data[0].get("summary_count", 0)
-            tools_count = stats_response.data[0].get("tools_count", 0)
-
-        # 2. Rol Bilgisini Çek
+        summary_count, tools_count = await repositories.user_stats.get_counts(db, user_id)
+
+        # Henüz user_stats'a yazılmamış (Redis'te bekleyen) artırımlar
+        pending = usage_counters.pending_counts(user_id)
+        summary_count += pending.get("summary_count", 0)
+        tools_count += pending.get("tools_count", 0)
+
+        # 2. Rol Bilgisi (profil önbelleğinden)
         # Varsayılan rol "Standart" olsun
         role_name = "Standart"
         
         try:
-            # users tablosundan role_id'yi bulup, user_roles tablosundan ismini alıyoruz.
-            # Not: Supabase'de Foreign Key kuruluysa şu sorgu çalışır:
-            user_response = supabase.table("users")\
-                .select("user_roles(name)")\
-                .eq("id", user_id)\
-                .execute()
-            
-            # Gelen veri yapısı genellikle şöyledir: [{'user_roles': {'name': 'Pro'}}]
-            if user_response.data:
-                user_data = user_response.data[0]
-                
-                # İlişkili veri obje olarak gelebilir
-                if user_data.get("user_roles"):
-                    roles_data = user_data["user_roles"]
-                    
-                    # Eğer liste ise ilkini al
-                    if isinstance(roles_data, list) and len(roles_data) > 0:
-                        role_name = roles_data[0].get("name", "Standart")
-                    # Eğer sözlük (dict) ise direkt al
-                    elif isinstance(roles_data, dict):
-                        role_name = roles_data.get("name", "Standart")
-                        
+            profile = await run_in_threadpool(user_cache.get_profile, user_id)
+            if profile:
+                role_name = profile["role"]
         except Exception as role_error:
             print(f"⚠️ Rol çekilemedi, varsayılan atandı: {role_error}")
             # Hata olursa 'Standart' olarak kalsın
@@ -1261,35 +1413,13 @@ async def get_user_stats(
 # ==========================================
 
 @router.get("/global-stats")
-def get_global_stats(supabase: Client = Depends(get_supabase)):
+async def get_global_stats():
     """
     Ana sayfa için tüm kullanıcıların toplam istatistiklerini döner.
-    Auth gerektirmez (Public).
+    Auth gerektirmez (Public). Toplamlar artımlı tutulur, süreç içi önbellekten okunur (bkz. global_stats).
     """
     try:
-        # 1. Toplam Kullanıcı Sayısı
-        # count='exact', head=True -> Sadece sayıyı getirir, veriyi çekmez (Hızlıdır)
-        users_response = supabase.table("users").select("*", count="exact", head=True).execute()
-        total_users = users_response.count if users_response.count is not None else 0
-
-        # 2. İşlem Sayılarını Topla
-        # Not: Supabase API'de doğrudan "sum" olmadığı için veriyi çekip Python'da topluyoruz.
-        # İleride veri çok büyürse Supabase RPC (SQL Function) kullanmak gerekir.
-        stats_response = supabase.table("user_stats").select("summary_count, tools_count").execute()
-        
-        total_tools = 0
-        total_ai = 0
-        
-        if stats_response.data:
-            for row in stats_response.data:
-                total_tools += row.get("tools_count", 0)
-                total_ai += row.get("summary_count", 0)
-
-        return {
-            "total_users": total_users,
-            "total_processed": total_tools + total_ai, # Toplam dosya işlemi
-            "total_ai_summaries": total_ai             # Toplam AI işlemi
-        }
+        return await global_stats.cache.get()
 
     except Exception as e:
         print(f"❌ Global stats error: {str(e)}")
@@ -1298,4 +1428,4 @@ def get_global_stats(supabase: Client = Depends(get_supabase)):
             "total_users": 0,
             "total_processed": 0,
             "total_ai_summaries": 0
-        }
\ No newline at end of file
+        }
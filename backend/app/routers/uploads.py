@@ -0,0 +1,117 @@
+# app/routers/uploads.py
+"""
+Devam ettirilebilir (parçalı) PDF yükleme endpoint'leri; protokol için bkz. app/resumable_uploads.py.
+Sonuç, /files/upload ile aynı şekilde kullanıcının dosyalarına kaydedilir.
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import get_async_db
+from ..deps import get_current_user
+from .. import repositories, resumable_uploads
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/files/uploads", tags=["files"])
+
+
+class CreateUploadRequest(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int  # Toplam dosya boyutu (bayt)
+
+
+def _user_id(current_user: dict) -> str:
+    user_id = current_user.get("sub")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID not found")
+    return str(user_id)
+
+
+def _with_offset(response: Response, info: dict) -> dict:
+    response.headers["Upload-Offset"] = str(info["offset"])
+    return info
+
+
+@router.post("", status_code=201)
+async def create_upload(
+    req: CreateUploadRequest,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
+    """Yükleme oturumu açar; boyut sınırı burada kontrol edilir."""
+    info = resumable_uploads.create_session(_user_id(current_user), req.filename, req.size)
+    return _with_offset(response, info)
+
+
+@router.get("/{upload_id}")
+async def get_upload_offset(
+    upload_id: str,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
+    """Sunucunun aldığı bayt sayısı; istemci PUT'a buradan devam eder."""
+    state = resumable_uploads.get_session(upload_id, _user_id(current_user))
+    return _with_offset(response, resumable_uploads.describe(upload_id, state))
+
+
+@router.put(
+    "/{upload_id}",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+        }
+    },
+)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    current_user: dict = Depends(get_current_user),
+):
+    """Ham gövde (application/octet-stream) `Upload-Offset` konumuna yazılır."""
+    info = await resumable_uploads.append_chunk(
+        upload_id, _user_id(current_user), upload_offset, request.stream()
+    )
+    return _with_offset(response, info)
+
+
+@router.post("/{upload_id}/complete")
+async def complete_upload(
+    upload_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Hash'i hesaplar, içeriği blob deposuna kaydeder ve oturumu tamamlandı olarak işaretler.
+    Tekrarlanan istekler aynı kaydı döner (yeni pdfs satırı oluşmaz).
+    """
+    user_id = _user_id(current_user)
+
+    async def save(upload) -> dict:
+        try:
+            pdf_record = await repositories.pdfs.create(db, user_id, upload, upload.filename)
+        except Exception as e:
+            logger.error(f"Resumable upload finalize error: {e}", exc_info=True)
+            await db.rollback()
+            raise HTTPException(status_code=500, detail="Upload failed")
+        return {
+            "file_id": pdf_record.id,
+            "filename": pdf_record.filename or upload.filename,
+            "file_size": pdf_record.file_size,
+        }
+
+    return await resumable_uploads.complete(upload_id, user_id, save)
+
+
+@router.delete("/{upload_id}", status_code=204)
+async def cancel_upload(
+    upload_id: str,
+    current_user: dict = Depends(get_current_user),
+):
+    resumable_uploads.get_session(upload_id, _user_id(current_user))
+    resumable_uploads.discard(upload_id)
+    return Response(status_code=204)
@@ -1,7 +1,9 @@
 # app/routers/user_avatar_routes.py
 
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Body, Form
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional, List
 import base64
@@ -9,7 +11,8 @@ import logging
 from PIL import Image
 import io
 
-from app.db import get_db
+from app.db import get_db, get_async_db
+from app import repositories
 from app.deps import get_current_user
 from app.services.avatar_service import (
     create_storage_path,
@@ -72,7 +75,7 @@ def resolve_user_id(user_id: str, current_user: dict) -> str:
 @router.get("/{user_id}/avatar")
 async def get_avatar(
     user_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user),
 ):
     """
@@ -81,14 +84,13 @@ async def get_avatar(
     # 1. Kullanıcı kimliği doğrulama ('me' kontrolü)
     target_user_id = resolve_user_id(user_id, current_user)
     
-    # 2. Users tablosundan kullanıcıyı bul
-    from app.models import User
-    user = db.query(User).filter(User.id == target_user_id).first()
-    if not user:
+    # 2. Users tablosundan aktif avatar yolunu al
+    found, active_avatar_url = await repositories.users.get_active_avatar_url(db, target_user_id)
+    if not found:
         raise HTTPException(status_code=404, detail="User not found")
         
     # 3. Aktif avatar yolunu kontrol et
-    if not user.active_avatar_url:
+    if not active_avatar_url:
         # Varsayılan avatar yoksa 404 döner (Frontend varsayılanı gösterir)
         raise HTTPException(status_code=404, detail="Active avatar not set")
 
@@ -98,10 +100,10 @@ async def get_avatar(
     
     try:
         # Path'i loglayalım (debug için)
-        logger.info(f"Downloading active avatar for {target_user_id}: {user.active_avatar_url}")
+        logger.info(f"Downloading active avatar for {target_user_id}: {active_avatar_url}")
         
-        # 'avatars' bucket'ından dosyayı indir
-        avatar_data = supabase.storage.from_("avatars").download(user.active_avatar_url)
+        # 'avatars' bucket'ından dosyayı indir (sync istemci, event loop'u bloklamasın)
+        avatar_data = await run_in_threadpool(supabase.storage.from_("avatars").download, active_avatar_url)
         
         # Supabase hata dönerse (dict dönebilir)
         if isinstance(avatar_data, dict) and avatar_data.get("error"):
@@ -120,26 +122,16 @@ async def get_avatar(
 @router.get("/{user_id}/avatars")
 async def get_avatar_history(
     user_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user),
     limit: int = 10,
 ):
     target_user_id = resolve_user_id(user_id, current_user)
     
-    from app.models import User
-    from sqlalchemy import desc
-    
-    user = db.query(User).filter(User.id == target_user_id).first()
-    if not user:
+    if not await repositories.users.exists(db, target_user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    avatars = (
-        db.query(UserAvatar)
-        .filter(UserAvatar.user_id == target_user_id)
-        .order_by(desc(UserAvatar.created_at))
-        .limit(limit)
-        .all()
-    )
+    avatars = await repositories.avatars.list_recent(db, target_user_id, limit)
     
     return [
         AvatarResponse(
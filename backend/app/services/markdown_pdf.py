@@ -0,0 +1,291 @@
+# app/services/markdown_pdf.py
+"""
+Markdown -> PDF oluşturucu (özet indirme).
+
+Stiller, tablo stili ve satır içi markdown regex'leri modül yüklenirken bir kez
+hazırlanır; istek başına yalnızca belge akışı (story) kurulur. Üretilen PDF'ler
+markdown + TEMPLATE_VERSION hash'i ile bayt bütçeli bir LRU önbellekte tutulur,
+aynı özetin tekrar indirilmesi yeniden oluşturma gerektirmez.
+
+Önbellek yalnızca tekrar indirmeleri hızlandırır. İlk oluşturmada süreyi reportlab
+yerleşimi (paragraf ayrıştırma, satır kırma, tablo çizimi) belirler; stil kurulumu
+ihmal edilebilir. reportlab'in C hızlandırıcısı (rl_accel, requirements.txt) yüklü
+değilse metin genişliği ve sayı biçimlendirme saf Python'a düşer ve ilk oluşturma
+belirgin biçimde yavaşlar.
+
+Stillerde veya yerleşimde görünür bir değişiklik yapılırsa TEMPLATE_VERSION artırılmalı.
+"""
+import hashlib
+import html
+import io
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_VERSION = "1"
+
+# ==========================================
+# FONT AYARLARI (Source Sans Pro)
+# ==========================================
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+fonts_dir = os.path.join(backend_dir, "fonts", "Source_Sans_Pro")
+
+regular_font_path = os.path.join(fonts_dir, "SourceSansPro-Regular.ttf")
+bold_font_path = os.path.join(fonts_dir, "SourceSansPro-Bold.ttf")
+
+FONT_NAME_REGULAR = "Helvetica"
+FONT_NAME_BOLD = "Helvetica-Bold"
+
+try:
+    if os.path.exists(regular_font_path):
+        pdfmetrics.registerFont(TTFont('SourceSansPro-Regular', regular_font_path))
+        FONT_NAME_REGULAR = 'SourceSansPro-Regular'
+        logger.info(f"Normal Font Yüklendi: {regular_font_path}")
+
+    if os.path.exists(bold_font_path):
+        pdfmetrics.registerFont(TTFont('SourceSansPro-Bold', bold_font_path))
+        FONT_NAME_BOLD = 'SourceSansPro-Bold'
+        logger.info(f"Kalın Font Yüklendi: {bold_font_path}")
+    else:
+        if FONT_NAME_REGULAR != "Helvetica":
+            FONT_NAME_BOLD = FONT_NAME_REGULAR
+
+except Exception as e:
+    logger.warning(f"Font yükleme hatası: {e}", exc_info=True)
+
+# ==========================================
+# STİLLER (bir kez oluşturulur)
+# ==========================================
+
+MARGIN = 40
+AVAILABLE_WIDTH = A4[0] - 2 * MARGIN
+
+
+def _build_styles() -> dict:
+    base = getSampleStyleSheet()
+
+    # Normal Metin
+    normal = ParagraphStyle(
+        'TrNormal', parent=base['Normal'], fontName=FONT_NAME_REGULAR,
+        fontSize=10, leading=14, spaceAfter=6
+    )
+    return {
+        "normal": normal,
+        # Başlık 1 (#) - Koyu Lacivert
+        "h1": ParagraphStyle(
+            'TrHeading1', parent=base['Heading1'], fontName=FONT_NAME_BOLD,
+            fontSize=16, leading=20, spaceAfter=12, spaceBefore=12, textColor=colors.HexColor("#1a365d")
+        ),
+        # Başlık 2 (##) - Koyu Gri/Mavi
+        "h2": ParagraphStyle(
+            'TrHeading2', parent=base['Heading2'], fontName=FONT_NAME_BOLD,
+            fontSize=13, leading=16, spaceAfter=10, spaceBefore=6, textColor=colors.HexColor("#2c3e50")
+        ),
+        # Başlık 3 (### ve sonrası) - Daha küçük gri başlık
+        "h3": ParagraphStyle(
+            'TrHeading3', parent=base['Heading3'], fontName=FONT_NAME_BOLD,
+            fontSize=11, leading=14, spaceAfter=8, spaceBefore=4, textColor=colors.HexColor("#34495e")
+        ),
+        # Liste Maddesi
+        "bullet": ParagraphStyle(
+            'TrBullet', parent=normal, leftIndent=20, bulletIndent=10, spaceAfter=4
+        ),
+        # Tablo Hücresi
+        "cell": ParagraphStyle(
+            'TableCell', parent=normal, fontName=FONT_NAME_REGULAR, fontSize=9, leading=11, spaceAfter=0
+        ),
+        # Tablo Başlık Hücresi
+        "cell_header": ParagraphStyle(
+            'TableCellHeader', parent=normal, fontName=FONT_NAME_BOLD, fontSize=9, leading=11,
+            textColor=colors.white, spaceAfter=0
+        ),
+    }
+
+
+STYLES = _build_styles()
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#1a365d")),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor("#f8f9fa")]),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    # Tablo Fontları
+    ('FONTNAME', (0, 0), (-1, -1), FONT_NAME_REGULAR),
+    ('FONTNAME', (0, 0), (-1, 0), FONT_NAME_BOLD),
+])
+
+# ==========================================
+# REGEX'LER (derlenmiş)
+# ==========================================
+
+_BOLD_RE = re.compile(r'\*\*(.*?)\*\*')
+_ITALIC_RE = re.compile(r'\*(.*?)\*')
+_CODE_RE = re.compile(r'`(.*?)`')
+_TABLE_SEPARATOR_RE = re.compile(r'^[\s\-:]+$')
+_HEADER_RE = re.compile(r'^(#{1,6})\s+(.*)')
+_ROMAN_RE = re.compile(r'^[IVX]+\.')
+_LETTER_RE = re.compile(r'^[A-Z]\.')
+_BULLET_PREFIX_RE = re.compile(r'^[\-\*\•]\s*')
+
+
+def format_inline_markdown(text: str) -> str:
+    """Satır içi markdown'u (kalın, italik, kod) ReportLab işaretlemesine çevirir."""
+    if not text:
+        return ""
+    # HTML karakterlerini bozmamak için escape et
+    text = html.escape(text)
+    text = _BOLD_RE.sub(r'<b>\1</b>', text)
+    text = _ITALIC_RE.sub(r'<i>\1</i>', text)
+    # Kod blokları genelde Courier kalır
+    return _CODE_RE.sub(r'<font face="Courier" color="#e74c3c">\1</font>', text)
+
+
+def _table(rows: list) -> Table:
+    col_count = max(len(row) for row in rows)
+    t = Table(rows, colWidths=[AVAILABLE_WIDTH / col_count] * col_count)
+    t.setStyle(TABLE_STYLE)
+    return t
+
+
+def _build_story(markdown: str, styles: dict) -> list:
+    story = []
+    table_buffer = []
+
+    for line in markdown.split('\n'):
+        original_line = line.strip()
+
+        # --- A) TABLO İŞLEME ---
+        if original_line.startswith('|'):
+            cells = [c.strip() for c in original_line.split('|')]
+            if len(cells) > 1 and cells[0] == '': cells.pop(0)
+            if len(cells) > 0 and cells[-1] == '': cells.pop(-1)
+
+            is_separator = all(_TABLE_SEPARATOR_RE.match(c) for c in cells)
+            if not is_separator and cells:
+                cell_style = styles["cell_header"] if not table_buffer else styles["cell"]
+                table_buffer.append([Paragraph(format_inline_markdown(cell), cell_style) for cell in cells])
+            continue
+
+        if table_buffer:
+            story.append(_table(table_buffer))
+            story.append(Spacer(1, 12))
+            table_buffer = []
+
+        if not original_line:
+            continue
+
+        # --- B) METİN VE BAŞLIK İŞLEME ---
+        header_match = _HEADER_RE.match(original_line)
+        if header_match:
+            level = len(header_match.group(1))
+            style = styles["h1"] if level == 1 else styles["h2"] if level == 2 else styles["h3"]
+            story.append(Paragraph(format_inline_markdown(header_match.group(2)), style))
+        elif _ROMAN_RE.match(original_line):
+            story.append(Paragraph(format_inline_markdown(original_line), styles["h1"]))
+        elif _LETTER_RE.match(original_line):
+            story.append(Paragraph(format_inline_markdown(original_line), styles["h2"]))
+        elif original_line.startswith(('-', '*', '•')):
+            clean_text = _BULLET_PREFIX_RE.sub('', format_inline_markdown(original_line))
+            story.append(Paragraph(f"• {clean_text}", styles["bullet"]))
+        else:
+            story.append(Paragraph(format_inline_markdown(original_line), styles["normal"]))
+
+    # --- C) DOSYA SONU KONTROLÜ ---
+    if table_buffer:
+        story.append(_table(table_buffer))
+    return story
+
+
+def render(markdown: str, styles: dict = STYLES) -> bytes:
+    """Markdown metnini PDF'e çevirir (önbelleksiz, CPU'ya bağlı; threadpool'da çağrılmalı)."""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4, rightMargin=MARGIN, leftMargin=MARGIN, topMargin=MARGIN, bottomMargin=MARGIN
+    )
+    doc.build(_build_story(markdown, styles))
+    return buffer.getvalue()
+
+
+# ==========================================
+# ÖNBELLEK
+# ==========================================
+
+def cache_key(markdown: str) -> str:
+    return hashlib.sha256(f"{TEMPLATE_VERSION}\0{markdown}".encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """Toplam bayt bütçesiyle sınırlı, iş parçacığı güvenli LRU önbellek."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+cache = RenderCache(settings.MARKDOWN_PDF_CACHE_MB * 1024 * 1024)
+
+
+def render_cached(markdown: str) -> Tuple[bytes, str, bool]:
+    """Returns: (pdf, önbellek anahtarı, önbellekten mi geldi)"""
+    key = cache_key(markdown)
+    pdf = cache.get(key)
+    if pdf is not None:
+        return pdf, key, True
+    pdf = render(markdown)
+    cache.put(key, pdf)
+    return pdf, key, False
@@ -1,11 +1,17 @@
 from pathlib import Path
 from fastapi import UploadFile, HTTPException
-from typing import Optional
+from typing import BinaryIO, Optional
+import hashlib
+import tempfile
+import time
 import uuid
 import os
 import logging
-from sqlalchemy.orm import Session  # ✅ Import eklendi
-from .models import UserAvatar, User, PDF
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, joinedload  # ✅ Import eklendi
+from .models import UserAvatar, User, PDF, PdfArtifact, PdfBlob
+from . import artifacts, blob_store
 
 # Logger kurulumu ✅
 logger = logging.getLogger(__name__)
@@ -13,9 +19,13 @@ logger = logging.getLogger(__name__)
 class StorageService:
     """Yerel dosya sistemi depolama servisi (PDF ve Dokümanlar için)"""
     
+    HANDOFF_DIR = "handoff"
+    HANDOFF_SWEEP_INTERVAL_SECONDS = 300
+    
     def __init__(self):
         self.base_dir = Path(__file__).parent.parent / "uploads"
         self.base_dir.mkdir(exist_ok=True, parents=True)
+        self._last_handoff_sweep = 0.0
         logger.info(f"Storage initialized at: {self.base_dir.absolute()}")
     
     @staticmethod
@@ -78,6 +88,50 @@ class StorageService:
             logger.error(f"Storage upload error: {e}", exc_info=True)
             raise HTTPException(status_code=500, detail="Upload failed")
 
+    def spool_for_handoff(self, source: BinaryIO) -> str:
+        """
+        Yüklenen dosyayı AI Service ile paylaşılan volume'e (uploads/handoff) bir kez yazar.
+        Dosya adı içerik hash'idir; aynı belge tekrar gelirse yeniden yazılmaz.
+        Returns: volume köküne göre göreli yol (örn. "handoff/<sha256>.pdf")
+        """
+        handoff_dir = self.base_dir / self.HANDOFF_DIR
+        handoff_dir.mkdir(exist_ok=True, parents=True)
+        self._sweep_handoff_dir(handoff_dir)
+
+        digest = hashlib.sha256()
+        source.seek(0)
+        with tempfile.NamedTemporaryFile(dir=handoff_dir, suffix=".part", delete=False) as tmp:
+            for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                digest.update(chunk)
+                tmp.write(chunk)
+        source.seek(0)
+
+        final_path = handoff_dir / f"{digest.hexdigest()}.pdf"
+        if final_path.exists():
+            os.remove(tmp.name)
+            os.utime(final_path)  # TTL temizliğinde yeni sayılsın
+        else:
+            os.replace(tmp.name, final_path)
+        return f"{self.HANDOFF_DIR}/{final_path.name}"
+
+    def _sweep_handoff_dir(self, handoff_dir: Path):
+        """Süresi dolan devir dosyalarını temizler (en fazla HANDOFF_SWEEP_INTERVAL_SECONDS'de bir)."""
+        from .config import settings
+
+        now = time.time()
+        if now - self._last_handoff_sweep < self.HANDOFF_SWEEP_INTERVAL_SECONDS:
+            return
+        self._last_handoff_sweep = now
+
+        for entry in os.scandir(handoff_dir):
+            try:
+                if now - entry.stat().st_mtime > settings.AI_HANDOFF_TTL_SECONDS:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Handoff cleanup failed for {entry.path}: {e}")
+
 # Singleton instance
 storage_service = StorageService()
 
@@ -129,23 +183,58 @@ def get_active_avatar(db: Session, user_id: str):
 # PDF (BLOB - DB) SİSTEMİ
 # ==========================================
 
+def blob_lock_query(sha256: str):
+    """Var olan blob'u işlem sonuna kadar kilitler (eşzamanlı silmede GC'ye karşı)."""
+    return select(PdfBlob.sha256).where(PdfBlob.sha256 == sha256).with_for_update()
+
+
+def blob_insert_statement(sha256: str, size: int, backend: str, data: Optional[bytes] = None):
+    """
+    Blob satırını ekler; aynı anda başka işlem eklediyse satırı kilitleyip devam eder.
+    Dosya sistemi arka ucunda içerik satıra değil diske yazılır (blob_store.store_content/store_file).
+    """
+    stmt = insert(PdfBlob).values(
+        sha256=sha256,
+        backend=backend,
+        data=data if backend == blob_store.BACKEND_DB else None,
+        size=size,
+    )
+    return stmt.on_conflict_do_update(index_elements=[PdfBlob.sha256], set_={"sha256": stmt.excluded.sha256})
+
+
+def artifact_enqueue_statement(sha256: str):
+    """Yeni blob için arka plan ön hesaplamasını kuyruğa alır (bkz. artifacts)."""
+    return insert(PdfArtifact).values(sha256=sha256).on_conflict_do_nothing(index_elements=[PdfArtifact.sha256])
+
+
+def new_pdf_record(user_id: str, sha256: str, file_size: int, filename: Optional[str]) -> PDF:
+    return PDF(
+        id=str(uuid.uuid4()),
+        user_id=user_id,
+        blob_sha256=sha256,
+        filename=StorageService.sanitize_filename(filename) if filename else None,
+        file_size=file_size
+    )
+
+
 def save_pdf_to_db(db: Session, user_id: str, pdf_bytes: bytes, filename: Optional[str] = None) -> PDF:
-    """PDF dosyasını veritabanında BLOB olarak saklar."""
+    """
+    PDF'i içerik adresli blob olarak saklar. Aynı içerik zaten varsa bayt tekrar
+    gönderilmez/yazılmaz; sadece yeni bir pdfs satırı blob'a bağlanır (ref_count trigger ile artar).
+    """
     try:
-        pdf_id = str(uuid.uuid4())
-        file_size = len(pdf_bytes)
-        safe_filename = StorageService.sanitize_filename(filename) if filename else None
-        
-        new_pdf = PDF(
-            id=pdf_id,
-            user_id=user_id,
-            pdf_data=pdf_bytes,
-            filename=safe_filename,
-            file_size=file_size
-        )
+        sha256 = hashlib.sha256(pdf_bytes).hexdigest()
+        if db.scalar(blob_lock_query(sha256)) is None:
+            backend = blob_store.current_backend()
+            db.execute(blob_insert_statement(sha256, len(pdf_bytes), backend, pdf_bytes))
+            db.execute(artifact_enqueue_statement(sha256))
+            blob_store.store_content(backend, sha256, pdf_bytes)
+
+        new_pdf = new_pdf_record(user_id, sha256, len(pdf_bytes), filename)
         db.add(new_pdf)
         db.commit()
         db.refresh(new_pdf)
+        artifacts.notify()
         return new_pdf
     except Exception as e:
         db.rollback()
@@ -156,7 +245,8 @@ def save_pdf_to_db(db: Session, user_id: str, pdf_bytes: bytes, filename: Option
 def get_pdf_from_db(db: Session, pdf_id: str, user_id: Optional[str] = None) -> Optional[PDF]:
     """PDF dosyasını veritabanından getirir."""
     try:
-        query = db.query(PDF).filter(PDF.id == pdf_id)
+        # İçerik okunacağı için blob aynı sorguda yüklenir
+        query = db.query(PDF).options(joinedload(PDF.blob).undefer(PdfBlob.data)).filter(PDF.id == pdf_id)
         if user_id:
             query = query.filter(PDF.user_id == user_id)
         return query.first()
@@ -0,0 +1,103 @@
+# app/summary_jobs.py
+"""
+Ön kontrolde büyük bulunup Celery'ye yönlendirilen özet işleri (bkz. preflight).
+
+AI Service görevleri ve callback'leri tamsayı `pdf_id` taşır; bu yüzden iş numarası
+Redis INCR ile üretilir. İstemciye verilen kimlik "<numara>-<gizli>" biçimindedir:
+numara tahmin edilebilir olduğundan sorgulama gizli kısım olmadan yapılamaz
+(misafir kullanıcıların da işi olabildiği için kimlik doğrulaması yerine).
+Callback'ler de ayrı bir gizli anahtarla (callback URL'sinde) doğrulanır; aksi halde
+herkes numaraları sayarak işlerin sonucunu değiştirebilirdi.
+Kayıtlar SUMMARY_JOB_TTL_SECONDS sonra Redis'ten düşer.
+"""
+import hmac
+import secrets
+import time
+from typing import Optional
+
+from .config import settings
+from .redis_client import redis_client
+
+SEQ_KEY = "summary_job:seq"
+KEY_PREFIX = "summary_job:"
+
+STATUS_PROCESSING = "processing"
+
+
+def _key(number: int) -> str:
+    return f"{KEY_PREFIX}{number}"
+
+
+def available() -> bool:
+    return redis_client is not None
+
+
+def create(user_id: Optional[str], filename: str) -> tuple[int, str, str]:
+    """Returns: (AI Service'e giden iş numarası, istemciye dönen iş kimliği, callback anahtarı)"""
+    number = redis_client.incr(SEQ_KEY)
+    secret = secrets.token_urlsafe(16)
+    callback_secret = secrets.token_urlsafe(16)
+    pipe = redis_client.pipeline()
+    pipe.hset(_key(number), mapping={
+        "secret": secret,
+        "callback_secret": callback_secret,
+        "user_id": user_id or "",
+        "filename": filename,
+        "status": STATUS_PROCESSING,
+        "created_at": int(time.time()),
+    })
+    pipe.expire(_key(number), settings.SUMMARY_JOB_TTL_SECONDS)
+    pipe.execute()
+    return number, f"{number}-{secret}", callback_secret
+
+
+def discard(number: int) -> None:
+    """AI Service'e devredilemeyen işi siler (istemciye kimlik hiç dönmedi)."""
+    redis_client.delete(_key(number))
+
+
+def get(job_id: str) -> Optional[dict]:
+    """İş kimliği geçersiz, gizli kısım yanlış veya süresi dolmuşsa None."""
+    number, _, secret = job_id.partition("-")
+    if not number.isdigit() or not secret or redis_client is None:
+        return None
+    record = redis_client.hgetall(_key(int(number)))
+    if not record or not hmac.compare_digest(record.get("secret", ""), secret):
+        return None
+    return {
+        "job_id": job_id,
+        "status": record["status"],
+        "filename": record.get("filename"),
+        "summary": record.get("summary"),
+        "error": record.get("error"),
+    }
+
+
+def complete(number: int, callback_secret: str, status: str, summary: Optional[str], error: Optional[str]) -> bool:
+    """AI Service callback'i. Returns: False -> iş yok (süresi dolmuş) veya callback anahtarı yanlış"""
+    key = _key(number)
+    if redis_client is None:
+        return False
+    expected = redis_client.hget(key, "callback_secret")
+    if expected is None or not hmac.compare_digest(expected, callback_secret):
+        return False
+    fields = {"status": status}
+    if status == "completed":
+        fields["summary"] = summary or ""
+    else:
+        fields["error"] = error or ""
+    redis_client.hset(key, mapping=fields)
+    return True
+
+
+def claim_usage(number: int) -> Optional[str]:
+    """
+    Tamamlanan iş için kullanım bir kez sayılır (callback'ler yeniden denenebilir).
+    Returns: sayılacak kullanıcı; iş tamamlanmamışsa, misafirse veya zaten sayıldıysa None
+    """
+    key = _key(number)
+    if redis_client.hget(key, "status") != "completed":
+        return None
+    if not redis_client.hsetnx(key, "usage_recorded", 1):
+        return None
+    return redis_client.hget(key, "user_id") or None
@@ -0,0 +1,268 @@
+# app/usage_counters.py
+"""
+Kullanıcı kullanım sayaçları (user_stats) için write-behind katmanı.
+
+İstek yolunda sadece Redis'te atomik HINCRBY yapılır; arka plandaki
+`flush_loop` biriken sayaçları belirli aralıklarla toplu ve atomik tek bir
+UPSERT ile `user_stats` tablosuna ekler. Böylece istek süresine istatistik
+yazımı girmez ve aynı kullanıcıya eşzamanlı artırımlar kaybolmaz.
+
+Redis yoksa artırım doğrudan (tek satırlık) UPSERT ile yazılır.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+
+from . import global_stats
+from .config import settings
+from .models import UserStats
+from .redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "usage:pending:{}"
+DIRTY_KEY = "usage:dirty"
+COUNT_COLUMNS = ("summary_count", "tools_count")
+
+# Global istatistik uzlaştırması sırasında yeni flush başlamaz (bkz. pause_flushes).
+# Süren flush'lar sorted set'te bitiş süresiyle tutulur; çöken süreçlerinki süre dolunca düşer.
+FLUSH_PAUSE_KEY = "usage:flush_paused"
+FLUSHING_KEY = "usage:flushing"
+FLUSH_MARKER_SECONDS = 60
+
+_stats = {"flushed_rows": 0, "flush_errors": 0, "dropped_rows": 0, "last_flush_at": None}
+
+
+def column_for(operation_type: str) -> str:
+    return "summary_count" if operation_type == "summary" else "tools_count"
+
+
+def record_usage(user_id: str, operation_type: str) -> bool:
+    """
+    Sayacı Redis'te artırır.
+    Returns: False -> Redis kullanılamadı, çağıran doğrudan yazmalı
+    """
+    if redis_client is None:
+        return False
+    key = PENDING_KEY.format(user_id)
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hincrby(key, column_for(operation_type), 1)
+        pipe.hset(key, "last_activity", datetime.now(timezone.utc).isoformat())
+        pipe.sadd(DIRTY_KEY, user_id)
+        global_stats.adjust(pipe, **{"summaries" if operation_type == "summary" else "tools": 1})
+        pipe.execute()
+        return True
+    except Exception as e:
+        logger.warning(f"Usage counter Redis write failed, falling back to DB: {e}")
+        return False
+
+
+def pending_counts(user_id: str) -> Dict[str, int]:
+    """Henüz DB'ye yazılmamış sayaçlar (okuma anında DB değerine eklenir)."""
+    if redis_client is None:
+        return {}
+    try:
+        data = redis_client.hmget(PENDING_KEY.format(user_id), *COUNT_COLUMNS)
+        return {col: int(val) for col, val in zip(COUNT_COLUMNS, data) if val}
+    except Exception as e:
+        logger.warning(f"Pending usage read failed: {e}")
+        return {}
+
+
+def pause_flushes(timeout: float, pause_seconds: int) -> bool:
+    """
+    Yeni flush'ları durdurur ve sürenlerin bitmesini bekler.
+    Flush sırasında sayaçlar Redis'ten alınmış ama henüz DB'ye yazılmamıştır; bu arada
+    DB + bekleyen toplamı okunursa artırımlar kaybolur veya iki kez sayılır.
+    Returns: False -> süre içinde bitmeyen flush var (çağıran resume_flushes çağırmalı)
+    """
+    redis_client.set(FLUSH_PAUSE_KEY, "1", ex=pause_seconds)
+    deadline = time.monotonic() + timeout
+    while True:
+        redis_client.zremrangebyscore(FLUSHING_KEY, "-inf", time.time())
+        if not redis_client.zcard(FLUSHING_KEY):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+
+
+def resume_flushes() -> None:
+    redis_client.delete(FLUSH_PAUSE_KEY)
+
+
+def _begin_flush() -> Optional[str]:
+    """Flush'ı kaydeder; uzlaştırma sürüyorsa None. Kayıt, duraklatma kontrolünden önce yapılır."""
+    token = uuid.uuid4().hex
+    redis_client.zadd(FLUSHING_KEY, {token: time.time() + FLUSH_MARKER_SECONDS})
+    if redis_client.exists(FLUSH_PAUSE_KEY):
+        redis_client.zrem(FLUSHING_KEY, token)
+        return None
+    return token
+
+
+def _row(user_id: str, data: dict) -> dict:
+    last_activity = data.get("last_activity")
+    return {
+        "user_id": user_id,
+        "summary_count": int(data.get("summary_count", 0)),
+        "tools_count": int(data.get("tools_count", 0)),
+        "last_activity": datetime.fromisoformat(last_activity) if last_activity else datetime.now(timezone.utc),
+    }
+
+
+def _upsert_statement(rows: List[dict]):
+    stmt = insert(UserStats).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={
+            "summary_count": UserStats.summary_count + stmt.excluded.summary_count,
+            "tools_count": UserStats.tools_count + stmt.excluded.tools_count,
+            "last_activity": func.greatest(UserStats.last_activity, stmt.excluded.last_activity),
+        },
+    )
+
+
+def upsert_usage_rows(rows: List[dict]) -> None:
+    """Sayaçları tek bir atomik UPSERT ile ekler. Silinmiş kullanıcıların satırları atlanır."""
+    from .db import SessionLocal
+
+    with SessionLocal() as db:
+        try:
+            db.execute(_upsert_statement(rows))
+            db.commit()
+            return
+        except IntegrityError:
+            db.rollback()
+            if len(rows) == 1:
+                raise
+
+        # Toplu yazımı bozan satırı (ör. hesap silinmiş) bulmak için tek tek dene
+        for row in rows:
+            try:
+                db.execute(_upsert_statement([row]))
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                _stats["dropped_rows"] += 1
+                logger.warning(f"Usage counters dropped for missing user: {row['user_id']}")
+
+
+def write_usage_directly(user_id: str, operation_type: str) -> None:
+    """Redis yokken kullanılan senkron yol (tek satırlık UPSERT)."""
+    row = {"user_id": user_id, "summary_count": 0, "tools_count": 0, "last_activity": datetime.now(timezone.utc)}
+    row[column_for(operation_type)] = 1
+    try:
+        upsert_usage_rows([row])
+    except Exception as e:
+        logger.error(f"İstatistik güncellenemedi: {e}", exc_info=True)
+
+
+def _restore(rows: List[dict]) -> None:
+    """DB yazımı başarısız olursa sayaçları Redis'e geri koyar (sonraki turda tekrar denenir)."""
+    pipe = redis_client.pipeline(transaction=False)
+    for row in rows:
+        key = PENDING_KEY.format(row["user_id"])
+        for col in COUNT_COLUMNS:
+            if row[col]:
+                pipe.hincrby(key, col, row[col])
+        pipe.hsetnx(key, "last_activity", row["last_activity"].isoformat())
+        pipe.sadd(DIRTY_KEY, row["user_id"])
+    pipe.execute()
+
+
+def flush_pending(batch_size: int = None) -> int:
+    """
+    Bekleyen sayaçların bir grubunu DB'ye yazar.
+    Her kullanıcının hash'i tek MULTI içinde okunup silinir; yeni artırımlar yeni hash'e düşer.
+    Returns: yazılan satır sayısı
+    """
+    return _flush_round(batch_size)[1]
+
+
+def _flush_round(batch_size: int = None) -> tuple[int, int]:
+    """
+    Returns: (kuyruktan kalıcı olarak çıkan kullanıcı sayısı, yazılan satır sayısı).
+    İlki 0 ise ilerleme yoktur: kuyruk boş, flush'lar duraklatılmış veya yazım başarısız.
+    """
+    if redis_client is None:
+        return 0, 0
+    token = _begin_flush()
+    if token is None:
+        return 0, 0
+    try:
+        return _flush_batch(batch_size or settings.USAGE_FLUSH_BATCH_SIZE)
+    finally:
+        redis_client.zrem(FLUSHING_KEY, token)
+
+
+def _flush_batch(batch_size: int) -> tuple[int, int]:
+    user_ids = redis_client.spop(DIRTY_KEY, batch_size)
+    if not user_ids:
+        return 0, 0
+
+    pipe = redis_client.pipeline(transaction=True)
+    for user_id in user_ids:
+        key = PENDING_KEY.format(user_id)
+        pipe.hgetall(key)
+        pipe.delete(key)
+    results = pipe.execute()
+
+    rows = [_row(user_id, data) for user_id, data in zip(user_ids, results[::2]) if data]
+    if not rows:
+        return len(user_ids), 0
+
+    try:
+        upsert_usage_rows(rows)
+    except Exception as e:
+        _stats["flush_errors"] += 1
+        logger.error(f"Usage flush failed, {len(rows)} rows returned to Redis: {e}", exc_info=True)
+        _restore(rows)
+        return 0, 0
+
+    _stats["flushed_rows"] += len(rows)
+    _stats["last_flush_at"] = time.time()
+    return len(user_ids), len(rows)
+
+
+def flush_all() -> int:
+    """
+    Kuyruk boşalana kadar yazar (kapanışta çağrılır).
+    Yazılacak satırı olmayan grup (sayaçları boş kullanıcılar) döngüyü bitirmez;
+    sadece kuyruktan hiç kullanıcı çıkmadığında durulur.
+    """
+    total = 0
+    while True:
+        popped, written = _flush_round()
+        total += written
+        if not popped:
+            return total
+
+
+async def flush_loop() -> None:
+    """Lifespan'de başlatılan arka plan görevi."""
+    while True:
+        await asyncio.sleep(settings.USAGE_FLUSH_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(flush_all)
+        except Exception as e:
+            logger.error(f"Usage flush loop error: {e}", exc_info=True)
+
+
+def get_stats() -> dict:
+    stats = dict(_stats)
+    if redis_client is not None:
+        try:
+            stats["pending_users"] = redis_client.scard(DIRTY_KEY)
+        except Exception:
+            pass
+    return stats
@@ -0,0 +1,146 @@
+# app/user_cache.py
+"""
+Kullanıcı profili, rolü ve LLM tercihi için okuma önbelleği (read-through).
+
+Bu değerler nadiren değişir ama her özet isteğinde, `/files/user/stats` ve
+`/auth/me` çağrılarında DB'den okunuyordu. Profil tek bir sorguyla (rol adı
+JOIN ile) yüklenir ve süreç içi TTL'li bir LRU'da tutulur.
+
+Tutarlılık: profili değiştiren endpoint'ler `invalidate(user_id)` çağırır; yerel
+kayıt silinir ve Redis kanalına yayın yapılır. Her worker lifespan'de kanalı
+dinler ve kendi kopyasını düşürür. Redis yoksa yalnızca yerel silme ve TTL kalır.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import select
+
+from .config import settings
+from .redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "user_cache:invalidate"
+
+DEFAULT_ROLE = "Standart"
+
+
+class UserProfileCache:
+    """TTL'li, iş parçacığı güvenli LRU (sync handler'lar threadpool'da çalışır)."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._items[user_id]
+                self.misses += 1
+                return None
+            self._items.move_to_end(user_id)
+            self.hits += 1
+            return item[1]
+
+    def put(self, user_id: str, profile: dict) -> None:
+        with self._lock:
+            self._items[user_id] = (time.monotonic() + self.ttl, profile)
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def discard(self, user_id: str) -> None:
+        with self._lock:
+            if self._items.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+cache = UserProfileCache(settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS)
+
+
+def _load_profile(user_id: str) -> Optional[dict]:
+    """Profil + rol adı tek sorguda."""
+    from .db import SessionLocal
+    from .models import User, UserRole
+
+    with SessionLocal() as db:
+        row = db.execute(
+            select(
+                User.id, User.email, User.username, User.provider, User.eula_accepted,
+                User.created_at, User.llm_choice_id, UserRole.name.label("role"),
+            )
+            .outerjoin(UserRole, User.role_id == UserRole.id)
+            .where(User.id == user_id)
+        ).mappings().first()
+    if row is None:
+        return None
+    profile = dict(row)
+    profile["role"] = profile["role"] or DEFAULT_ROLE
+    return profile
+
+
+def get_profile(user_id: str) -> Optional[dict]:
+    """Önbellekten okur, yoksa DB'den yükler. Kullanıcı yoksa None (önbelleğe alınmaz)."""
+    profile = cache.get(user_id)
+    if profile is None:
+        profile = _load_profile(user_id)
+        if profile is not None:
+            cache.put(user_id, profile)
+    return profile
+
+
+def llm_provider(user_id: str) -> str:
+    """llm_choice_id: 0 = "local", 1 = "cloud". Kullanıcı bulunamazsa "local"."""
+    profile = get_profile(user_id)
+    return "cloud" if profile and profile["llm_choice_id"] == 1 else "local"
+
+
+def invalidate(user_id: str) -> None:
+    """Yerel kaydı siler ve diğer worker'lara yayınlar."""
+    cache.discard(user_id)
+    if redis_client is None:
+        return
+    try:
+        redis_client.publish(INVALIDATION_CHANNEL, user_id)
+    except Exception as e:
+        logger.warning(f"User cache invalidation publish failed: {e}")
+
+
+def _on_invalidation(message: dict) -> None:
+    cache.discard(message["data"])
+
+
+def start_invalidation_listener():
+    """
+    Redis kanalını arka plan thread'inde dinler (lifespan'de başlatılır).
+    Returns: durdurulabilir thread (`.stop()`), Redis yoksa None
+    """
+    if redis_client is None:
+        return None
+    try:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: _on_invalidation})
+        return pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+    except Exception as e:
+        logger.warning(f"User cache invalidation listener could not start: {e}")
+        return None
@@ -0,0 +1,74 @@
+# backend/benchmarks/db_latency_benchmark.py
+"""
+async handler'larda DB erişiminin eşzamanlı yük altındaki gecikmesi:
+
+- sync:  async def içinde sync Session (önceki davranış, event loop bloklanır)
+- async: app.repositories + AsyncSession (asyncpg)
+
+Her senaryoda `--concurrency` kadar eşzamanlı "istek" `/files/my-files` ve
+`/files/user/stats` sorgularını çalıştırır; istek başına gecikmenin p50/p99'u
+ve toplam süre raporlanır. Gerçek bir veritabanı gerekir.
+
+Çalıştırma (backend dizininden, .env tanımlı olmalı):
+
+    python -m benchmarks.db_latency_benchmark --user-id <id> --concurrency 50 --requests 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app import repositories
+from app.db import AsyncSessionLocal, SessionLocal, async_engine
+from app.models import UserStats
+from app.storage import list_user_pdfs
+
+
+async def _sync_request(user_id: str) -> None:
+    with SessionLocal() as db:
+        list_user_pdfs(db, user_id)
+        db.query(UserStats).filter(UserStats.user_id == user_id).first()
+
+
+async def _async_request(user_id: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await repositories.pdfs.list_for_user(db, user_id, 50)
+        await repositories.user_stats.get_counts(db, user_id)
+
+
+async def _run(request, user_id: str, concurrency: int, requests: int):
+    timings = []
+
+    async def client():
+        for _ in range(requests):
+            started = time.perf_counter()
+            await request(user_id)
+            timings.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return sorted(timings), time.perf_counter() - started
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20, help="İstemci başına istek sayısı")
+    args = parser.parse_args()
+
+    scenarios = {"sync": _sync_request, "async": _async_request}
+    print(f"{args.concurrency} eşzamanlı istemci x {args.requests} istek")
+    print(f"{'senaryo':<10}{'p50 (ms)':>12}{'p99 (ms)':>12}{'toplam (s)':>13}")
+    for name, request in scenarios.items():
+        await request(args.user_id)  # ısınma (bağlantı havuzu)
+        timings, elapsed = await _run(request, args.user_id, args.concurrency, args.requests)
+        p99 = timings[max(int(len(timings) * 0.99) - 1, 0)]
+        print(f"{name:<10}{statistics.median(timings):>12.2f}{p99:>12.2f}{elapsed:>13.2f}")
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+# backend/benchmarks/markdown_pdf_benchmark.py
+"""
+`/files/markdown-to-pdf` oluşturucusunun süre ölçümü:
+
+- per-call-styles: stiller her çağrıda yeniden kurulur (önceki davranış)
+- cold:            önceden hazırlanmış stiller, önbelleksiz
+- cached:          aynı markdown tekrar istendiğinde (önbellek isabeti)
+
+Önbellek yalnızca "cached" satırını etkiler; "cold" satırı reportlab yerleşimine
+ve rl_accel C hızlandırıcısının yüklü olup olmamasına bağlıdır.
+
+Çalıştırma (backend dizininden, .env veya ortam değişkenleri tanımlı olmalı):
+
+    python -m benchmarks.markdown_pdf_benchmark --repeat 50 --sections 20
+"""
+
+import argparse
+import statistics
+import time
+
+from app.services import markdown_pdf
+
+
+def _sample_markdown(sections: int) -> str:
+    parts = []
+    for i in range(1, sections + 1):
+        parts.append(f"## Bölüm {i}")
+        parts.append(f"Bu bölüm **önemli** bulguları, *vurgulanan* noktaları ve `kod_{i}` örneğini içerir. " * 3)
+        parts.extend(f"- Madde {j}: ayrıntılı açıklama metni" for j in range(5))
+        parts.append("| Ölçüt | Değer | Not |")
+        parts.append("|---|---|---|")
+        parts.extend(f"| Satır {j} | {j * i} | **iyi** |" for j in range(4))
+        parts.append("")
+    return "# Özet\n" + "\n".join(parts)
+
+
+def _measure(fn, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--sections", type=int, default=20, help="Örnek özetteki bölüm sayısı")
+    args = parser.parse_args()
+
+    markdown = _sample_markdown(args.sections)
+    markdown_pdf.render(markdown)  # ısınma (font/modül yükleme)
+
+    scenarios = {
+        "per-call-styles": lambda: markdown_pdf.render(markdown, markdown_pdf._build_styles()),
+        "cold": lambda: markdown_pdf.render(markdown),
+        "cached": lambda: markdown_pdf.render_cached(markdown),
+    }
+
+    print(f"{len(markdown)} karakter markdown, {args.repeat} tekrar")
+    print(f"{'senaryo':<18}{'medyan (ms)':>14}{'p95 (ms)':>12}")
+    for name, fn in scenarios.items():
+        timings = sorted(_measure(fn, args.repeat))
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{name:<18}{statistics.median(timings):>14.2f}{p95:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# backend/benchmarks/merge_benchmark.py
+"""
+Eski (tamamen bellekte) birleştirme ile disk tabanlı `pdf_tools.merge_files`
+motorunu karşılaştırır: süre ve tepe bellek (RSS).
+
+Varsayılan senaryo 20 adet ~50 MB PDF'dir (~1 GB geçici disk gerekir). Her
+strateji temiz bir alt süreçte çalıştırılır ki tepe bellek ölçümleri
+birbirini etkilemesin.
+
+Çalıştırma (backend dizininden, .env veya ortam değişkenleri tanımlı olmalı):
+
+    python -m benchmarks.merge_benchmark --files 20 --size-mb 50
+"""
+
+import argparse
+import glob
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+PAGES_PER_FILE = 10
+
+
+def _make_large_pdf(path: str, size_mb: int, pages: int = PAGES_PER_FILE) -> None:
+    """Sayfa içerik akışları sıkıştırılamaz yorum satırlarıyla şişirilmiş bir PDF yazar."""
+    filler_per_page = size_mb * 1024 * 1024 // pages
+    page_refs = []
+    offsets = []
+
+    with open(path, "wb") as out:
+        out.write(b"%PDF-1.4\n")
+
+        def write_object(no: int, body_parts) -> None:
+            offsets.append((no, out.tell()))
+            out.write(b"%d 0 obj\n" % no)
+            for part in body_parts:
+                out.write(part)
+            out.write(b"\nendobj\n")
+
+        write_object(1, [b"<< /Type /Catalog /Pages 2 0 R >>"])
+        write_object(3, [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"])
+
+        next_no = 4
+        for i in range(pages):
+            text = b"BT /F1 24 Tf 72 720 Td (Sayfa %d) Tj ET\n" % (i + 1)
+            filler = b"".join(b"%" + os.urandom(512).hex().encode() + b"\n" for _ in range(filler_per_page // 1026))
+            write_object(next_no, [b"<< /Length %d >>\nstream\n" % (len(text) + len(filler)), text, filler, b"\nendstream"])
+            write_object(next_no + 1, [
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % next_no
+            ])
+            page_refs.append(next_no + 1)
+            next_no += 2
+
+        # Pages nesnesi sayfa referansları belli olunca en sona yazılır
+        kids = b" ".join(b"%d 0 R" % n for n in page_refs)
+        write_object(2, [b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)])
+
+        xref_at = out.tell()
+        offsets.sort()
+        out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1))
+        out.write(b"".join(b"%010d 00000 n \n" % off for _, off in offsets))
+        out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, xref_at))
+
+
+def _merge_in_memory(input_paths, output_path) -> None:
+    """Önceki `/merge-pdfs` davranışı: tüm girdiler ve çıktı bellekte."""
+    from pypdf import PdfReader, PdfWriter
+
+    contents = []
+    for path in input_paths:
+        with open(path, "rb") as f:
+            contents.append(f.read())
+
+    writer = PdfWriter()
+    for content in contents:
+        for p in PdfReader(io.BytesIO(content)).pages:
+            writer.add_page(p)
+    out = io.BytesIO()
+    writer.write(out)
+    with open(output_path, "wb") as f:
+        f.write(out.getvalue())
+
+
+def _merge_on_disk(input_paths, output_path) -> None:
+    from app import pdf_tools
+
+    pdf_tools.merge_files(input_paths, output_path)
+
+
+STRATEGIES = {"in-memory": _merge_in_memory, "disk": _merge_on_disk}
+
+
+def _run_strategy(strategy: str, workdir: str) -> None:
+    """Alt süreç girişi: tek stratejiyi çalıştırır ve sonucu JSON olarak basar."""
+    input_paths = sorted(glob.glob(os.path.join(workdir, "input_*.pdf")))
+    output_path = os.path.join(workdir, f"merged_{strategy}.pdf")
+
+    started = time.perf_counter()
+    STRATEGIES[strategy](input_paths, output_path)
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps({
+        "elapsed": elapsed,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "output_mb": os.path.getsize(output_path) / 1024 / 1024,
+    }))
+    os.remove(output_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--strategies", default="in-memory,disk")
+    parser.add_argument("--run", choices=STRATEGIES, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        _run_strategy(args.run, args.workdir)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="merge_bench_") as workdir:
+        print(f"{args.files} x {args.size_mb} MB girdi hazırlanıyor: {workdir}")
+        for i in range(args.files):
+            _make_large_pdf(os.path.join(workdir, f"input_{i:03d}.pdf"), args.size_mb)
+
+        print(f"{'strateji':<12}{'süre (s)':>12}{'tepe RSS (MB)':>16}{'çıktı (MB)':>14}")
+        for strategy in args.strategies.split(","):
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.merge_benchmark", "--run", strategy, "--workdir", workdir],
+                capture_output=True, text=True, check=True,
+            )
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{strategy:<12}{result['elapsed']:>12.1f}{result['peak_rss_mb']:>16.0f}{result['output_mb']:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Unit tests for the PDF blob store and Range parsing
+"""
+import hashlib
+import os
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app import blob_store
+from app.blob_store import FilesystemBlobStore, parse_range
+
+SHA = hashlib.sha256(b"%PDF-1.4 test").hexdigest()
+
+
+class TestFilesystemBlobStore:
+    """Test sharded layout and atomic writes"""
+
+    def test_path_is_sharded_by_hash_prefix(self, tmp_path):
+        """Test blobs are spread over two directory levels"""
+        store = FilesystemBlobStore(tmp_path)
+        assert store.path(SHA) == tmp_path / SHA[:2] / SHA[2:4] / SHA
+
+    def test_rejects_non_hash_keys(self, tmp_path):
+        """Test path traversal through the key is impossible"""
+        store = FilesystemBlobStore(tmp_path)
+        with pytest.raises(ValueError):
+            store.path("../../etc/passwd")
+
+    def test_write_read_delete(self, tmp_path):
+        """Test a blob round-trips and leaves no temp files"""
+        store = FilesystemBlobStore(tmp_path)
+        path = store.write(SHA, b"%PDF-1.4 test")
+        assert store.read(SHA) == b"%PDF-1.4 test"
+        assert list(path.parent.iterdir()) == [path]
+
+        store.delete(SHA)
+        assert not path.exists()
+        store.delete(SHA)  # zaten yoksa hata vermez
+
+    def test_existing_blob_is_not_rewritten(self, tmp_path):
+        """Test content-addressed files are immutable once written, only touched on reuse"""
+        store = FilesystemBlobStore(tmp_path)
+        path = store.write(SHA, b"%PDF-1.4 test")
+        os.utime(path, (0, 0))
+        store.write(SHA, b"different bytes")
+        assert path.read_bytes() == b"%PDF-1.4 test"
+        assert path.stat().st_mtime > 0
+
+    def test_link_in_keeps_source(self, tmp_path):
+        """Test placing an upload leaves the source so a failed commit can be retried"""
+        store = FilesystemBlobStore(tmp_path / "blobs")
+        source = tmp_path / "upload.part"
+        source.write_bytes(b"%PDF-1.4 test")
+        path = store.link_in(SHA, source)
+        assert path.read_bytes() == b"%PDF-1.4 test"
+        assert source.read_bytes() == b"%PDF-1.4 test"
+        assert list(path.parent.iterdir()) == [path]
+
+
+class TestUnreferencedFileSweep:
+    """Test removal of files left behind by rolled-back transactions"""
+
+    def _old_blob(self, store, content):
+        sha = hashlib.sha256(content).hexdigest()
+        path = store.write(sha, content)
+        os.utime(path, (0, 0))
+        return sha, path
+
+    def test_removes_only_old_files_without_rows(self, tmp_path):
+        """Test referenced and recently written files are kept"""
+        store = FilesystemBlobStore(tmp_path)
+        _, orphan = self._old_blob(store, b"rolled back")
+        kept_sha, kept = self._old_blob(store, b"committed")
+        fresh = store.write(hashlib.sha256(b"pending").hexdigest(), b"pending")
+        stale_part = tmp_path / "ab" / "cd" / "tmp123.part"
+        stale_part.parent.mkdir(parents=True)
+        stale_part.write_bytes(b"x")
+        os.utime(stale_part, (0, 0))
+
+        with patch.object(blob_store, "filesystem_store", store), \
+                patch.object(blob_store, "_existing_blob_hashes", return_value={kept_sha}) as lookup:
+            assert blob_store.sweep_unreferenced_files(grace_seconds=60) == 2
+
+        assert not orphan.exists() and not stale_part.exists()
+        assert kept.exists() and fresh.exists()
+        assert sorted(lookup.call_args.args[0]) == sorted([orphan.name, kept.name])
+
+    def test_reused_file_is_not_swept(self, tmp_path):
+        """Test a request re-saving the same content protects the old file until it commits"""
+        store = FilesystemBlobStore(tmp_path)
+        sha, path = self._old_blob(store, b"rolled back, then saved again")
+        store.write(sha, b"rolled back, then saved again")
+
+        with patch.object(blob_store, "filesystem_store", store), \
+                patch.object(blob_store, "_existing_blob_hashes", return_value=set()):
+            assert blob_store.sweep_unreferenced_files(grace_seconds=60) == 0
+        assert path.exists()
+
+
+class TestParseRange:
+    """Test single byte-range parsing"""
+
+    @pytest.mark.parametrize("header,expected", [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-200", (800, 999)),
+        ("bytes=900-5000", (900, 999)),
+        ("bytes=-5000", (0, 999)),
+    ])
+    def test_satisfiable_ranges(self, header, expected):
+        """Test explicit, open-ended and suffix ranges are clamped to the size"""
+        assert parse_range(header, 1000) == expected
+
+    @pytest.mark.parametrize("header", [None, "", "bytes=0-1,5-9", "items=0-1", "bytes=-", "bytes=9-1"])
+    def test_ignored_headers_serve_full_content(self, header):
+        """Test missing, multi-range or malformed headers fall back to a full response"""
+        assert parse_range(header, 1000) is None
+
+    def test_unsatisfiable_range(self):
+        """Test a range past the end is rejected with 416"""
+        with pytest.raises(HTTPException) as exc:
+            parse_range("bytes=1000-", 1000)
+        assert exc.value.status_code == 416
+        assert exc.value.headers["Content-Range"] == "bytes */1000"
@@ -0,0 +1,151 @@
+"""
+Unit tests for incrementally maintained global stats
+"""
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import fakeredis
+import pytest
+
+from app import global_stats, usage_counters
+
+
+@pytest.fixture
+def redis():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    with patch("app.global_stats.redis_client", client), patch("app.usage_counters.redis_client", client):
+        yield client
+
+
+class TestGlobalTotals:
+    """Test Redis-backed totals and reconciliation"""
+
+    def test_adjust_and_load_totals(self, redis):
+        """Test increments are summed and formatted for the endpoint"""
+        redis.hset(global_stats.TOTALS_KEY, mapping={"total_users": 0, global_stats.SEEDED_FIELD: 1})
+        global_stats.adjust(users=2, summaries=3)
+        global_stats.adjust(users=-1, tools=4)
+
+        assert global_stats.load_totals() == {
+            "total_users": 1,
+            "total_processed": 7,
+            "total_ai_summaries": 3,
+        }
+
+    def test_load_totals_seeds_from_reconcile(self, redis):
+        """Test an empty Redis hash is seeded from the database plus pending counters"""
+        db_totals = {"total_users": 5, "total_ai_summaries": 10, "total_tools": 20}
+        redis.hset(usage_counters.PENDING_KEY.format("u1"), mapping={"summary_count": 1, "tools_count": 1})
+        redis.hset(usage_counters.PENDING_KEY.format("u2"), mapping={"tools_count": 1})
+        redis.sadd(usage_counters.DIRTY_KEY, "u1", "u2")
+        with patch("app.global_stats._compute_from_db", return_value=dict(db_totals)):
+            totals = global_stats.load_totals()
+
+        assert totals == {"total_users": 5, "total_processed": 33, "total_ai_summaries": 11}
+        assert redis.hget(global_stats.TOTALS_KEY, "total_tools") == "22"
+        assert redis.hexists(global_stats.TOTALS_KEY, global_stats.SEEDED_FIELD)
+        assert not redis.exists(global_stats.RECONCILE_LOCK_KEY)
+
+    def test_adjust_before_seed_does_not_create_partial_totals(self, redis):
+        """Test usage recorded after a Redis flush is served only once the hash is seeded"""
+        usage_counters.record_usage("u1", "summary")
+        global_stats.adjust(users=1)
+        assert not redis.exists(global_stats.TOTALS_KEY)
+
+        db_totals = {"total_users": 7, "total_ai_summaries": 10, "total_tools": 2}
+        with patch("app.global_stats._compute_from_db", return_value=dict(db_totals)):
+            totals = global_stats.load_totals()
+        # The pending summary is counted by the seed, not lost and not doubled
+        assert totals == {"total_users": 7, "total_processed": 13, "total_ai_summaries": 11}
+
+    def test_unmarked_hash_is_reseeded(self, redis):
+        """Test a hash without the seed marker (partial totals) is not served"""
+        redis.hset(global_stats.TOTALS_KEY, "total_ai_summaries", 1)
+        db_totals = {"total_users": 3, "total_ai_summaries": 9, "total_tools": 0}
+        with patch("app.global_stats._compute_from_db", return_value=dict(db_totals)):
+            assert global_stats.load_totals()["total_users"] == 3
+
+    def test_reconcile_loop_seeds_before_first_sleep(self):
+        """Test the first reconciliation does not wait for the interval"""
+        with patch("app.global_stats.reconcile") as reconcile, \
+                patch("app.global_stats.asyncio.sleep", AsyncMock(side_effect=asyncio.CancelledError)):
+            with pytest.raises(asyncio.CancelledError):
+                asyncio.run(global_stats.reconcile_loop())
+        reconcile.assert_called_once()
+
+    def test_increments_during_reconcile_are_kept(self, redis):
+        """Test usage recorded while the database is being read is counted exactly once"""
+        redis.hset(global_stats.TOTALS_KEY, mapping={
+            "total_users": 1, "total_ai_summaries": 3, "total_tools": 0, global_stats.SEEDED_FIELD: 1,
+        })
+
+        def compute_while_user_is_active():
+            usage_counters.record_usage("u1", "summary")
+            return {"total_users": 1, "total_ai_summaries": 3, "total_tools": 0}
+
+        with patch("app.global_stats._compute_from_db", side_effect=compute_while_user_is_active):
+            totals = global_stats.reconcile()
+        assert totals["total_ai_summaries"] == 4
+        assert redis.hget(global_stats.TOTALS_KEY, "total_ai_summaries") == "4"
+
+        usage_counters.record_usage("u1", "summary")
+        assert redis.hget(global_stats.TOTALS_KEY, "total_ai_summaries") == "5"
+
+    def test_reconcile_waits_out_running_flush(self, redis):
+        """Test counters taken by an unfinished flush are not reconciled against the database"""
+        redis.zadd(usage_counters.FLUSHING_KEY, {"other-process": time.time() + 60})
+        with patch.object(global_stats, "FLUSH_DRAIN_TIMEOUT_SECONDS", 0), \
+                patch("app.global_stats._compute_from_db") as compute:
+            assert global_stats.reconcile() is None
+        compute.assert_not_called()
+        assert not redis.exists(usage_counters.FLUSH_PAUSE_KEY)
+        assert not redis.exists(global_stats.RECONCILE_LOCK_KEY)
+
+    def test_flush_does_not_start_while_paused(self, redis):
+        """Test a flush started during reconciliation leaves the counters in Redis"""
+        usage_counters.record_usage("u1", "tool")
+        assert usage_counters.pause_flushes(timeout=0, pause_seconds=60)
+        with patch("app.usage_counters.upsert_usage_rows") as upsert:
+            assert usage_counters.flush_pending() == 0
+        upsert.assert_not_called()
+        assert usage_counters.pending_counts("u1") == {"tools_count": 1}
+        assert redis.zcard(usage_counters.FLUSHING_KEY) == 0
+        usage_counters.resume_flushes()
+
+    def test_reconcile_skips_when_locked(self, redis):
+        """Test only one process reconciles at a time"""
+        redis.set(global_stats.RECONCILE_LOCK_KEY, "1")
+        with patch("app.global_stats._compute_from_db") as compute:
+            assert global_stats.reconcile() is None
+        compute.assert_not_called()
+
+
+class TestGlobalStatsCache:
+    """Test in-process TTL and stale-while-revalidate"""
+
+    def test_fresh_value_is_served_from_memory(self):
+        """Test the loader runs once within the TTL"""
+        cache = global_stats.GlobalStatsCache(ttl=60, stale_ttl=60)
+        with patch("app.global_stats.load_totals", return_value={"total_users": 1}) as load:
+            async def scenario():
+                await cache.get()
+                return await cache.get()
+
+            assert asyncio.run(scenario()) == {"total_users": 1}
+        load.assert_called_once()
+
+    def test_stale_value_is_returned_while_refreshing(self):
+        """Test an expired value is served immediately and refreshed in the background"""
+        cache = global_stats.GlobalStatsCache(ttl=0, stale_ttl=60)
+        values = iter([{"total_users": 1}, {"total_users": 2}])
+        with patch("app.global_stats.load_totals", side_effect=lambda: next(values)):
+            async def scenario():
+                first = await cache.get()
+                stale = await cache.get()
+                await cache._refreshing
+                return first, stale, await cache.get()
+
+            first, stale, refreshed = asyncio.run(scenario())
+        assert first == stale == {"total_users": 1}
+        assert refreshed == {"total_users": 2}
@@ -0,0 +1,130 @@
+"""
+Unit tests for streaming multipart PDF ingestion
+"""
+import asyncio
+import hashlib
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app import ingest
+
+BOUNDARY = "testboundary"
+
+
+def _body(content: bytes, content_type: str = "application/pdf", fields=None) -> bytes:
+    parts = []
+    for name, value in (fields or {}).items():
+        parts.append(
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    parts.append(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="a.pdf"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n".encode() + content + b"\r\n"
+    )
+    parts.append(f"--{BOUNDARY}--\r\n".encode())
+    return b"".join(parts)
+
+
+def _request(body: bytes, chunk_size: int = 4096, content_length: int = None):
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    consumed = {"count": 0}
+
+    async def receive():
+        i = consumed["count"]
+        consumed["count"] += 1
+        if i >= len(chunks):
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return {"type": "http.request", "body": chunks[i], "more_body": i < len(chunks) - 1}
+
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    length = len(body) if content_length is None else content_length
+    headers.append((b"content-length", str(length).encode()))
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": headers, "query_string": b""}
+    return Request(scope, receive), consumed, len(chunks)
+
+
+@pytest.fixture(autouse=True)
+def _incoming(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "INCOMING_DIR", tmp_path)
+    monkeypatch.setattr(ingest.settings, "MAX_FILE_SIZE_USER_MB", 1)
+    yield tmp_path
+
+
+def test_valid_upload_hash_size_and_fields(_incoming):
+    content = b"%PDF-1.4\n" + b"x" * 20000
+    request, _, _ = _request(_body(content, fields={"filename": "rapor.pdf"}))
+    upload, fields = asyncio.run(ingest.ingest_pdf_upload(request, is_guest=False))
+    try:
+        assert upload.size == len(content)
+        assert upload.sha256 == hashlib.sha256(content).hexdigest()
+        assert upload.read_bytes() == content
+        assert upload.filename == "a.pdf"
+        assert fields == {"filename": "rapor.pdf"}
+    finally:
+        upload.cleanup()
+    assert list(_incoming.iterdir()) == []
+
+
+def test_oversize_rejected_before_body_consumed(_incoming):
+    content = b"%PDF-1.4\n" + b"x" * (3 * 1024 * 1024)
+    # Content-Length understated: the limit must trip while streaming
+    request, consumed, total = _request(_body(content), chunk_size=64 * 1024, content_length=0)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(ingest.ingest_pdf_upload(request, is_guest=False))
+    assert exc.value.status_code == 413
+    assert consumed["count"] < total
+    assert list(_incoming.iterdir()) == []
+
+
+def test_content_length_precheck(_incoming):
+    request, consumed, _ = _request(_body(b"%PDF-1.4"), content_length=5 * 1024 * 1024)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(ingest.ingest_pdf_upload(request, is_guest=False))
+    assert exc.value.status_code == 413
+    assert consumed["count"] == 0
+
+
+def test_non_pdf_signature_rejected(_incoming):
+    request, _, _ = _request(_body(b"MZ" + b"\0" * 2000))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(ingest.ingest_pdf_upload(request, is_guest=False))
+    assert exc.value.status_code == 400
+    assert list(_incoming.iterdir()) == []
+
+
+def test_wrong_content_type_rejected(_incoming):
+    request, _, _ = _request(_body(b"%PDF-1.4", content_type="text/plain"))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(ingest.ingest_pdf_upload(request, is_guest=False))
+    assert exc.value.status_code == 400
+
+
+def test_body_truncated_inside_file_part(_incoming):
+    body = _body(b"%PDF-1.4\n" + b"x" * 5000)
+    request, _, _ = _request(body[:len(body) // 2])
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(ingest.ingest_pdf_upload(request, is_guest=False))
+    assert exc.value.status_code == 400
+    assert list(_incoming.iterdir()) == []
+
+
+def test_truncated_file_part_followed_by_garbage(_incoming):
+    body = _body(b"%PDF-1.4\n" + b"x" * 5000)
+    request, _, _ = _request(body[:len(body) // 2] + b"\r\n--not-the-boundary\r\ngarbage")
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(ingest.ingest_pdf_upload(request, is_guest=False))
+    assert exc.value.status_code == 400
+    assert list(_incoming.iterdir()) == []
+
+
+def test_malformed_part_header_is_a_client_error(_incoming):
+    body = (
+        f"--{BOUNDARY}\r\nContent-Disposition form-data\r\n\r\n%PDF-1.4\r\n--{BOUNDARY}--\r\n"
+    ).encode()
+    request, _, _ = _request(body)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(ingest.ingest_pdf_upload(request, is_guest=False))
+    assert exc.value.status_code == 400
+    assert list(_incoming.iterdir()) == []
@@ -0,0 +1,55 @@
+"""
+Unit tests for the markdown-to-PDF renderer and its cache
+"""
+import io
+
+from pypdf import PdfReader
+
+from app.services import markdown_pdf
+from app.services.markdown_pdf import RenderCache
+
+SAMPLE = """# Özet
+Bu belge **önemli** bir *örnek* ve `kod` içerir.
+
+| Başlık | Değer |
+|---|---|
+| a | 1 |
+- madde
+"""
+
+
+class TestMarkdownPdf:
+    """Test rendering and caching"""
+
+    def test_render_produces_pdf_with_text(self):
+        """Test headings, inline markup and tables render to a readable PDF"""
+        text = PdfReader(io.BytesIO(markdown_pdf.render(SAMPLE))).pages[0].extract_text()
+        assert "Özet" in text
+        assert "Değer" in text
+
+    def test_inline_markdown(self):
+        """Test bold/italic/code markers are converted and HTML is escaped"""
+        result = markdown_pdf.format_inline_markdown("**a** *b* `c` <x>")
+        assert "<b>a</b>" in result
+        assert "<i>b</i>" in result
+        assert '<font face="Courier"' in result
+        assert "&lt;x&gt;" in result
+
+    def test_render_cached_hits_on_same_markdown(self):
+        """Test the second render of identical markdown is served from cache"""
+        markdown = SAMPLE + "\ncache testi"
+        first, key, hit = markdown_pdf.render_cached(markdown)
+        assert not hit
+        second, key2, hit2 = markdown_pdf.render_cached(markdown)
+        assert hit2 and key2 == key and second is first
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test the byte budget evicts the oldest entries first"""
+        cache = RenderCache(max_bytes=10)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        cache.get("a")
+        cache.put("c", b"12345")
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["bytes"] == 10
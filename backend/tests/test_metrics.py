@@ -0,0 +1,44 @@
+"""
+Unit tests for /metrics access control
+"""
+from unittest.mock import patch
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.deps import settings, verify_metrics_key
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/metrics", dependencies=[Depends(verify_metrics_key)])
+    async def get_metrics():
+        return {"pools": {}}
+
+    return TestClient(app)
+
+
+class TestMetricsKey:
+    """Test the internal key guarding process metrics"""
+
+    def test_disabled_without_configured_key(self, client):
+        """Test metrics are never served when no key is configured"""
+        with patch.object(settings, "METRICS_API_KEY", None):
+            assert client.get("/metrics").status_code == 404
+            assert client.get("/metrics", headers={"X-Metrics-Key": "anything"}).status_code == 404
+
+    def test_missing_and_wrong_key(self, client):
+        """Test requests without the key or with a wrong key are rejected"""
+        with patch.object(settings, "METRICS_API_KEY", "s3cret"):
+            assert client.get("/metrics").status_code == 401
+            assert client.get("/metrics", headers={"X-Metrics-Key": "wrong"}).status_code == 403
+
+    def test_valid_key(self, client):
+        """Test the configured key grants access"""
+        with patch.object(settings, "METRICS_API_KEY", "s3cret"):
+            response = client.get("/metrics", headers={"X-Metrics-Key": "s3cret"})
+        assert response.status_code == 200
+        assert response.json() == {"pools": {}}
@@ -0,0 +1,39 @@
+"""
+Unit tests for the paginated file list endpoint
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import repositories
+from app.db import get_async_db
+from app.deps import get_current_user
+from app.routers import files
+
+
+def _client():
+    app = FastAPI()
+    app.include_router(files.router)
+    app.dependency_overrides[get_async_db] = lambda: None
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "u1"}
+    return TestClient(app)
+
+
+class TestMyFiles:
+    """Test the list response contract"""
+
+    def test_total_is_the_users_file_count_not_the_page_size(self):
+        """Test total stays the full count while files holds one page"""
+        created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        page = [SimpleNamespace(id=f"p{i}", filename=f"{i}.pdf", file_size=10, created_at=created) for i in range(2)]
+        with patch.object(repositories.pdfs, "list_for_user", AsyncMock(return_value=(page, "next"))), \
+                patch.object(repositories.pdfs, "count_for_user", AsyncMock(return_value=120)):
+            response = _client().get("/files/my-files", params={"limit": 2})
+        assert response.status_code == 200
+        body = response.json()
+        assert [f["id"] for f in body["files"]] == ["p0", "p1"]
+        assert body["total"] == 120
+        assert body["next_cursor"] == "next"
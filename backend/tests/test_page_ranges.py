@@ -0,0 +1,66 @@
+"""
+Unit tests for the page-range engine
+"""
+import time
+
+import pytest
+
+from app.page_ranges import PageRangeError, order_pages, select_pages
+
+
+class TestSelectPages:
+    """Test extract semantics: unique, ascending, clipped to the document"""
+
+    def test_single_pages_and_ranges(self):
+        """Test pages and ranges are merged and clipped"""
+        assert select_pages("1, 3-4, 9", 5) == [0, 2, 3]
+
+    def test_huge_range_is_clipped_without_iterating(self):
+        """Test a very large range is bounded by the document size"""
+        started = time.perf_counter()
+        assert select_pages("1-100000000000", 3) == [0, 1, 2]
+        assert time.perf_counter() - started < 0.1
+
+    def test_steps_odd_even(self):
+        """Test step, odd and even selectors"""
+        assert select_pages("1-10:3", 10) == [0, 3, 6, 9]
+        assert select_pages("odd", 6) == [0, 2, 4]
+        assert select_pages("2-7:even", 10) == [1, 3, 5]
+
+    def test_last_and_open_range(self):
+        """Test 'last' keyword and open-ended ranges"""
+        assert select_pages("last", 4) == [3]
+        assert select_pages("3-", 5) == [2, 3, 4]
+
+    def test_exclusions(self):
+        """Test exclusions apply after inclusions and default to the whole document"""
+        assert select_pages("1-6, !2-3", 6) == [0, 3, 4, 5]
+        assert select_pages("!1, !last", 4) == [1, 2]
+
+    def test_invalid_spec(self):
+        """Test malformed terms are rejected"""
+        for spec in ("", "abc", "0", "1-3:0"):
+            with pytest.raises(PageRangeError):
+                select_pages(spec, 5)
+
+
+class TestOrderPages:
+    """Test reorder semantics: written order, duplicates allowed, strict bounds"""
+
+    def test_explicit_order(self):
+        """Test a plain list keeps its order"""
+        assert order_pages("3,1,2", 3) == [2, 0, 1]
+
+    def test_reverse(self):
+        """Test n-1 reverses the document"""
+        assert order_pages("n-1", 4) == [3, 2, 1, 0]
+        assert order_pages("6-1:2", 6) == [5, 3, 1]
+
+    def test_out_of_range_is_error(self):
+        """Test out-of-range pages are rejected instead of dropped"""
+        with pytest.raises(PageRangeError):
+            order_pages("1,4", 3)
+
+    def test_exclusions(self):
+        """Test exclusions are removed from the sequence"""
+        assert order_pages("last-1, !2", 4) == [3, 2, 0]
@@ -0,0 +1,291 @@
+"""
+Unit tests for PDF tool operations and the bounded tool pool
+"""
+import asyncio
+import io
+import json
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+from pypdf import PdfReader, PdfWriter
+
+from app import pdf_tools
+from app.pdf_tools import PdfToolPool
+
+
+def _make_pdf(pages: int) -> bytes:
+    writer = PdfWriter()
+    for i in range(pages):
+        writer.add_blank_page(width=200 + i, height=200)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def _widths(pdf_content: bytes) -> list:
+    return [int(p.mediabox.width) for p in PdfReader(io.BytesIO(pdf_content)).pages]
+
+
+class TestPdfToolOperations:
+    """Test the functions executed in the worker pool"""
+
+    def test_extract_pages(self):
+        """Test extracting a page range keeps the selected pages in order"""
+        result = pdf_tools.extract_pages(_make_pdf(5), "2-3")
+        assert _widths(result) == [201, 202]
+
+    def test_extract_pages_empty_range(self):
+        """Test an out-of-bounds range is reported as a user error"""
+        with pytest.raises(ValueError):
+            pdf_tools.extract_pages(_make_pdf(2), "5-6")
+
+    def test_reorder(self):
+        """Test pages are written in the requested order"""
+        result = pdf_tools.reorder(_make_pdf(3), "3,1,2")
+        assert _widths(result) == [202, 200, 201]
+
+    def test_reorder_invalid_page(self):
+        """Test invalid page numbers are reported as a user error"""
+        with pytest.raises(ValueError):
+            pdf_tools.reorder(_make_pdf(3), "1,4")
+
+    def test_merge_files(self, tmp_path):
+        """Test spooled inputs are merged in order into a file on disk"""
+        sources = [io.BytesIO(_make_pdf(2)), io.BytesIO(_make_pdf(3))]
+        input_paths = pdf_tools.spool_inputs(sources, str(tmp_path))
+        output_path = str(tmp_path / "merged.pdf")
+
+        assert pdf_tools.merge_files(input_paths, output_path) == 5
+        with open(output_path, "rb") as f:
+            assert _widths(f.read()) == [200, 201, 200, 201, 202]
+
+
+    def test_merge_files_closes_inputs_when_one_fails(self, tmp_path, monkeypatch):
+        """Test readers already opened are closed if another input cannot be parsed"""
+        sources = [io.BytesIO(_make_pdf(2)), io.BytesIO(b"%PDF-1.4 bozuk"), io.BytesIO(_make_pdf(1))]
+        input_paths = pdf_tools.spool_inputs(sources, str(tmp_path))
+        opened = []
+
+        def tracking_open(*args, **kwargs):
+            f = open(*args, **kwargs)
+            opened.append(f)
+            return f
+
+        monkeypatch.setattr(pdf_tools, "open", tracking_open, raising=False)
+        with pytest.raises(Exception):
+            pdf_tools.merge_files(input_paths, str(tmp_path / "merged.pdf"))
+        assert len(opened) == 3
+        assert all(f.closed for f in opened)
+
+class TestPdfToolPool:
+    """Test pool execution, metrics and backpressure"""
+
+    def test_run_records_metrics(self):
+        """Test a completed job is counted with wait/exec timings"""
+        pool = PdfToolPool(workers=1, queue_depth=0)
+        try:
+            result = asyncio.run(pool.run("reorder", pdf_tools.reorder, _make_pdf(2), "2,1"))
+            assert _widths(result) == [201, 200]
+            stats = pool.pool_stats()["tools"]["reorder"]
+            assert stats["completed"] == 1
+            assert stats["exec_max_ms"] > 0
+        finally:
+            pool.shutdown()
+
+    def test_saturated_pool_returns_503(self):
+        """Test jobs beyond workers + queue depth are rejected with Retry-After"""
+        pool = PdfToolPool(workers=1, queue_depth=0)
+
+        async def scenario():
+            running = asyncio.create_task(pool.run("merge-pdfs", time.sleep, 0.5))
+            await asyncio.sleep(0)
+            with pytest.raises(HTTPException) as exc_info:
+                await pool.run("merge-pdfs", time.sleep, 0)
+            await running
+            return exc_info.value
+
+        try:
+            error = asyncio.run(scenario())
+            assert error.status_code == 503
+            assert "Retry-After" in error.headers
+            assert pool.pool_stats()["tools"]["merge-pdfs"]["rejected"] == 1
+        finally:
+            pool.shutdown()
+
+    def test_dead_worker_replaces_pool(self):
+        """Test a killed child fails only its own request and later jobs still run"""
+        pool = PdfToolPool(workers=1, queue_depth=0)
+        try:
+            with pytest.raises(pdf_tools.WorkerCrashed) as exc_info:
+                asyncio.run(pool.run("merge-pdfs", os._exit, 1))
+            assert exc_info.value.status_code == 503
+            result = asyncio.run(pool.run("reorder", pdf_tools.reorder, _make_pdf(2), "2,1"))
+            assert _widths(result) == [201, 200]
+            stats = pool.pool_stats()
+            assert stats["restarts"] == 1 and stats["in_flight"] == 0
+        finally:
+            pool.shutdown()
+
+    def test_cancelled_request_keeps_capacity_until_child_finishes(self):
+        """Test a client disconnect does not free the slot while the child still runs"""
+        pool = PdfToolPool(workers=1, queue_depth=0)
+
+        async def scenario():
+            task = asyncio.create_task(pool.run("merge-pdfs", time.sleep, 0.5))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            await asyncio.sleep(0)
+            during = pool.in_flight
+            await asyncio.sleep(1.0)
+            return during, pool.in_flight
+
+        try:
+            assert asyncio.run(scenario()) == (1, 0)
+        finally:
+            pool.shutdown()
+
+    def test_children_are_not_forked_from_the_server(self):
+        """Test workers start from a clean process instead of a threaded fork"""
+        pool = PdfToolPool(workers=1, queue_depth=0)
+        try:
+            assert pool._executor._mp_context.get_start_method() in ("forkserver", "spawn")
+        finally:
+            pool.shutdown()
+
+
+def _text_pdf(path, pages: int) -> str:
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(str(path))
+    for i in range(1, pages + 1):
+        if i != 2:  # ikinci sayfa boş
+            c.drawString(72, 720, f"page {i}")
+        c.showPage()
+    c.save()
+    return str(path)
+
+
+def _stream(pool, path, *args):
+    async def collect():
+        return [chunk async for chunk in await pdf_tools.stream_text_chunks(pool, path, *args)]
+    return asyncio.run(collect())
+
+
+class TestTextStreaming:
+    """Test page-by-page text conversion in the tool pool"""
+
+    @pytest.fixture
+    def pool(self, monkeypatch):
+        monkeypatch.setattr(pdf_tools.settings, "PDF_TEXT_BATCH_PAGES", 2)
+        pool = PdfToolPool(workers=1, queue_depth=0)
+        yield pool
+        pool.shutdown()
+
+    def test_ndjson_emits_one_line_per_page(self, pool, tmp_path):
+        """Test NDJSON mode yields one JSON line per page across batches, including empty pages"""
+        chunks = _stream(pool, _text_pdf(tmp_path / "a.pdf", 5), "ndjson")
+        assert [json.loads(c)["page"] for c in chunks] == [1, 2, 3, 4, 5]
+        assert json.loads(chunks[1]) == {"page": 2, "text": ""}
+        assert json.loads(chunks[4])["text"].strip() == "page 5"
+
+    def test_text_mode_skips_empty_pages(self, pool, tmp_path):
+        """Test plain text joins non-empty pages and markers prefix every page"""
+        path = _text_pdf(tmp_path / "a.pdf", 3)
+        assert b"".join(_stream(pool, path, "text")).decode().split() == ["page", "1", "page", "3"]
+        assert b"".join(_stream(pool, path, "text", True)).decode().count("--- Sayfa") == 3
+
+    def test_batches_are_counted_by_the_pool(self, pool, tmp_path):
+        """Test every page batch runs in the pool and shows up in its stats"""
+        _stream(pool, _text_pdf(tmp_path / "a.pdf", 5), "ndjson")
+        stats = pool.pool_stats()
+        assert stats["tools"]["convert-text"]["completed"] == 3
+        assert stats["in_flight"] == 0
+
+    def test_saturated_pool_rejects_before_streaming(self, pool, tmp_path):
+        """Test a full pool answers 503 before the response starts"""
+        path = _text_pdf(tmp_path / "a.pdf", 1)
+        pool.in_flight = pool.capacity
+        with pytest.raises(HTTPException) as exc_info:
+            _stream(pool, path, "text")
+        assert exc_info.value.status_code == 503
+        pool.in_flight = 0
+
+    def test_broken_pdf_is_a_user_error(self, pool, tmp_path):
+        """Test unreadable content fails the first batch with ValueError"""
+        path = tmp_path / "broken.pdf"
+        path.write_bytes(b"%PDF-1.4 not really")
+        with pytest.raises(ValueError):
+            _stream(pool, str(path), "text")
+
+    def test_precomputed_pages_match_extraction(self, pool, tmp_path):
+        """Test stored page texts render exactly like live extraction"""
+        path = _text_pdf(tmp_path / "a.pdf", 3)
+        live = b"".join(_stream(pool, path, "ndjson"))
+        stored = b"".join(pdf_tools.iter_page_texts(pdf_tools.extract_text_batch(path, 0, 3)[1], "ndjson"))
+        assert live == stored
+
+
+class TestArtifacts:
+    """Test background artifact computation"""
+
+    def test_blank_pdf_has_no_text_layer(self, tmp_path):
+        """Test page count and text-layer flag for an image-only style PDF"""
+        path = tmp_path / "blank.pdf"
+        path.write_bytes(_make_pdf(4))
+        result = pdf_tools.compute_artifacts(str(path), 100)
+        assert result["page_count"] == 4
+        assert result["has_text_layer"] is False
+        assert result["pages"] == [""] * 4
+        assert result["chunks"] == []
+
+    def test_broken_pdf_is_a_user_error(self, tmp_path):
+        """Test unreadable content is reported as ValueError"""
+        path = tmp_path / "broken.pdf"
+        path.write_bytes(b"%PDF-1.4 not really")
+        with pytest.raises(ValueError):
+            pdf_tools.compute_artifacts(str(path), 100)
+
+    def test_chunks_stay_within_page_and_split_on_whitespace(self):
+        """Test chunk ranges cover the page text without cutting words"""
+        text = " ".join(f"word{i}" for i in range(100))
+        chunks = list(pdf_tools._page_chunks(7, text, 50))
+        assert all(page == 7 and end - start <= 50 for page, start, end in chunks)
+        assert "".join(text[start:end] for _, start, end in chunks) == text
+        assert all(text[end - 1] == " " for _, _, end in chunks[:-1])
+
+
+class TestPipeline:
+    """Test the single-pass operation pipeline"""
+
+    def test_pipeline_applies_operations_in_order(self, tmp_path):
+        """Test extract, merge, reorder, rotate and delete produce one output"""
+        input_paths = pdf_tools.spool_inputs([io.BytesIO(_make_pdf(5)), io.BytesIO(_make_pdf(3))], str(tmp_path))
+        ops = pdf_tools.parse_pipeline(json.dumps([
+            {"op": "extract", "pages": "1-4"},
+            {"op": "merge", "input": 1, "pages": "3"},
+            {"op": "reorder", "order": "5,1,2,3,4"},
+            {"op": "rotate", "pages": "1", "angle": 90},
+            {"op": "delete", "pages": "5"},
+        ]), input_count=2)
+        output_path = str(tmp_path / "out.pdf")
+
+        assert pdf_tools.run_pipeline(input_paths, output_path, ops) == 4
+        pages = PdfReader(output_path).pages
+        assert [int(p.mediabox.width) for p in pages] == [202, 200, 201, 202]
+        assert [p.rotation for p in pages] == [90, 0, 0, 0]
+
+    def test_pipeline_rejects_invalid_operations(self):
+        """Test unknown ops and out-of-range merge inputs are user errors"""
+        with pytest.raises(ValueError):
+            pdf_tools.parse_pipeline('[{"op": "compress"}]', input_count=1)
+        with pytest.raises(ValueError):
+            pdf_tools.parse_pipeline('[{"op": "merge", "input": 1}]', input_count=1)
+
+    def test_pipeline_rejects_empty_result(self, tmp_path):
+        """Test deleting every page is reported instead of writing an empty PDF"""
+        input_paths = pdf_tools.spool_inputs([io.BytesIO(_make_pdf(2))], str(tmp_path))
+        ops = pdf_tools.parse_pipeline('[{"op": "delete", "pages": "1-2"}]', input_count=1)
+        with pytest.raises(ValueError):
+            pdf_tools.run_pipeline(input_paths, str(tmp_path / "out.pdf"), ops)
@@ -0,0 +1,130 @@
+"""
+Unit tests for summarize preflight and routing
+"""
+import io
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+from pypdf import PdfWriter
+from reportlab.pdfgen import canvas
+
+from app import preflight, summary_jobs
+
+
+def _text_pdf(pages: int, line: str = "Bu sayfa gerçek bir metin katmanı içerir.") -> io.BytesIO:
+    out = io.BytesIO()
+    c = canvas.Canvas(out)
+    for i in range(pages):
+        c.drawString(72, 720, f"{line} {i + 1}")
+        c.showPage()
+    c.save()
+    out.seek(0)
+    return out
+
+
+def _blank_pdf(pages: int, password: str = None) -> io.BytesIO:
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    if password is not None:
+        writer.encrypt(user_password=password, owner_password="owner", algorithm="RC4-128")
+    out = io.BytesIO()
+    writer.write(out)
+    out.seek(0)
+    return out
+
+
+class TestPreflight:
+    """Test the sampled inspection and the routing decision"""
+
+    def test_samples_spread_over_the_document(self):
+        """Test first and last pages are always sampled"""
+        indices = preflight._sample_indices(800, 8)
+        assert indices[0] == 0 and indices[-1] == 799 and len(indices) == 8
+        assert preflight._sample_indices(3, 8) == [0, 1, 2]
+
+    def test_small_text_pdf_goes_sync(self):
+        """Test a short document with text is summarized synchronously"""
+        report = preflight.inspect(_text_pdf(3))
+        assert report["page_count"] == 3
+        assert report["has_text_layer"] is True
+        assert preflight.choose_route(report, async_available=True) == preflight.ROUTE_SYNC
+
+    def test_large_pdf_goes_async_when_available(self):
+        """Test page count above the sync limit routes to the task queue"""
+        report = preflight.inspect(_text_pdf(5))
+        with patch.object(preflight.settings, "PREFLIGHT_SYNC_MAX_PAGES", 4):
+            assert preflight.choose_route(report, async_available=True) == preflight.ROUTE_ASYNC
+            assert preflight.choose_route(report, async_available=False) == preflight.ROUTE_SYNC
+
+    def test_image_only_pdf_fails_fast(self):
+        """Test documents without a text layer are rejected before any AI call"""
+        report = preflight.inspect(_blank_pdf(4))
+        assert report["has_text_layer"] is False
+        with pytest.raises(HTTPException) as exc:
+            preflight.choose_route(report, async_available=True)
+        assert exc.value.status_code == 400
+
+    def test_password_protected_pdf_fails_fast(self):
+        """Test PDFs that need a password are rejected"""
+        report = preflight.inspect(_blank_pdf(1, password="secret"))
+        assert report["encrypted"] is True and report["page_count"] is None
+        with pytest.raises(HTTPException) as exc:
+            preflight.choose_route(report, async_available=True)
+        assert exc.value.status_code == 400
+
+    def test_empty_user_password_is_opened(self):
+        """Test owner-password-only PDFs are inspected normally"""
+        report = preflight.inspect(_blank_pdf(2, password=""))
+        assert report["encrypted"] is True
+        assert report["page_count"] == 2
+
+    def test_broken_pdf_is_a_user_error(self):
+        """Test unreadable content raises ValueError"""
+        with pytest.raises(ValueError):
+            preflight.inspect(io.BytesIO(b"%PDF-1.4 not really"))
+
+
+class TestSummaryJobs:
+    """Test the Redis job records used for async summaries"""
+
+    @pytest.fixture(autouse=True)
+    def redis(self):
+        client = fakeredis.FakeRedis(decode_responses=True)
+        with patch("app.summary_jobs.redis_client", client):
+            yield client
+
+    def test_job_lifecycle(self):
+        """Test a job is created, completed by callback and read back"""
+        number, job_id, callback_secret = summary_jobs.create("u1", "kitap.pdf")
+        assert summary_jobs.get(job_id)["status"] == "processing"
+        assert summary_jobs.complete(number, callback_secret, "completed", "özet", None)
+        job = summary_jobs.get(job_id)
+        assert job["status"] == "completed" and job["summary"] == "özet"
+
+    def test_job_id_requires_secret(self):
+        """Test the sequential number alone does not reveal the job"""
+        number, job_id, _ = summary_jobs.create(None, "a.pdf")
+        assert summary_jobs.get(str(number)) is None
+        assert summary_jobs.get(f"{number}-wrong") is None
+
+    def test_callback_requires_callback_secret(self):
+        """Test a guessed job number cannot overwrite the result"""
+        number, job_id, callback_secret = summary_jobs.create(None, "a.pdf")
+        assert summary_jobs.complete(number, "guess", "completed", "sahte", None) is False
+        # The client-facing read secret is not a callback credential either
+        assert summary_jobs.complete(number, job_id.partition("-")[2], "completed", "sahte", None) is False
+        assert summary_jobs.get(job_id)["status"] == "processing"
+
+    def test_callback_for_expired_job_is_ignored(self, redis):
+        """Test callbacks do not recreate expired records"""
+        assert summary_jobs.complete(999, "x", "completed", "x", None) is False
+        assert not redis.exists("summary_job:999")
+
+    def test_discard_removes_unstarted_job(self):
+        """Test a job that could not be handed off is not left processing"""
+        number, job_id, _ = summary_jobs.create(None, "a.pdf")
+        summary_jobs.discard(number)
+        assert summary_jobs.get(job_id) is None
@@ -0,0 +1,200 @@
+"""
+Unit tests for resumable chunked uploads
+"""
+import asyncio
+import hashlib
+import threading
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+
+from app import resumable_uploads
+
+CONTENT = b"%PDF-1.4\n" + bytes(range(256)) * 40
+
+
+async def _stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _broken_stream(chunk):
+    yield chunk
+    raise ConnectionError("client disconnected")
+
+
+@pytest.fixture
+def redis(tmp_path):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    with patch("app.resumable_uploads.redis_client", client), \
+            patch("app.resumable_uploads.SESSION_DIR", tmp_path):
+        yield client
+
+
+def _raising(status_code):
+    async def save(upload):
+        raise HTTPException(status_code=status_code, detail="Upload failed")
+    return save
+
+
+def _append(upload_id, offset, *chunks, user="u1"):
+    return asyncio.run(resumable_uploads.append_chunk(upload_id, user, offset, _stream(*chunks)))
+
+
+class TestResumableUploads:
+    """Test the session / chunk / finalize protocol"""
+
+    def test_chunks_assemble_and_hash_on_finalize(self, redis):
+        """Test chunks sent in order produce the original file and hash"""
+        upload_id = resumable_uploads.create_session("u1", "a.pdf", len(CONTENT))["upload_id"]
+        assert _append(upload_id, 0, CONTENT[:4000])["offset"] == 4000
+        assert _append(upload_id, 4000, CONTENT[4000:])["offset"] == len(CONTENT)
+
+        upload = asyncio.run(resumable_uploads.finalize(upload_id, "u1"))
+        assert upload.sha256 == hashlib.sha256(CONTENT).hexdigest()
+        assert upload.read_bytes() == CONTENT
+        assert upload.filename == "a.pdf"
+
+        resumable_uploads.discard(upload_id)
+        assert not upload.path.exists()
+        assert redis.keys("upload_session:*") == []
+
+    def test_interrupted_chunk_keeps_received_bytes(self, redis):
+        """Test a dropped connection advances the offset to what was written"""
+        upload_id = resumable_uploads.create_session("u1", "a.pdf", len(CONTENT))["upload_id"]
+        with pytest.raises(ConnectionError):
+            asyncio.run(resumable_uploads.append_chunk(upload_id, "u1", 0, _broken_stream(CONTENT[:1000])))
+        assert resumable_uploads.get_session(upload_id, "u1")["offset"] == 1000
+        # Lock is released so the client can resume immediately
+        assert _append(upload_id, 1000, CONTENT[1000:])["offset"] == len(CONTENT)
+
+    def test_offset_mismatch_conflicts(self, redis):
+        """Test a stale offset is rejected with the server offset"""
+        upload_id = resumable_uploads.create_session("u1", "a.pdf", len(CONTENT))["upload_id"]
+        _append(upload_id, 0, CONTENT[:100])
+        with pytest.raises(HTTPException) as exc:
+            _append(upload_id, 0, CONTENT[:100])
+        assert exc.value.status_code == 409
+        assert exc.value.headers["Upload-Offset"] == "100"
+
+    def test_put_that_read_old_offset_cannot_overwrite(self, redis):
+        """Test a PUT racing a just-finished PUT at the same offset gets 409"""
+        upload_id = resumable_uploads.create_session("u1", "a.pdf", len(CONTENT))["upload_id"]
+        lock_key = resumable_uploads._lock_key(upload_id)
+        original_set = redis.set
+        raced = []
+
+        def set_after_other_put(name, *args, **kwargs):
+            # The first PUT runs to completion just before the second takes the lock
+            if name == lock_key and not raced:
+                raced.append(True)
+                other = threading.Thread(target=_append, args=(upload_id, 0, CONTENT[:4000]))
+                other.start()
+                other.join()
+            return original_set(name, *args, **kwargs)
+
+        with patch.object(redis, "set", side_effect=set_after_other_put):
+            with pytest.raises(HTTPException) as exc:
+                _append(upload_id, 0, b"\0" * 100)
+        assert exc.value.status_code == 409
+        assert resumable_uploads.get_session(upload_id, "u1")["offset"] == 4000
+        assert resumable_uploads.part_path(upload_id).read_bytes()[:4000] == CONTENT[:4000]
+        assert not redis.exists(lock_key)
+
+    def test_incomplete_upload_cannot_finalize(self, redis):
+        """Test finalize requires every byte"""
+        upload_id = resumable_uploads.create_session("u1", "a.pdf", len(CONTENT))["upload_id"]
+        _append(upload_id, 0, CONTENT[:100])
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(resumable_uploads.finalize(upload_id, "u1"))
+        assert exc.value.status_code == 409
+
+    def test_size_limits(self, redis):
+        """Test declared size is checked up front and never exceeded"""
+        with pytest.raises(HTTPException) as exc:
+            resumable_uploads.create_session("u1", "a.pdf", 10 ** 10)
+        assert exc.value.status_code == 413
+
+        upload_id = resumable_uploads.create_session("u1", "a.pdf", 10)["upload_id"]
+        with pytest.raises(HTTPException) as exc:
+            _append(upload_id, 0, b"%PDF-1.4\n" + b"x" * 10)
+        assert exc.value.status_code == 413
+
+    def test_other_users_cannot_see_session(self, redis):
+        """Test sessions are scoped to their owner"""
+        upload_id = resumable_uploads.create_session("u1", "a.pdf", len(CONTENT))["upload_id"]
+        with pytest.raises(HTTPException) as exc:
+            resumable_uploads.get_session(upload_id, "u2")
+        assert exc.value.status_code == 404
+
+    def test_non_pdf_rejected_on_finalize(self, redis):
+        """Test the PDF signature is verified before saving"""
+        data = b"MZ" + b"\0" * 2000
+        upload_id = resumable_uploads.create_session("u1", "a.pdf", len(data))["upload_id"]
+        _append(upload_id, 0, data)
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(resumable_uploads.finalize(upload_id, "u1"))
+        assert exc.value.status_code == 400
+        assert not resumable_uploads.part_path(upload_id).exists()
+
+    def test_repeated_complete_returns_same_record(self, redis):
+        """Test a retried complete does not save the upload twice"""
+        upload_id = resumable_uploads.create_session("u1", "a.pdf", len(CONTENT))["upload_id"]
+        _append(upload_id, 0, CONTENT)
+        saved = []
+
+        async def save(upload):
+            saved.append(upload.sha256)
+            return {"file_id": len(saved), "filename": upload.filename, "file_size": upload.size}
+
+        first = asyncio.run(resumable_uploads.complete(upload_id, "u1", save))
+        second = asyncio.run(resumable_uploads.complete(upload_id, "u1", save))
+        assert first == second == {"file_id": 1, "filename": "a.pdf", "file_size": len(CONTENT)}
+        assert len(saved) == 1
+        assert not resumable_uploads.part_path(upload_id).exists()
+        assert not redis.exists(resumable_uploads._lock_key(upload_id))
+        with pytest.raises(HTTPException) as exc:
+            _append(upload_id, len(CONTENT), b"x")
+        assert exc.value.status_code == 409
+
+    def test_concurrent_complete_conflicts(self, redis):
+        """Test a complete arriving while another is saving gets 409"""
+        upload_id = resumable_uploads.create_session("u1", "a.pdf", len(CONTENT))["upload_id"]
+        _append(upload_id, 0, CONTENT)
+        inner = []
+
+        async def save(upload):
+            with pytest.raises(HTTPException) as exc:
+                await resumable_uploads.complete(upload_id, "u1", save)
+            inner.append(exc.value.status_code)
+            return {"file_id": 1}
+
+        assert asyncio.run(resumable_uploads.complete(upload_id, "u1", save)) == {"file_id": 1}
+        assert inner == [409]
+
+    def test_failed_save_can_be_retried(self, redis):
+        """Test the part file and session survive a failed save"""
+        upload_id = resumable_uploads.create_session("u1", "a.pdf", len(CONTENT))["upload_id"]
+        _append(upload_id, 0, CONTENT)
+
+        async def save(upload):
+            assert upload.read_bytes() == CONTENT
+            return {"file_id": 7}
+
+        with pytest.raises(HTTPException):
+            asyncio.run(resumable_uploads.complete(upload_id, "u1", _raising(500)))
+        assert resumable_uploads.part_path(upload_id).read_bytes() == CONTENT
+        assert not redis.exists(resumable_uploads._lock_key(upload_id))
+        assert asyncio.run(resumable_uploads.complete(upload_id, "u1", save)) == {"file_id": 7}
+
+    def test_sweep_removes_only_expired_files(self, redis, tmp_path):
+        """Test leftover files are removed once their session expired"""
+        live = resumable_uploads.create_session("u1", "a.pdf", len(CONTENT))["upload_id"]
+        stale = tmp_path / "deadbeef.part"
+        stale.write_bytes(b"x")
+        with patch.object(resumable_uploads.settings, "RESUMABLE_UPLOAD_TTL_SECONDS", -1):
+            assert resumable_uploads.sweep_expired() == 1
+        assert not stale.exists()
+        assert resumable_uploads.part_path(live).exists()
@@ -0,0 +1,100 @@
+"""
+Unit tests for full-text search over stored PDFs
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app import repositories
+from app.db import get_async_db
+from app.deps import get_current_user
+from app.routers import files
+
+
+def _row(pdf_id, page, rank, filename="a.pdf", snippet="…**kira**…"):
+    return SimpleNamespace(pdf_id=pdf_id, filename=filename, page=page, rank=rank, snippet=snippet)
+
+
+class _CapturingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return SimpleNamespace(all=lambda: [])
+
+
+class TestGroupByDocument:
+    """Test grouping page hits into documents"""
+
+    def test_documents_ordered_by_best_page(self):
+        """Test a document's position comes from its highest ranked page"""
+        rows = [_row("d2", 4, 0.9, "b.pdf"), _row("d1", 1, 0.5), _row("d2", 7, 0.3, "b.pdf")]
+        docs = repositories.search.group_by_document(rows)
+        assert [d["file_id"] for d in docs] == ["d2", "d1"]
+        assert docs[0]["score"] == 0.9
+        assert [p["page"] for p in docs[0]["pages"]] == [4, 7]
+        assert docs[1]["pages"] == [{"page": 1, "score": 0.5, "snippet": "…**kira**…"}]
+
+    def test_no_hits(self):
+        """Test an empty result produces no documents"""
+        assert repositories.search.group_by_document([]) == []
+
+
+class TestSearchQuery:
+    """Test the generated SQL"""
+
+    def _sql(self, **settings_overrides):
+        session = _CapturingSession()
+        with patch.multiple(repositories.search.settings, **settings_overrides):
+            asyncio.run(repositories.search.search_pages(session, "u1", "kira sözleşmesi", 20))
+        (stmt,) = session.statements
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        return str(compiled), compiled.params
+
+    def test_rank_is_bounded_by_candidate_limit(self):
+        """Test matches are capped before ts_rank_cd runs and headlines only cover the final page"""
+        sql, params = self._sql(SEARCH_MAX_CANDIDATES=123)
+        values = list(params.values())
+        assert "kira sözleşmesi" in values and "u1" in values
+        assert 123 in values and 20 in values
+        assert "websearch_to_tsquery" in sql
+        # Innermost subquery: index match with the candidate cap, no ranking
+        candidates = sql[sql.rindex("SELECT"):sql.rindex(") AS")]
+        assert "pdf_search_pages.user_id" in candidates and "LIMIT" in candidates
+        assert "ts_rank_cd" not in candidates
+        assert sql.count("ts_headline(") == 1
+
+
+class TestSearchEndpoint:
+    """Test /files/search wiring"""
+
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+        app.include_router(files.router)
+        app.dependency_overrides[get_current_user] = lambda: {"sub": "u1"}
+        app.dependency_overrides[get_async_db] = lambda: None
+        return TestClient(app)
+
+    def test_results_grouped_by_document(self, client):
+        """Test the repository is called with the user's id and rows are grouped"""
+        rows = [_row("d1", 2, 0.4), _row("d1", 5, 0.2)]
+        with patch.object(repositories.search, "search_pages", AsyncMock(return_value=rows)) as search:
+            response = client.get("/files/search", params={"q": "kira", "limit": 10})
+        assert response.status_code == 200
+        assert search.call_args.args[1:] == ("u1", "kira", 10)
+        body = response.json()
+        assert body["query"] == "kira"
+        assert [p["page"] for p in body["results"][0]["pages"]] == [2, 5]
+
+    def test_short_query_rejected(self, client):
+        """Test queries below the minimum length never reach the database"""
+        with patch.object(repositories.search, "search_pages", AsyncMock()) as search:
+            assert client.get("/files/search", params={"q": "k"}).status_code == 422
+        search.assert_not_called()
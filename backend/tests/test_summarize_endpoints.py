@@ -0,0 +1,118 @@
+"""
+Unit tests for /files/summarize routing and summary job callbacks
+"""
+import io
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import fakeredis
+import jwt
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from reportlab.pdfgen import canvas
+
+from app import summary_jobs
+from app.ai_client import get_ai_client
+from app.config import settings
+from app.db import get_async_db
+from app.routers import files
+
+
+def _text_pdf(pages: int) -> bytes:
+    out = io.BytesIO()
+    c = canvas.Canvas(out)
+    for i in range(pages):
+        c.drawString(72, 720, f"Bu sayfa gerçek bir metin katmanı içerir. {i + 1}")
+        c.showPage()
+    c.save()
+    return out.getvalue()
+
+
+def _response(status_code: int, body: dict) -> MagicMock:
+    response = MagicMock(status_code=status_code)
+    response.json.return_value = body
+    return response
+
+
+@pytest.fixture
+def redis():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    with patch("app.summary_jobs.redis_client", client):
+        yield client
+
+
+@pytest.fixture
+def ai_client():
+    return MagicMock(post=AsyncMock())
+
+
+@pytest.fixture
+def client(ai_client):
+    app = FastAPI()
+    app.include_router(files.router)
+    app.dependency_overrides[get_async_db] = lambda: None
+    app.dependency_overrides[get_ai_client] = lambda: ai_client
+    return TestClient(app)
+
+
+@pytest.fixture
+def large_document():
+    """Every document is above the sync limit and the async route is available"""
+    with patch.object(files.preflight.settings, "PREFLIGHT_SYNC_MAX_PAGES", 1), \
+            patch.object(files, "summary_async_available", return_value=True), \
+            patch.object(files, "get_user_llm_provider", return_value="cloud"), \
+            patch.object(files, "increment_user_usage", AsyncMock()) as usage:
+        yield usage
+
+
+def _summarize(client, query=""):
+    token = jwt.encode({"sub": "u1"}, settings.JWT_SECRET, algorithm="HS256")
+    return client.post(
+        f"/files/summarize{query}",
+        files={"file": ("kitap.pdf", _text_pdf(3), "application/pdf")},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+class TestSummarizeRouting:
+    """Test the async route stays opt-in and both routes use the same mode"""
+
+    def test_large_document_is_summarized_synchronously_by_default(self, client, ai_client, large_document):
+        """Test clients that do not opt in always receive a summary"""
+        ai_client.post.return_value = _response(200, {"summary": "özet"})
+        response = _summarize(client)
+        assert response.status_code == 200
+        assert response.json()["summary"] == "özet"
+        assert ai_client.post.call_args.args[0] == "summarize-sync"
+        assert ai_client.post.call_args.kwargs["params"]["mode"] == files.SUMMARY_MODE
+        large_document.assert_awaited_once_with("u1", "summary")
+
+    def test_opt_in_hands_off_without_charging(self, client, ai_client, large_document, redis):
+        """Test ?async=1 returns a job id, sends the sync mode and charges nothing yet"""
+        ai_client.post.return_value = _response(202, {})
+        with patch.object(files.storage_service, "spool_for_handoff", return_value="handoff/x.pdf"):
+            response = _summarize(client, "?async=1")
+        assert response.status_code == 202
+        assert summary_jobs.get(response.json()["job_id"])["status"] == "processing"
+        assert ai_client.post.call_args.args[0] == "summarize-async"
+        assert ai_client.post.call_args.kwargs["json"]["mode"] == files.SUMMARY_MODE
+        large_document.assert_not_called()
+
+
+class TestSummaryJobCallback:
+    """Test usage is charged when the summary is delivered"""
+
+    def test_usage_charged_once_on_completion(self, client, redis):
+        """Test retried callbacks do not charge twice and failures are not charged"""
+        number, _, callback_secret = summary_jobs.create("u1", "kitap.pdf")
+        failed, _, failed_secret = summary_jobs.create("u2", "a.pdf")
+        body = {"pdf_id": number, "status": "completed", "summary": "özet"}
+        with patch.object(files, "increment_user_usage", AsyncMock()) as usage:
+            for _ in range(2):
+                response = client.post(f"/files/summary-jobs/callback/{callback_secret}/{number}", json=body)
+                assert response.status_code == 200
+            client.post(
+                f"/files/summary-jobs/callback/{failed_secret}/batch",
+                json={"callbacks": [{"pdf_id": failed, "status": "failed", "error": "x"}]},
+            )
+        usage.assert_awaited_once_with("u1", "summary")
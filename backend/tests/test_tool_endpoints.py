@@ -0,0 +1,46 @@
+"""
+Unit tests for PDF tool endpoint wiring
+"""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import get_async_db
+from app.pdf_tools import get_pdf_tool_pool
+from app.routers import files
+
+PDF = ("a.pdf", b"%PDF-1.4 test", "application/pdf")
+
+
+class TestSaveResultRequiresLogin:
+    """Test save_result=true without a login is rejected before any work is done"""
+
+    @pytest.fixture
+    def pool(self):
+        pool = MagicMock()
+        pool.run = AsyncMock()
+        return pool
+
+    @pytest.fixture
+    def client(self, pool):
+        app = FastAPI()
+        app.include_router(files.router)
+        app.dependency_overrides[get_async_db] = lambda: None
+        app.dependency_overrides[get_pdf_tool_pool] = lambda: pool
+        return TestClient(app)
+
+    @pytest.mark.parametrize("path,data,upload", [
+        ("/files/extract-pages", {"page_range": "1"}, [("file", PDF)]),
+        ("/files/reorder", {"page_numbers": "1"}, [("file", PDF)]),
+        ("/files/merge-pdfs", {}, [("files", PDF), ("files", PDF)]),
+        ("/files/pipeline", {"operations": '[{"op": "extract", "pages": "1"}]'}, [("files", PDF)]),
+    ])
+    def test_tool_never_runs(self, client, pool, path, data, upload):
+        """Test the tool is not executed and usage is not counted"""
+        with patch.object(files, "increment_user_usage", AsyncMock()) as usage:
+            response = client.post(path, data={**data, "save_result": "true"}, files=upload)
+        assert response.status_code == 401
+        pool.run.assert_not_called()
+        usage.assert_not_called()
@@ -0,0 +1,84 @@
+"""
+Unit tests for write-behind usage counters
+"""
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from app import usage_counters
+
+
+@pytest.fixture
+def redis():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    with patch("app.usage_counters.redis_client", client):
+        yield client
+
+
+class TestUsageCounters:
+    """Test Redis accumulation and batched flush"""
+
+    def test_record_accumulates_in_redis(self, redis):
+        """Test increments are summed per user and the user is marked dirty"""
+        assert usage_counters.record_usage("u1", "summary")
+        assert usage_counters.record_usage("u1", "summary")
+        assert usage_counters.record_usage("u1", "tool")
+        assert usage_counters.pending_counts("u1") == {"summary_count": 2, "tools_count": 1}
+        assert redis.smembers(usage_counters.DIRTY_KEY) == {"u1"}
+
+    def test_record_without_redis_returns_false(self):
+        """Test the caller is told to write directly when Redis is unavailable"""
+        with patch("app.usage_counters.redis_client", None):
+            assert usage_counters.record_usage("u1", "tool") is False
+
+    def test_flush_writes_one_batch_and_clears_pending(self, redis):
+        """Test pending counters for several users are flushed in a single upsert"""
+        usage_counters.record_usage("u1", "summary")
+        usage_counters.record_usage("u2", "tool")
+        usage_counters.record_usage("u2", "tool")
+
+        with patch("app.usage_counters.upsert_usage_rows") as upsert:
+            assert usage_counters.flush_pending() == 2
+
+        upsert.assert_called_once()
+        rows = {row["user_id"]: row for row in upsert.call_args.args[0]}
+        assert rows["u1"]["summary_count"] == 1
+        assert rows["u2"]["tools_count"] == 2
+        assert usage_counters.pending_counts("u1") == {}
+        assert redis.scard(usage_counters.DIRTY_KEY) == 0
+
+    def test_failed_flush_restores_counters(self, redis):
+        """Test counters go back to Redis when the database write fails"""
+        usage_counters.record_usage("u1", "tool")
+
+        with patch("app.usage_counters.upsert_usage_rows", side_effect=RuntimeError("db down")):
+            assert usage_counters.flush_pending() == 0
+
+        assert usage_counters.pending_counts("u1") == {"tools_count": 1}
+        assert redis.smembers(usage_counters.DIRTY_KEY) == {"u1"}
+
+    def test_flush_all_continues_past_empty_batches(self, redis):
+        """Test a batch of users without pending counts does not stop the shutdown flush"""
+        redis.sadd(usage_counters.DIRTY_KEY, "empty1", "empty2")
+        usage_counters.record_usage("u1", "tool")
+        with patch.object(redis, "spop", side_effect=[["empty1", "empty2"], ["u1"], []]), \
+                patch("app.usage_counters.upsert_usage_rows") as upsert:
+            assert usage_counters.flush_all() == 1
+        assert upsert.call_args.args[0][0]["user_id"] == "u1"
+
+    def test_flush_all_stops_when_write_fails(self, redis):
+        """Test restored counters are not retried in a tight loop"""
+        usage_counters.record_usage("u1", "tool")
+        with patch("app.usage_counters.upsert_usage_rows", side_effect=RuntimeError("db down")) as upsert:
+            assert usage_counters.flush_all() == 0
+        upsert.assert_called_once()
+        assert usage_counters.pending_counts("u1") == {"tools_count": 1}
+
+    def test_upsert_adds_to_existing_counts(self):
+        """Test the UPSERT increments existing rows instead of overwriting them"""
+        row = {"user_id": "u1", "summary_count": 1, "tools_count": 0, "last_activity": datetime.now(timezone.utc)}
+        sql = str(usage_counters._upsert_statement([row]))
+        assert "ON CONFLICT (user_id) DO UPDATE" in sql
+        assert "user_stats.summary_count + excluded.summary_count" in sql
@@ -0,0 +1,78 @@
+"""
+Unit tests for the per-user profile cache
+"""
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from app import user_cache
+
+PROFILE = {"id": "u1", "email": "a@b.c", "llm_choice_id": 1, "role": "Pro"}
+
+
+@pytest.fixture
+def cache():
+    fresh = user_cache.UserProfileCache(max_entries=2, ttl=60)
+    with patch("app.user_cache.cache", fresh), patch("app.user_cache.redis_client", None):
+        yield fresh
+
+
+class TestUserProfileCache:
+    """Test LRU, TTL and read-through behaviour"""
+
+    def test_read_through_loads_once(self, cache):
+        """Test the database is only queried on the first lookup"""
+        with patch("app.user_cache._load_profile", return_value=PROFILE) as load:
+            assert user_cache.get_profile("u1") == PROFILE
+            assert user_cache.llm_provider("u1") == "cloud"
+        load.assert_called_once_with("u1")
+        assert cache.stats()["hits"] == 1
+
+    def test_missing_user_is_not_cached(self, cache):
+        """Test unknown users fall back to local and are retried next time"""
+        with patch("app.user_cache._load_profile", return_value=None) as load:
+            assert user_cache.llm_provider("ghost") == "local"
+            assert user_cache.get_profile("ghost") is None
+        assert load.call_count == 2
+
+    def test_expired_entry_is_reloaded(self):
+        """Test entries older than the TTL are treated as misses"""
+        expired = user_cache.UserProfileCache(max_entries=10, ttl=-1)
+        expired.put("u1", PROFILE)
+        assert expired.get("u1") is None
+        assert expired.stats()["entries"] == 0
+
+    def test_least_recently_used_is_evicted(self, cache):
+        """Test the oldest untouched entry is dropped when full"""
+        cache.put("u1", PROFILE)
+        cache.put("u2", PROFILE)
+        cache.get("u1")
+        cache.put("u3", PROFILE)
+        assert cache.get("u2") is None
+        assert cache.get("u1") == PROFILE
+
+
+class TestInvalidation:
+    """Test local and cross-worker invalidation"""
+
+    def test_invalidate_drops_local_entry_and_publishes(self, cache):
+        """Test invalidation reaches other workers through Redis"""
+        client = fakeredis.FakeRedis(decode_responses=True)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(user_cache.INVALIDATION_CHANNEL)
+
+        cache.put("u1", PROFILE)
+        with patch("app.user_cache.redis_client", client):
+            user_cache.invalidate("u1")
+
+        assert cache.get("u1") is None
+        messages = [pubsub.get_message(timeout=1) for _ in range(2)]
+        assert [m["data"] for m in messages if m] == ["u1"]
+
+    def test_listener_message_discards_entry(self, cache):
+        """Test a message from another worker drops the local copy"""
+        cache.put("u1", PROFILE)
+        user_cache._on_invalidation({"channel": user_cache.INVALIDATION_CHANNEL, "data": "u1"})
+        assert cache.get("u1") is None
+        assert cache.stats()["invalidations"] == 1